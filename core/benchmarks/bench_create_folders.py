@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+'''
+Benchmark pipsy.schema.folders create_folders() for the shots of a sequence.
+
+Creates the folders of every shot of a sequence of the database set in config.ini under
+a temporary root, set as the root folder of a copy of the folders schema. Reports seconds
+and folders per second of a dry run, of the first run creating them and of a second run
+finding them all existing.
+
+    Usage:
+        python benchmarks/bench_create_folders.py [sequence] [threads] [schema]
+        e.g. python benchmarks/bench_create_folders.py sq01 8 folders_film
+'''
+
+# imports
+import sys
+import shutil
+import tempfile
+import yaml
+from timeit import default_timer
+from pipsy.entities import Sequence, Shot
+from pipsy.schema import core, folders
+
+
+def main(sequence='sq01', threads=folders.THREADS, schema=folders.SCHEMA):
+    sequence = Sequence.find_query(name=sequence).first()
+    if sequence is None:
+        raise SystemExit('No Sequence found to benchmark with.')
+
+    shots = Shot.find(sequence=sequence)
+    root = tempfile.mkdtemp(prefix='bench_create_folders_')
+    data = dict(core.read_schema(schema), name=root + '/projects')
+
+    core.SCHEMAS_ROOT = root
+    with open('{}/{}.schema'.format(root, schema), 'w') as f:
+        yaml.safe_dump(data, f)
+    core._forget(schema)
+
+    try:
+        print('{} shots of {!r}, {} threads, under {}'.format(len(shots), sequence.name,
+                                                              threads, root))
+        print('{:<10} {:>8} {:>10} {:>14}'.format('mode', 'folders', 'seconds', 'folders/sec'))
+        for (mode, dry_run) in (('dry_run', True), ('create', False), ('existing', False)):
+            start = default_timer()
+            created = folders.create_folders(shots, schema=schema, dry_run=dry_run,
+                                             threads=threads)
+            seconds = default_timer() - start
+            total = len(folders.get_folders(shots, schema=schema))
+            print('{:<10} {:>8} {:>10.2f} {:>14.1f}'.format(mode, len(created), seconds,
+                                                            total / seconds))
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:2] + [int(arg) for arg in sys.argv[2:3]] + sys.argv[3:4])
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+'''
+Benchmark pipsy.db connection pool modes.
+
+Reports server connects per second and latency per Project.find() for each pool mode
+configured in pipsy.db.POOL_CLASSES, against the database set in config.ini.
+
+    Usage:
+        python benchmarks/bench_db_pool.py [iterations]
+'''
+
+# imports
+import sys
+from timeit import default_timer
+from sqlalchemy import event
+from pipsy import db
+from pipsy.entities import Project
+
+
+def bench(pool, iterations):
+    '''
+    Run Project.find() iterations times using given pool mode.
+
+        Args:
+            pool       (str) : connection pool e.g. [queue, null].
+            iterations (int) : number of find() calls.
+
+        Returns:
+            (connects, seconds) tuple.
+    '''
+    db.POOL = pool
+    session = db.connect_database()
+    connects = [0]
+
+    @event.listens_for(session.bind, 'connect')
+    def count(dbapi_connection, connection_record):
+        connects[0] += 1
+
+    Project.find()  # warm up
+    connects[0] = 0
+
+    start = default_timer()
+    for _ in range(iterations):
+        Project.find()
+    seconds = default_timer() - start
+
+    session.remove()
+    return connects[0], seconds
+
+
+def main(iterations=2000):
+    pool = db.POOL
+    print('{:<8} {:>10} {:>14} {:>16}'.format('pool', 'connects', 'connects/sec', 'ms per find()'))
+    try:
+        for mode in sorted(db.POOL_CLASSES):
+            (connects, seconds) = bench(mode, iterations)
+            print('{:<8} {:>10} {:>14.1f} {:>16.3f}'.format(
+                  mode, connects, connects / seconds, seconds * 1000.0 / iterations))
+    finally:
+        db.POOL = pool
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+'''
+Benchmark cached (baked) find() queries against building a new Query per call.
+
+Reports microseconds per call for each filter shape in Shot.FIND_SHAPES, looking up
+the first Shot of the database set in config.ini.
+
+    Usage:
+        python benchmarks/bench_find_baked.py [iterations]
+'''
+
+# imports
+import sys
+from timeit import default_timer
+from pipsy.entities import Shot
+
+
+def bench(find, kwargs, iterations):
+    '''
+    Call find(**kwargs) iterations times.
+
+        Args:
+            find    (callable) : find function.
+            kwargs      (dict) : find arguments.
+            iterations   (int) : number of calls.
+
+        Returns:
+            microseconds per call.
+    '''
+    find(**kwargs)  # warm up
+
+    start = default_timer()
+    for _ in range(iterations):
+        find(**kwargs)
+    return (default_timer() - start) * 1000000.0 / iterations
+
+
+def main(iterations=2000):
+    shot = Shot.find_query().first()
+    if shot is None:
+        raise SystemExit('No Shot found to benchmark with.')
+
+    shapes = {('id',): dict(id=shot.id),
+              ('shotgun_id',): dict(shotgun_id=shot.shotgun_id),
+              ('name', 'project'): dict(project=shot.project, name=shot.name),
+              ('name', 'sequence'): dict(sequence=shot.sequence, name=shot.name)}
+
+    def find_uncached(**kwargs):
+        return Shot.find_query(**kwargs).all()
+
+    print('{:<20} {:>14} {:>14} {:>10}'.format('shape', 'us per find()', 'us uncached', 'speedup'))
+    for shape in Shot.FIND_SHAPES:
+        kwargs = shapes[shape]
+        if None in kwargs.values():
+            continue
+
+        cached = bench(Shot.find, kwargs, iterations)
+        uncached = bench(find_uncached, kwargs, iterations)
+        print('{:<20} {:>14.1f} {:>14.1f} {:>9.2f}x'.format(
+              '+'.join(shape), cached, uncached, uncached / cached))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+'''
+Benchmark entity find() against find(columns=...) projection.
+
+Reports rows per second and approximate bytes per row when loading every row of an
+entity table as full mapped instances and as namedtuple rows of a few columns,
+against the database set in config.ini.
+
+    Usage:
+        python benchmarks/bench_find_columns.py [entity] [iterations]
+        e.g. python benchmarks/bench_find_columns.py Shot 10
+'''
+
+# imports
+import sys
+from timeit import default_timer
+from sqlalchemy import inspect
+from pipsy import db
+from pipsy import entities
+
+# Projected columns, when the entity has them
+COLUMNS = ('id', 'name', 'status')
+
+
+def sizeof(obj):
+    '''
+    Return approximate memory footprint of a loaded row in bytes.
+    Includes the object, its attribute values and, for mapped instances, the ORM state.
+    '''
+    if isinstance(obj, tuple):
+        return sys.getsizeof(obj) + sum(sys.getsizeof(value) for value in obj)
+
+    state = inspect(obj)
+    values = [value for value in vars(obj).values() if value is not state]
+
+    return (sys.getsizeof(obj) + sys.getsizeof(vars(obj))
+            + sys.getsizeof(state) + sys.getsizeof(state.committed_state)
+            + sum(sys.getsizeof(value) for value in values))
+
+
+def bench(entity, iterations, columns=None):
+    '''
+    Run entity.find() iterations times.
+
+        Args:
+            entity    (Entity) : entity class e.g. Shot.
+            iterations   (int) : number of find() calls.
+            columns     (list) : column names to project, None to load instances.
+
+        Returns:
+            (rows, seconds, bytes per row) tuple.
+    '''
+    session = db.connect_database()
+    rows = []
+    seconds = 0.0
+
+    for _ in range(iterations):
+        # start from an empty identity map so every find() builds its instances.
+        session.expunge_all()
+
+        start = default_timer()
+        rows = entity.find(columns=columns)
+        seconds += default_timer() - start
+
+    size = sum(sizeof(row) for row in rows) / float(len(rows)) if rows else 0.0
+    return len(rows), seconds, size
+
+
+def main(entity='Shot', iterations=10):
+    entity = getattr(entities, entity)
+    columns = [name for name in COLUMNS if name in entity.__table__.c]
+
+    print('{:<10} {:>10} {:>14} {:>14}'.format('mode', 'rows', 'rows/sec', 'bytes/row'))
+    for (mode, projection) in (('entity', None), ('columns', columns)):
+        (rows, seconds, size) = bench(entity, iterations, projection)
+        print('{:<10} {:>10} {:>14.1f} {:>14.1f}'.format(
+              mode, rows, rows * iterations / seconds if seconds else 0.0, size))
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:2] + [int(arg) for arg in sys.argv[2:3]])
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+'''
+Benchmark pipsy.schema get_path() resolving shot paths, and match_path() parsing them.
+
+Reports paths per second resolving count paths of a schema key for the shots of the
+database set in config.ini, through get_path() and through the compiled PathTemplate
+of the key with fields expanded once per shot, then matching count files under those
+paths back to the key with match_path(), given the Project roots read once.
+
+    Usage:
+        python benchmarks/bench_get_path.py [count] [key] [schema]
+        e.g. python benchmarks/bench_get_path.py 100000 shot_pub film
+'''
+
+# imports
+import sys
+from itertools import cycle, islice
+from timeit import default_timer
+from pipsy.entities import Shot
+from pipsy.schema import core
+
+
+def bench(shots, count, key, schema):
+    '''
+    Resolve count paths of key, cycling through shots.
+
+        Args:
+            shots  (list) : Shot instances.
+            count   (int) : number of paths to resolve.
+            key     (str) : schema key e.g. 'shot_pub'.
+            schema  (str) : schema's name.
+
+        Returns:
+            dict of mode : seconds.
+    '''
+    results = dict()
+
+    start = default_timer()
+    for shot in islice(cycle(shots), count):
+        core.get_path(key, {'shot': shot}, schema)
+    results['get_path'] = default_timer() - start
+
+    template = core.get_template(key, schema)
+    fields = [core._expand_fields({'shot': shot}) for shot in shots]
+
+    start = default_timer()
+    for shot_fields in islice(cycle(fields), count):
+        template.resolve(shot_fields)
+    results['template'] = default_timer() - start
+
+    paths = ['{}/file.ma'.format(template.resolve(shot_fields)) for shot_fields in fields]
+    roots = core.project_roots()
+
+    start = default_timer()
+    for path in islice(cycle(paths), count):
+        core.match_path(path, schema, roots)
+    results['match_path'] = default_timer() - start
+
+    return results
+
+
+def main(count=100000, key='shot_pub', schema='film'):
+    shots = Shot.find(load=['sequence.episode', 'project'])
+    if not shots:
+        raise SystemExit('No Shot found to benchmark with.')
+
+    print('{} {!r} paths of {} shots'.format(count, key, len(shots)))
+    print('{:<10} {:>10} {:>14}'.format('mode', 'seconds', 'paths/sec'))
+    for (mode, seconds) in sorted(bench(shots, count, key, schema).items()):
+        print('{:<10} {:>10.2f} {:>14.1f}'.format(mode, seconds, count / seconds))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]] + sys.argv[2:4])
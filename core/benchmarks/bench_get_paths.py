@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+'''
+Benchmark pipsy.schema get_path() per entity against get_paths() in batch.
+
+Reports seconds, paths per second and queries resolving a schema key for every shot of
+the database set in config.ini, loaded without their parents, one get_path() call per
+shot and one get_paths() call for all of them.
+
+    Usage:
+        python benchmarks/bench_get_paths.py [key] [schema]
+        e.g. python benchmarks/bench_get_paths.py shot_pub film
+'''
+
+# imports
+import sys
+from timeit import default_timer
+from pipsy import db
+from pipsy.db import stats
+from pipsy.entities import Shot
+from pipsy.schema import core
+
+
+def queries():
+    '''Return the number of statements recorded by pipsy.db.stats'''
+    return sum(caller['count'] for caller in stats.snapshot()['callers'].values())
+
+
+def bench(mode, key, schema):
+    '''
+    Resolve key for every shot, loaded in an empty session.
+
+        Args:
+            mode    (str) : 'get_path' or 'get_paths'.
+            key     (str) : schema key e.g. 'shot_pub'.
+            schema  (str) : schema's name.
+
+        Returns:
+            (paths, seconds, queries) tuple.
+    '''
+    db.connect_database().expunge_all()
+    shots = Shot.find()
+    stats.reset()
+
+    start = default_timer()
+    if mode == 'get_path':
+        paths = [core.get_path(key, {'shot': shot}, schema) for shot in shots]
+    else:
+        paths = core.get_paths(key, shots, schema)
+    seconds = default_timer() - start
+
+    return len(paths), seconds, queries()
+
+
+def main(key='shot_pub', schema='film'):
+    if not Shot.exists():
+        raise SystemExit('No Shot found to benchmark with.')
+
+    print('{:<10} {:>8} {:>10} {:>14} {:>8}'.format('mode', 'paths', 'seconds', 'paths/sec',
+                                                    'queries'))
+    for mode in ('get_path', 'get_paths'):
+        (paths, seconds, count) = bench(mode, key, schema)
+        print('{:<10} {:>8} {:>10.2f} {:>14.1f} {:>8}'.format(
+              mode, paths, seconds, paths / seconds, count))
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:3])
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+'''
+Benchmark concurrent Publish.create(version=None) on a single PublishGroup.
+
+Starts threads publishers, each creating publishes versions of the first PublishGroup
+of the database set in config.ini, and reports publishes per second, failed publishes
+and whether the allocated versions are gap-free.
+
+    Usage:
+        python benchmarks/bench_next_version.py [threads] [publishes]
+'''
+
+# imports
+import sys
+import threading
+from collections import Counter
+from timeit import default_timer
+from pipsy import db
+from pipsy.entities import Publish, PublishGroup, User
+
+
+def publisher(index, group_id, user_id, publishes, versions, errors):
+    '''
+    Create publishes versions of PublishGroup group_id in this thread session.
+
+        Args:
+            index       (int) : publisher index, used in publish roots.
+            group_id    (int) : PublishGroup id.
+            user_id     (int) : User id.
+            publishes   (int) : number of publishes to create.
+            versions   (list) : allocated versions, appended to.
+            errors     (list) : failed publishes exceptions, appended to.
+    '''
+    group = PublishGroup.findby_id(group_id)
+    user = User.findby_id(user_id)
+
+    for number in range(publishes):
+        root = '/tmp/bench_next_version/{}/{}_{}'.format(default_timer(), index, number)
+        try:
+            publish = Publish.create(project=group.project, publishgroup=group,
+                                     publishkind=group.publishkind, user=user, root=root)
+            versions.append(publish.version)
+        except Exception as err:
+            errors.append(err)
+
+    db.connect_database().remove()
+
+
+def main(threads=50, publishes=20):
+    group = PublishGroup.find_query().first()
+    user = User.find_query().first()
+    if group is None or user is None:
+        raise SystemExit('No PublishGroup and User found to benchmark with.')
+
+    first = group.next_version() + 1
+    (versions, errors) = ([], [])
+    args = (group.id, user.id, publishes, versions, errors)
+    workers = [threading.Thread(target=publisher, args=(index,) + args)
+               for index in range(threads)]
+
+    start = default_timer()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    seconds = default_timer() - start
+
+    gap_free = sorted(versions) == list(range(first, first + len(versions)))
+    print('{} publishers x {} publishes in {:.2f}s'.format(threads, publishes, seconds))
+    print('{:.1f} publishes/s, {} failed, versions {}..{} gap-free: {}'.format(
+          len(versions) / seconds, len(errors), first, first + len(versions) - 1, gap_free))
+    for (name, count) in sorted(Counter(err.__class__.__name__ for err in errors).items()):
+        print('failed with {}: {}'.format(name, count))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
@@ -1,13 +1,24 @@
+import os
 from contextlib import contextmanager
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, exc
 from sqlalchemy.orm import sessionmaker, scoped_session
 from sqlalchemy.exc import DataError, IntegrityError
-from sqlalchemy.pool import NullPool
+from sqlalchemy.pool import NullPool, QueuePool
 from .. core import logging
 from .. config import config
+from . routing import ReplicaSet, RoutingSession
+from . import stats
 
 LOG = logging.getLogger(__name__, level=logging.INFO)
 
+
+def _option(option, default=None):
+    '''Return a [database] config option, or default if not set.'''
+    if config.has_option('database', option):
+        return config.get('database', option)
+    return default
+
+
 # configuration
 RDBMS    = config.get('database', 'rdbms')
 HOST     = config.get('database', 'host')
@@ -16,11 +27,34 @@ DATABASE = config.get('database', 'database')
 USER     = config.get('database', 'user')
 PASSWD   = config.get('database', 'passwd')
 
+# pool configuration
+POOL          = _option('pool', 'queue')
+POOL_SIZE     = int(_option('pool_size', 5))
+MAX_OVERFLOW  = int(_option('max_overflow', 10))
+POOL_TIMEOUT  = int(_option('pool_timeout', 30))
+POOL_RECYCLE  = int(_option('pool_recycle', 3600))
+POOL_PRE_PING = _option('pool_pre_ping', 'true').lower() in ('1', 'yes', 'true', 'on')
+
+POOL_CLASSES = {'null': NullPool, 'queue': QueuePool}
+
+# read replicas configuration
+REPLICAS               = tuple(u.strip() for u in _option('replicas', '').split(',') if u.strip())
+REPLICA_MAX_LAG        = int(_option('replica_max_lag', 5))
+REPLICA_CHECK_INTERVAL = int(_option('replica_check_interval', 10))
+REPLICA_STICKY         = int(_option('replica_sticky', 2))
+
+# query statistics configuration
+STATS          = _option('stats', 'true').lower() in ('1', 'yes', 'true', 'on')
+SLOW_QUERY     = float(_option('slow_query', 1.0))
+SLOW_QUERY_LOG = _option('slow_query_log', '') or None
+
+SLOW_LOG = logging.getLogger('pipsy.db.slow', file=SLOW_QUERY_LOG, level=logging.WARNING)
+
 __cached_sessions = {}
 
 
 def connect_database(rdbms=RDBMS, host=HOST, port=PORT, user=USER,
-                     password=PASSWD, database=DATABASE):
+                     password=PASSWD, database=DATABASE, pool=None, replicas=None):
     '''
     Create a session connection to database.
 
@@ -31,16 +65,21 @@ def connect_database(rdbms=RDBMS, host=HOST, port=PORT, user=USER,
             user     (str) : authorized username.
             password (str) : user's password.
             database (str) : database to select.
+            pool     (str) : connection pool e.g. [queue, null]. defaults to POOL.
+            replicas (list) : read replica engine urls. defaults to REPLICAS.
 
         Returns:
             Session instance.
     '''
+    pool = pool or POOL
+    replicas = tuple(REPLICAS if replicas is None else replicas)
     engine_url = build_engine_url(rdbms, host, port, user, password, database)
+    cache_key = (engine_url, pool, replicas)
 
-    if not __cached_sessions.get(engine_url):
-        __cached_sessions[engine_url] = __make_session(engine_url)
+    if not __cached_sessions.get(cache_key):
+        __cached_sessions[cache_key] = __make_session(engine_url, pool, replicas)
 
-    return __cached_sessions[engine_url]
+    return __cached_sessions[cache_key]
 
 
 def build_engine_url(rdbms=RDBMS, host=HOST, port=PORT, user=USER, password=PASSWD,
@@ -69,6 +108,34 @@ def build_engine_url(rdbms=RDBMS, host=HOST, port=PORT, user=USER, password=PASS
     return url
 
 
+def pool_options(pool=None):
+    '''
+    Return create_engine() keyword arguments for given pool.
+
+        Args:
+            pool (str) : connection pool e.g. [queue, null]. defaults to POOL.
+
+        Returns:
+            dict of create_engine() pool arguments.
+    '''
+    pool = pool or POOL
+
+    if pool not in POOL_CLASSES:
+        raise ValueError('Invalid pool {!r}. Expected one of {}'.format(
+                         pool, sorted(POOL_CLASSES)))
+
+    options = dict(poolclass=POOL_CLASSES[pool])
+
+    if pool == 'queue':
+        options.update(pool_size     = POOL_SIZE,
+                       max_overflow  = MAX_OVERFLOW,
+                       pool_timeout  = POOL_TIMEOUT,
+                       pool_recycle  = POOL_RECYCLE,
+                       pool_pre_ping = POOL_PRE_PING)
+
+    return options
+
+
 @contextmanager
 def session_context():
     '''
@@ -95,15 +162,64 @@ def session_context():
         raise
 
 
-def __make_session(engine_url):
+def __protect_fork(engine):
+    '''
+    Make engine's pool safe across fork().
+    A pooled connection checked out by a process other than the one that opened it
+    is invalidated, so forked render-farm workers never share a socket with their parent.
+    '''
+    @event.listens_for(engine, 'connect')
+    def connect(dbapi_connection, connection_record):
+        connection_record.info['pid'] = os.getpid()
+
+    @event.listens_for(engine, 'checkout')
+    def checkout(dbapi_connection, connection_record, connection_proxy):
+        pid = os.getpid()
+        if connection_record.info['pid'] != pid:
+            connection_record.connection = connection_proxy.connection = None
+            raise exc.DisconnectionError(
+                'Connection record belongs to pid {}, attempting to check out in pid {}'
+                .format(connection_record.info['pid'], pid))
+
+
+def __make_engine(engine_url, pool=None):
+    """
+    Create a new fork safe engine, instrumented by pipsy.db.stats when STATS is on.
+
+    Args:
+        engine_url (str): a valid MySQL DBAPIs string.
+        pool       (str): connection pool e.g. [queue, null]. defaults to POOL.
+    """
+    engine = create_engine(engine_url, echo=False, encoding="utf-8", **pool_options(pool))
+    __protect_fork(engine)
+
+    if STATS:
+        stats.install(engine, slow_query=SLOW_QUERY, slow_log=SLOW_LOG)
+
+    return engine
+
+
+def __make_session(engine_url, pool=None, replicas=()):
     """
     Create a new scoped session.
+    When replicas are given, reads are routed to them and writes to engine_url.
 
     Args:
         engine_url (str): a valid MySQL DBAPIs string.
                              "mysql://user:password@%:3306/database"
+        pool       (str): connection pool e.g. [queue, null]. defaults to POOL.
+        replicas  (list): read replica engine urls.
     """
-    engine = create_engine(engine_url, poolclass=NullPool, echo=False, encoding="utf-8")
-    session_factory = sessionmaker(bind=engine, autoflush=False, autocommit=True)
+    engine = __make_engine(engine_url, pool)
+
+    if replicas:
+        replica_set = ReplicaSet([__make_engine(url, pool) for url in replicas],
+                                 max_lag=REPLICA_MAX_LAG,
+                                 check_interval=REPLICA_CHECK_INTERVAL)
+        session_factory = sessionmaker(class_=RoutingSession, bind=engine, replicas=replica_set,
+                                       sticky=REPLICA_STICKY, autoflush=False, autocommit=True)
+    else:
+        session_factory = sessionmaker(bind=engine, autoflush=False, autocommit=True)
+
     scoped_session_ = scoped_session(session_factory)
     return scoped_session_
@@ -0,0 +1,105 @@
+'''Dialect specific statements'''
+
+# imports
+from sqlalchemy import literal_column, func
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import Insert
+
+# Marker for an update value taken from the row being inserted
+INSERTED = object()
+
+
+def upsert(dialect, table, rows, index_elements, update):
+    '''
+    Return a multi-row INSERT statement updating rows conflicting on index_elements.
+    MySQL: INSERT ... ON DUPLICATE KEY UPDATE. SQLite: INSERT ... ON CONFLICT DO UPDATE.
+
+        Args:
+            dialect         (str) : dialect name e.g. [mysql, sqlite]
+            table         (Table) : table to insert into.
+            rows           (list) : list of column dicts.
+            index_elements (list) : unique column names to conflict on.
+            update         (dict) : column name to update with an expression or INSERTED.
+
+        Returns:
+            Insert statement.
+    '''
+    if dialect == 'mysql':
+        statement = mysql_insert(table).values(rows)
+        values = dict((name, statement.inserted[name] if value is INSERTED else value)
+                      for name, value in update.items())
+        return statement.on_duplicate_key_update(**values)
+
+    elif dialect == 'sqlite':
+        statement = table.insert().values(rows)
+        values = dict((name, literal_column('excluded.{}'.format(name))
+                       if value is INSERTED else value)
+                      for name, value in update.items())
+        statement._sqlite_upsert = (index_elements, values)
+        return statement
+
+    raise NotImplementedError('upsert is not implemented for {!r}'.format(dialect))
+
+
+def insert_ignore(dialect, table, rows):
+    '''
+    Return a multi-row INSERT statement skipping rows conflicting on a unique key.
+    MySQL: INSERT IGNORE. SQLite: INSERT OR IGNORE.
+
+        Args:
+            dialect  (str) : dialect name e.g. [mysql, sqlite]
+            table  (Table) : table to insert into.
+            rows    (list) : list of column dicts.
+
+        Returns:
+            Insert statement.
+    '''
+    if dialect == 'mysql':
+        return table.insert().prefix_with('IGNORE').values(rows)
+
+    elif dialect == 'sqlite':
+        return table.insert().prefix_with('OR IGNORE').values(rows)
+
+    raise NotImplementedError('insert_ignore is not implemented for {!r}'.format(dialect))
+
+
+def seconds_ago(dialect, seconds):
+    '''
+    Return an expression of the database server current date minus seconds, so dates
+    set with func.now() are compared against the server clock, not the client one.
+    MySQL: TIMESTAMPADD(SECOND, -seconds, NOW()). SQLite: datetime('now', '-seconds seconds').
+
+        Args:
+            dialect  (str) : dialect name e.g. [mysql, sqlite]
+            seconds  (int) : seconds before now, negative for a date after now.
+
+        Returns:
+            SQL expression.
+    '''
+    if dialect == 'mysql':
+        return func.timestampadd(literal_column('SECOND'), -int(seconds), func.now())
+
+    elif dialect == 'sqlite':
+        return func.datetime('now', '{:+d} seconds'.format(-int(seconds)))
+
+    raise NotImplementedError('seconds_ago is not implemented for {!r}'.format(dialect))
+
+
+@compiles(Insert, 'sqlite')
+def _compile_sqlite_insert(insert, compiler, **kw):
+    '''Append SQLite ON CONFLICT clause to inserts made by upsert()'''
+    text = compiler.visit_insert(insert, **kw)
+
+    upsert_ = getattr(insert, '_sqlite_upsert', None)
+    if upsert_ is None:
+        return text
+
+    (index_elements, values) = upsert_
+    conflict = ', '.join(compiler.preparer.quote(name) for name in index_elements)
+    if not values:
+        return '{} ON CONFLICT ({}) DO NOTHING'.format(text, conflict)
+
+    sets = ', '.join('{} = {}'.format(compiler.preparer.quote(name), compiler.process(value, **kw))
+                     for (name, value) in sorted(values.items()))
+    return '{} ON CONFLICT ({}) DO UPDATE SET {}'.format(text, conflict, sets)
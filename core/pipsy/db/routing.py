@@ -0,0 +1,155 @@
+'''Read replica routing session'''
+
+# imports
+import threading
+from itertools import cycle
+from timeit import default_timer
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import UpdateBase
+from .. core import logging
+
+LOG = logging.getLogger(__name__, level=logging.INFO)
+
+
+class ReplicaSet(object):
+    '''
+    A set of read replica engines with a cached health state.
+    A replica is considered unhealthy when it can't be reached or when its
+    replication lag exceeds max_lag seconds.
+    '''
+
+    def __init__(self, engines, max_lag=5, check_interval=10):
+        '''
+            Args:
+                engines        (list) : replica Engine instances.
+                max_lag         (int) : max replication lag in seconds.
+                check_interval  (int) : seconds between health checks of a replica.
+        '''
+        self.engines = list(engines)
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+
+        self.__lock = threading.Lock()
+        self.__cycle = cycle(self.engines)
+        self.__checked = dict()   # engine : last check time
+        self.__healthy = dict()   # engine : bool
+
+    def __repr__(self):
+        return '{cls}({urls})'.format(cls=self.__class__.__name__,
+                                      urls=[str(e.url) for e in self.engines])
+
+    def choose(self):
+        '''Return the next healthy replica engine, None if all replicas are unhealthy'''
+        for _ in range(len(self.engines)):
+            with self.__lock:
+                engine = next(self.__cycle)
+
+            if self.is_healthy(engine):
+                return engine
+
+    def is_healthy(self, engine):
+        '''Return True/False if engine is healthy. Checks at most every check_interval'''
+        now = default_timer()
+        checked = self.__checked.get(engine)
+        if checked is None or now - checked >= self.check_interval:
+            self.__checked[engine] = now
+            self.__healthy[engine] = self.check(engine)
+
+        return self.__healthy[engine]
+
+    def mark_down(self, engine):
+        '''Mark engine unhealthy until its next health check'''
+        LOG.warning('Replica {} is down, falling back to primary'.format(engine.url))
+        self.__checked[engine] = default_timer()
+        self.__healthy[engine] = False
+
+    def check(self, engine):
+        '''Return True if engine is reachable and not lagging behind the primary'''
+        try:
+            with engine.connect() as conn:
+                lag = self.lag(conn)
+        except DBAPIError as err:
+            LOG.warning('Replica {} is unreachable: {}'.format(engine.url, err))
+            return False
+
+        if lag is None or lag > self.max_lag:
+            LOG.warning('Replica {} is lagging: {} seconds'.format(engine.url, lag))
+            return False
+
+        return True
+
+    @staticmethod
+    def lag(conn):
+        '''Return replication lag in seconds, None if replication is not running'''
+        if conn.dialect.name != 'mysql':
+            return 0
+
+        status = conn.execute('SHOW SLAVE STATUS').first()
+        if status is None:
+            # Not configured as a replica, nothing to lag behind
+            return 0
+
+        return status['Seconds_Behind_Master']
+
+
+class RoutingSession(Session):
+    '''
+    Session routing reads to replicas and writes to the primary (session bind).
+
+    Reads go to the primary when:
+        - flushing or executing INSERT/UPDATE/DELETE statements.
+        - inside a transaction e.g. session_context() block (read-your-writes).
+        - within sticky seconds after a commit, to cover replication lag.
+        - no replica is healthy.
+    '''
+
+    def __init__(self, replicas=None, sticky=0, **kwargs):
+        '''
+            Args:
+                replicas (ReplicaSet) : read replicas.
+                sticky          (int) : seconds to read from primary after a commit.
+        '''
+        super(RoutingSession, self).__init__(**kwargs)
+        self.replicas = replicas
+        self.sticky = sticky
+        self._last_commit = None
+
+    def get_bind(self, mapper=None, clause=None):
+        primary = super(RoutingSession, self).get_bind(mapper=mapper, clause=clause)
+
+        if self.replicas is None or self._use_primary(clause):
+            return primary
+
+        return self.replicas.choose() or primary
+
+    def connection(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            bind = self.get_bind(mapper=mapper, clause=clause)
+
+        try:
+            return super(RoutingSession, self).connection(bind=bind, **kwargs)
+        except DBAPIError:
+            if self.replicas is None or bind not in self.replicas.engines:
+                raise
+
+        self.replicas.mark_down(bind)
+        primary = super(RoutingSession, self).get_bind(mapper=mapper, clause=clause)
+        return super(RoutingSession, self).connection(bind=primary, **kwargs)
+
+    def commit(self):
+        super(RoutingSession, self).commit()
+        self._last_commit = default_timer()
+
+    def _use_primary(self, clause):
+        '''Return True if next statement must be executed by primary'''
+        if self._flushing or self.transaction is not None:
+            return True
+
+        if isinstance(clause, UpdateBase):
+            return True
+
+        if self._last_commit is not None:
+            return default_timer() - self._last_commit < self.sticky
+
+        return False
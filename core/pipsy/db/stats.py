@@ -0,0 +1,231 @@
+'''Query timing statistics and slow query log'''
+
+# imports
+import re
+import sys
+import threading
+from contextlib import contextmanager
+from functools import wraps
+from inspect import isgeneratorfunction
+from timeit import default_timer
+from sqlalchemy import event
+from .. core import logging
+
+LOG = logging.getLogger(__name__, level=logging.INFO)
+
+# Histogram bucket upper bounds in milliseconds
+BUCKETS = (1, 5, 10, 50, 100, 500, 1000, 5000, float('inf'))
+
+# Caller of statements executed outside of an instrumented method
+UNKNOWN = '<unknown>'
+
+REG_STRING = re.compile(r"'(?:[^']|'')*'")
+REG_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+REG_IN     = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+REG_SPACE  = re.compile(r'\s+')
+
+__lock = threading.Lock()
+__local = threading.local()
+__fingerprints = {}   # fingerprint : Histogram
+__callers = {}        # caller : Histogram
+
+
+class Histogram(object):
+    '''Latency histogram, counts statements per BUCKETS millisecond bound'''
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.buckets = [0] * len(BUCKETS)
+
+    def __repr__(self):
+        return '{cls}(count={count}, total={total:.6f})'.format(
+               cls=self.__class__.__name__, count=self.count, total=self.total)
+
+    def add(self, seconds):
+        '''Add a statement duration in seconds'''
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+
+        milliseconds = seconds * 1000.0
+        for (index, bound) in enumerate(BUCKETS):
+            if milliseconds <= bound:
+                self.buckets[index] += 1
+                break
+
+    def as_dict(self):
+        '''Return histogram as a dict of plain values'''
+        return dict(count=self.count,
+                    total=self.total,
+                    mean=self.total / self.count if self.count else 0.0,
+                    min=self.min,
+                    max=self.max,
+                    buckets=list(zip(BUCKETS, self.buckets)))
+
+
+def fingerprint(statement):
+    '''
+    Return statement with literals and whitespace normalized, so statements differing
+    only by values share a fingerprint.
+
+        Args:
+            statement (str) : SQL statement.
+
+        Returns:
+            fingerprint string.
+    '''
+    statement = REG_STRING.sub('?', statement)
+    statement = REG_NUMBER.sub('?', statement)
+    statement = REG_SPACE.sub(' ', statement).strip()
+    return REG_IN.sub('(?...)', statement)
+
+
+def caller():
+    '''Return the instrumented method executing statements in this thread'''
+    return getattr(__local, 'caller', None) or UNKNOWN
+
+
+@contextmanager
+def calling(name):
+    '''
+    Attribute statements executed within the context to name e.g. 'Shot.find'.
+    Nested contexts keep the outermost name.
+    '''
+    if getattr(__local, 'caller', None):
+        yield
+        return
+
+    __local.caller = name
+    try:
+        yield
+    finally:
+        __local.caller = None
+
+
+def instrument(func):
+    '''
+    Decorate an entity classmethod so its statements are recorded as '{cls}.{method}'.
+    Must be applied below @classmethod.
+    '''
+    if isgeneratorfunction(func):
+        @wraps(func)
+        def wrapper(cls, *args, **kwargs):
+            name = '{}.{}'.format(cls.__name__, func.__name__)
+            generator = func(cls, *args, **kwargs)
+
+            while True:
+                with calling(name):
+                    try:
+                        item = next(generator)
+                    except StopIteration:
+                        return
+                yield item
+
+        return wrapper
+
+    @wraps(func)
+    def wrapper(cls, *args, **kwargs):
+        with calling('{}.{}'.format(cls.__name__, func.__name__)):
+            return func(cls, *args, **kwargs)
+
+    return wrapper
+
+
+def record(statement, seconds, name=None):
+    '''
+    Record a statement duration.
+
+        Args:
+            statement (str) : SQL statement.
+            seconds (float) : duration.
+            name      (str) : caller name. defaults to caller().
+    '''
+    key = fingerprint(statement)
+    name = name or caller()
+
+    with __lock:
+        if key not in __fingerprints:
+            __fingerprints[key] = Histogram()
+        if name not in __callers:
+            __callers[name] = Histogram()
+
+        __fingerprints[key].add(seconds)
+        __callers[name].add(seconds)
+
+
+def snapshot():
+    '''
+    Return recorded statistics.
+
+        Returns:
+            dict(fingerprints={fingerprint: histogram dict}, callers={caller: histogram dict})
+    '''
+    with __lock:
+        return dict(fingerprints=dict((k, h.as_dict()) for (k, h) in __fingerprints.items()),
+                    callers=dict((k, h.as_dict()) for (k, h) in __callers.items()))
+
+
+def reset():
+    '''Clear recorded statistics'''
+    with __lock:
+        __fingerprints.clear()
+        __callers.clear()
+
+
+def dump(stream=None, limit=20):
+    '''
+    Write a report of the slowest callers and statement fingerprints by total time.
+    e.g. atexit.register(stats.dump)
+
+        Args:
+            stream (file) : output stream. defaults to sys.stderr.
+            limit   (int) : max rows per section.
+    '''
+    stream = stream or sys.stderr
+    data = snapshot()
+
+    for section in ('callers', 'fingerprints'):
+        stream.write('{:>8} {:>10} {:>10} {:>10}  {}\n'.format(
+                     'count', 'total ms', 'mean ms', 'max ms', section))
+
+        rows = sorted(data[section].items(), key=lambda item: item[1]['total'], reverse=True)
+        for (name, hist) in rows[:limit]:
+            stream.write('{:>8} {:>10.1f} {:>10.2f} {:>10.2f}  {}\n'.format(
+                         hist['count'], hist['total'] * 1000.0, hist['mean'] * 1000.0,
+                         hist['max'] * 1000.0, name))
+        stream.write('\n')
+
+
+def install(engine, slow_query=None, slow_log=None):
+    '''
+    Install statement timing listeners on engine.
+
+        Args:
+            engine     (Engine) : engine to instrument.
+            slow_query  (float) : log statements slower than this many seconds. None disables.
+            slow_log   (Logger) : slow query logger. defaults to LOG.
+    '''
+    slow_log = slow_log or LOG
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('pipsy_query_start', []).append(default_timer())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        seconds = default_timer() - conn.info['pipsy_query_start'].pop()
+        record(statement, seconds)
+
+        if slow_query is not None and seconds >= slow_query:
+            slow_log.warning('Slow query {:.3f}s by {}: {} {}'.format(
+                             seconds, caller(), statement, parameters))
+
+    @event.listens_for(engine, 'handle_error')
+    def handle_error(context):
+        starts = context.connection.info.get('pipsy_query_start') if context.connection else None
+        if starts:
+            starts.pop()
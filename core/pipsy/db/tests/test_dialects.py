@@ -0,0 +1,52 @@
+import pytest
+from sqlalchemy import Table, Column, Integer, String, MetaData, func
+from sqlalchemy.dialects import mysql, sqlite
+from pipsy.db.dialects import upsert, seconds_ago, INSERTED
+
+metadata = MetaData()
+table = Table('dialects', metadata,
+              Column('id', Integer, primary_key=True),
+              Column('name', String(32)),
+              Column('shotgun_id', Integer, unique=True))
+
+ROWS = [dict(name='a', shotgun_id=1), dict(name='b', shotgun_id=2)]
+
+
+def test_upsert_mysql():
+    statement = upsert('mysql', table, ROWS, ['shotgun_id'], {'name': INSERTED})
+    sql = str(statement.compile(dialect=mysql.dialect()))
+    assert 'ON DUPLICATE KEY UPDATE name = VALUES(name)' in sql
+
+
+def test_upsert_sqlite():
+    statement = upsert('sqlite', table, ROWS, ['shotgun_id'], {'name': INSERTED})
+    sql = str(statement.compile(dialect=sqlite.dialect()))
+    assert sql.endswith('ON CONFLICT (shotgun_id) DO UPDATE SET name = excluded.name')
+
+
+def test_upsert_sqlite_expression():
+    statement = upsert('sqlite', table, ROWS, ['shotgun_id'], {'name': func.lower('A')})
+    sql = str(statement.compile(dialect=sqlite.dialect()))
+    assert 'DO UPDATE SET name = lower(' in sql
+
+
+def test_insert_sqlite():
+    sql = str(table.insert().values(ROWS).compile(dialect=sqlite.dialect()))
+    assert 'ON CONFLICT' not in sql
+
+
+def test_upsert_not_implemented():
+    with pytest.raises(NotImplementedError):
+        upsert('oracle', table, ROWS, ['shotgun_id'], {'name': INSERTED})
+
+
+def test_seconds_ago_mysql():
+    sql = str(seconds_ago('mysql', 60).compile(dialect=mysql.dialect(),
+                                               compile_kwargs={'literal_binds': True}))
+    assert sql == 'timestampadd(SECOND, -60, now())'
+
+
+def test_seconds_ago_sqlite():
+    sql = str(seconds_ago('sqlite', 60).compile(dialect=sqlite.dialect(),
+                                                compile_kwargs={'literal_binds': True}))
+    assert sql == "datetime('now', '-60 seconds')"
@@ -0,0 +1,49 @@
+import os
+import pytest
+from sqlalchemy.pool import NullPool, QueuePool
+from pipsy import db
+
+
+@pytest.fixture(scope="module")
+def session():
+    session = db.connect_database()
+    return session
+
+
+def test_pool_options_null():
+    assert db.pool_options('null') == {'poolclass': NullPool}
+
+
+def test_pool_options_queue():
+    options = db.pool_options('queue')
+    assert options['poolclass'] is QueuePool
+    assert options['pool_size'] == db.POOL_SIZE
+    assert options['max_overflow'] == db.MAX_OVERFLOW
+    assert options['pool_recycle'] == db.POOL_RECYCLE
+    assert options['pool_pre_ping'] == db.POOL_PRE_PING
+
+
+def test_pool_options_invalid():
+    with pytest.raises(ValueError):
+        db.pool_options('invalid')
+
+
+def test_connect_database_pool(session):
+    assert db.connect_database(pool=db.POOL) is session
+    assert db.connect_database(pool='null') is not session
+    assert isinstance(db.connect_database(pool='null').bind.pool, NullPool)
+
+
+def test_fork_safe(session, monkeypatch):
+    if db.POOL != 'queue':
+        pytest.skip('fork protection only applies to pooled connections')
+
+    with session.bind.connect() as conn:
+        parent = conn.connection.connection
+
+    # pretend we are a forked child process
+    monkeypatch.setattr(os, 'getpid', lambda: -1)
+    with session.bind.connect() as conn:
+        child = conn.connection.connection
+
+    assert parent is not child
@@ -0,0 +1,70 @@
+import pytest
+from sqlalchemy import create_engine, select, literal, Table, Column, Integer, MetaData
+from pipsy.db.routing import ReplicaSet, RoutingSession
+
+metadata = MetaData()
+table = Table('routing', metadata, Column('id', Integer, primary_key=True))
+
+
+@pytest.fixture(scope="module")
+def primary():
+    return create_engine('sqlite://')
+
+
+@pytest.fixture(scope="module")
+def replica():
+    return create_engine('sqlite://')
+
+
+@pytest.fixture(scope="module")
+def replica_down():
+    return create_engine('sqlite:////nonexistent/path/replica.db')
+
+
+def make_session(primary, *replicas, **kwargs):
+    return RoutingSession(bind=primary, replicas=ReplicaSet(replicas), autocommit=True, **kwargs)
+
+
+def test_read_replica(primary, replica):
+    session = make_session(primary, replica)
+    assert session.get_bind(clause=select([literal(1)])) is replica
+
+
+def test_write_primary(primary, replica):
+    session = make_session(primary, replica)
+    assert session.get_bind(clause=table.insert()) is primary
+    assert session.get_bind(clause=table.update()) is primary
+    assert session.get_bind(clause=table.delete()) is primary
+
+
+def test_transaction_primary(primary, replica):
+    session = make_session(primary, replica)
+    session.begin()
+    assert session.get_bind(clause=select([literal(1)])) is primary
+    session.commit()
+
+
+def test_sticky_after_commit(primary, replica):
+    session = make_session(primary, replica, sticky=60)
+    session.begin()
+    session.commit()
+    assert session.get_bind(clause=select([literal(1)])) is primary
+
+
+def test_replica_down_fallback(primary, replica_down):
+    session = make_session(primary, replica_down)
+    assert session.get_bind(clause=select([literal(1)])) is primary
+
+
+def test_replica_connection_fallback(primary, replica_down):
+    session = make_session(primary, replica_down)
+    conn = session.connection(bind=replica_down)
+    assert conn.engine is primary
+    assert session.replicas.is_healthy(replica_down) is False
+
+
+def test_replica_round_robin(primary, replica):
+    other = create_engine('sqlite://')
+    session = make_session(primary, replica, other)
+    binds = set(session.get_bind(clause=select([literal(1)])) for _ in range(4))
+    assert binds == set([replica, other])
@@ -0,0 +1,81 @@
+import io
+from sqlalchemy import create_engine
+from pipsy.db import stats
+
+
+class FakeEntity(object):
+
+    @classmethod
+    @stats.instrument
+    def find(cls, engine):
+        return engine.execute('SELECT 1').scalar()
+
+    @classmethod
+    @stats.instrument
+    def find_iter(cls, engine):
+        for value in (1, 2):
+            yield engine.execute('SELECT {}'.format(value)).scalar()
+
+
+class FakeLog(object):
+
+    def __init__(self):
+        self.messages = []
+
+    def warning(self, msg):
+        self.messages.append(msg)
+
+
+def test_fingerprint():
+    assert stats.fingerprint("SELECT * FROM shot WHERE id = 12 AND name = 'sh_010'") == \
+        'SELECT * FROM shot WHERE id = ? AND name = ?'
+    assert stats.fingerprint('SELECT * FROM shot\n  WHERE id IN (?, ?, ?)') == \
+        'SELECT * FROM shot WHERE id IN (?...)'
+    assert stats.fingerprint('SELECT episode_3.id FROM episode AS episode_3') == \
+        'SELECT episode_3.id FROM episode AS episode_3'
+
+
+def test_histogram():
+    hist = stats.Histogram()
+    hist.add(0.0005)
+    hist.add(0.002)
+    hist.add(10.0)
+
+    data = hist.as_dict()
+    assert data['count'] == 3
+    assert data['min'] == 0.0005
+    assert data['max'] == 10.0
+    assert [count for (_, count) in data['buckets']] == [1, 1, 0, 0, 0, 0, 0, 0, 1]
+
+
+def test_install():
+    engine = create_engine('sqlite://')
+    log = FakeLog()
+    stats.install(engine, slow_query=0.0, slow_log=log)
+    stats.reset()
+
+    assert FakeEntity.find(engine) == 1
+    assert list(FakeEntity.find_iter(engine)) == [1, 2]
+    engine.execute('SELECT 3')
+
+    data = stats.snapshot()
+    assert data['callers']['FakeEntity.find']['count'] == 1
+    assert data['callers']['FakeEntity.find_iter']['count'] == 2
+    assert data['callers'][stats.UNKNOWN]['count'] == 1
+    assert data['fingerprints']['SELECT ?']['count'] == 4
+    assert len(log.messages) == 4
+    assert 'by FakeEntity.find' in log.messages[0]
+
+    stream = io.StringIO() if str is not bytes else io.BytesIO()
+    stats.dump(stream)
+    assert 'FakeEntity.find' in stream.getvalue()
+
+    stats.reset()
+    assert stats.snapshot() == dict(fingerprints={}, callers={})
+
+
+def test_calling_nested():
+    with stats.calling('Shot.find_one'):
+        with stats.calling('Shot.find'):
+            assert stats.caller() == 'Shot.find_one'
+    assert stats.caller() == stats.UNKNOWN
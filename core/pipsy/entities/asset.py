@@ -5,7 +5,8 @@ from sqlalchemy import (Table, Column, Integer, String, Enum, Index, ForeignKey,
                         UniqueConstraint, Boolean)
 from sqlalchemy.orm import relationship
 from ..core.pythonx import string_types
-from .core import Base
+from .core import Base, TreeQuery, BULK_CHUNK_SIZE
+from .hierarchy import hierarchy_default
 from .project import Project
 
 
@@ -24,10 +25,13 @@ class Asset(Base):
                       # TODO: use library column e.g. AssetLibrary
                       Column('library', Boolean, default=False, nullable=True),
                       Column('description', String(255)),
+                      Column('hierarchy', String(255), default=hierarchy_default('asset'),
+                             info=dict(derived=True)),
 
                       Index('ix_proj_stat_name', 'project_id', 'status', 'name'),
                       Index('ix_proj_stat_kind', 'project_id', 'status', 'kind'),
                       Index('ix_sg', 'shotgun_id'),
+                      Index('ix_hierarchy', 'hierarchy'),
 
                       UniqueConstraint('project_id', 'name', name='uq_proj_name'),
                       UniqueConstraint('project_id', 'basename', name='uq_proj_basename'),
@@ -35,12 +39,18 @@ class Asset(Base):
                       )
 
     _tasks = relationship('Task', backref='asset', lazy='dynamic',
-                          order_by='Task.name', cascade="all, delete-orphan")
+                          order_by='Task.name', cascade="all, delete-orphan",
+                          query_class=TreeQuery)
     _instances = relationship('Instance', backref='asset', lazy='dynamic',
-                              order_by='Instance.id', cascade="all, delete-orphan")
+                              order_by='Instance.id', cascade="all, delete-orphan",
+                              query_class=TreeQuery)
     _publishgroups = relationship('PublishGroup', backref='asset', lazy='dynamic',
                                   order_by='PublishGroup.id', cascade="all, delete-orphan")
 
+    PARENTS = ('project',)
+    FIND_SHAPES = (('id',), ('shotgun_id',), ('name', 'project'))
+    CACHED = True
+
     @property
     def parent(self):
         '''
@@ -56,10 +66,10 @@ class Asset(Base):
         return [t for t in self._tasks if t.status not in t.disabled_statuses()]
 
     @classmethod
-    def find(cls, project=None, name=None, basename=None, kind=None, library=None,
-             status=None, id=None, shotgun_id=None):
+    def find_query(cls, project=None, name=None, basename=None, kind=None, library=None,
+                   status=None, id=None, shotgun_id=None):
         '''
-        Return Asset instances by query arguments
+        Return a Query of Asset instances by query arguments
 
             Args:
                 project     (Project) : parent Project instance.
@@ -72,7 +82,7 @@ class Asset(Base):
                 shotgun_id (int/list) : Asset shotgun id(s).
 
             Returns:
-                A list of Asset instances matching find arguments.
+                A Query of Asset instances matching find arguments.
         '''
         query = cls.query(project=project, name=name, id=id, status=status, shotgun_id=shotgun_id)
 
@@ -90,7 +100,7 @@ class Asset(Base):
         if library is not None:
             query = query.filter(cls.library == library)
 
-        return query.all()
+        return query
 
     @classmethod
     def create(cls, name, project, kind, library=None, status=None, shotgun_id=None):
@@ -108,14 +118,37 @@ class Asset(Base):
                 New Asset Instance.
 
         '''
+        data = cls._create_data(name=name, project=project, kind=kind, library=library,
+                                status=status, shotgun_id=shotgun_id)
+
+        return super(Asset, cls).create(**data)
+
+    @classmethod
+    def bulk_create(cls, rows, chunk_size=BULK_CHUNK_SIZE, hydrate=False):
+        '''
+        Create many Asset instances in one transaction.
+
+            Args:
+                rows       (list) : list of dicts with create() arguments.
+                chunk_size  (int) : rows per INSERT statement.
+                hydrate    (bool) : return Asset instances instead of ids.
+
+            Returns:
+                A list of new Asset ids (or instances) in rows order.
+        '''
+        rows = [cls._create_data(**row) for row in rows]
+        return super(Asset, cls).bulk_create(rows, key=('project_id', 'name'),
+                                             chunk_size=chunk_size, hydrate=hydrate)
+
+    @classmethod
+    def _create_data(cls, name, project, kind, library=None, status=None, shotgun_id=None):
+        '''Validate create() arguments and return Asset columns dict'''
         cls.assert_isinstance(project, 'Project')
 
-        data = dict(name=name,
+        return dict(name=name,
                     basename=name,
                     status=status,
                     project_id=project.id,
                     kind=kind,
                     library=library,
                     shotgun_id=shotgun_id)
-
-        return super(Asset, cls).create(**data)
@@ -0,0 +1,275 @@
+'''Process-wide second-level cache for slow-changing entities'''
+
+# imports
+import threading
+from collections import OrderedDict
+from timeit import default_timer
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from ..config import config
+from ..core import logging
+
+LOG = logging.getLogger(__name__, level=logging.INFO)
+
+
+def _option(option, default=None):
+    '''Return an [entities] config option, or default if not set.'''
+    if config.has_option('entities', option):
+        return config.get('entities', option)
+    return default
+
+
+# configuration
+ENABLED = _option('cache', 'false').lower() in ('1', 'yes', 'true', 'on')
+SIZE    = int(_option('cache_size', 4096))
+TTL     = float(_option('cache_ttl', 300))
+
+
+class LRUCache(object):
+    '''
+    Thread safe mapping bounded to size entries, evicting the least recently used,
+    where entries expire ttl seconds after being set.
+    '''
+
+    def __init__(self, size=SIZE, ttl=TTL):
+        '''
+            Args:
+                size  (int) : max entries.
+                ttl (float) : seconds an entry is valid for.
+        '''
+        self.size = size
+        self.ttl = ttl
+
+        self.__lock = threading.Lock()
+        self.__data = OrderedDict()   # key : (expires, value)
+        self.__stats = dict(hits=0, misses=0, evictions=0, expirations=0, invalidations=0)
+
+    def __repr__(self):
+        return '{cls}(size={size}, ttl={ttl})'.format(cls=self.__class__.__name__,
+                                                      size=self.size, ttl=self.ttl)
+
+    def __len__(self):
+        return len(self.__data)
+
+    def get(self, key, default=None):
+        '''Return key value and mark it recently used, default if missing or expired'''
+        with self.__lock:
+            entry = self.__data.pop(key, None)
+
+            if entry is None:
+                self.__stats['misses'] += 1
+                return default
+
+            if entry[0] < default_timer():
+                self.__stats['expirations'] += 1
+                self.__stats['misses'] += 1
+                return default
+
+            self.__data[key] = entry
+            self.__stats['hits'] += 1
+            return entry[1]
+
+    def set(self, key, value):
+        '''Set key value, evicting the least recently used entries over size'''
+        with self.__lock:
+            self.__data.pop(key, None)
+            self.__data[key] = (default_timer() + self.ttl, value)
+
+            while len(self.__data) > self.size:
+                self.__data.popitem(last=False)
+                self.__stats['evictions'] += 1
+
+    def discard(self, predicate):
+        '''Remove all keys matching predicate(key)'''
+        with self.__lock:
+            keys = [key for key in self.__data if predicate(key)]
+            for key in keys:
+                del self.__data[key]
+            self.__stats['invalidations'] += len(keys)
+
+    def clear(self):
+        '''Remove all entries and reset stats'''
+        with self.__lock:
+            self.__data.clear()
+            for key in self.__stats:
+                self.__stats[key] = 0
+
+    def stats(self):
+        '''Return hits, misses, evictions, expirations, invalidations, entries and hit_rate'''
+        with self.__lock:
+            stats = dict(self.__stats, entries=len(self.__data))
+
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / float(lookups) if lookups else 0.0
+        return stats
+
+
+CACHE = LRUCache()
+
+
+def enable(size=None, ttl=None):
+    '''
+    Enable the entity cache.
+
+        Args:
+            size  (int) : max entries. defaults to config cache_size.
+            ttl (float) : seconds an entry is valid for. defaults to config cache_ttl.
+    '''
+    global ENABLED
+    CACHE.size = size or CACHE.size
+    CACHE.ttl = ttl or CACHE.ttl
+    ENABLED = True
+
+
+def disable():
+    '''Disable and clear the entity cache'''
+    global ENABLED
+    ENABLED = False
+    CACHE.clear()
+
+
+def enabled(cls):
+    '''Return True if cls instances are cached'''
+    return ENABLED and getattr(cls, 'CACHED', False)
+
+
+def stats():
+    '''Return cache stats dict e.g. hits, misses and hit_rate'''
+    return CACHE.stats()
+
+
+def invalidate(*classes):
+    '''Remove cached instances and find() results of classes, all entries if none given'''
+    if not classes:
+        CACHE.discard(lambda key: True)
+        return
+
+    classes = tuple(classes)
+    CACHE.discard(lambda key: key[0] in classes)
+
+
+def get_instance(cls, session, id):
+    '''Return cached cls instance by id merged into session, None if not cached'''
+    if not enabled(cls):
+        return None
+
+    copy = CACHE.get((cls, id))
+    if copy is None:
+        return None
+
+    return attach(session, copy)
+
+
+def set_instance(instance):
+    '''Cache a detached copy of instance'''
+    cls = instance.__class__
+    if not enabled(cls):
+        return
+
+    CACHE.set((cls, instance.id), detached_copy(instance))
+
+
+def attach(session, copy):
+    '''
+    Return detached_copy() as an instance of session without a SELECT.
+    The session own instance is returned as is when already loaded.
+    '''
+    instance = session.identity_map.get(inspect(copy).key)
+    if instance is not None and not inspect(instance).expired_attributes:
+        return instance
+
+    return session.merge(copy, load=False)
+
+
+def detached_copy(instance):
+    '''
+    Return a detached copy of instance column values, not bound to any session.
+    Use attach() to get a session instance of it without a SELECT.
+    '''
+    mapper = inspect(instance.__class__)
+    copy = mapper.class_manager.new_instance()
+    for prop in mapper.column_attrs:
+        set_committed_value(copy, prop.key, getattr(instance, prop.key))
+    make_transient_to_detached(copy)
+    return copy
+
+
+def get_find(cls, session, kwargs):
+    '''Return cached find(**kwargs) instances merged into session, None if not cached'''
+    key = _find_key(cls, kwargs)
+    if key is None:
+        return None
+
+    ids = CACHE.get(key)
+    if ids is None:
+        return None
+
+    instances = [get_instance(cls, session, id) for id in ids]
+    if None in instances:
+        return None
+
+    return instances
+
+
+def set_find(cls, kwargs, instances):
+    '''Cache find(**kwargs) instances'''
+    key = _find_key(cls, kwargs)
+    if key is None:
+        return
+
+    for instance in instances:
+        set_instance(instance)
+
+    CACHE.set(key, tuple(instance.id for instance in instances))
+
+
+def _find_key(cls, kwargs):
+    '''Return a normalized find() cache key, None if not cacheable'''
+    if not enabled(cls):
+        return None
+
+    items = []
+    for (name, value) in sorted(kwargs.items()):
+        if value is None:
+            continue
+        elif isinstance(value, (list, tuple)):
+            value = tuple(_normalize(v) for v in value)
+        else:
+            value = _normalize(value)
+
+        try:
+            hash(value)
+        except TypeError:
+            return None
+
+        items.append((name, value))
+
+    return (cls, 'find', tuple(items))
+
+
+def _normalize(value):
+    '''Return entity instances as (class, id)'''
+    if hasattr(value, '__table__') and hasattr(value, 'id'):
+        return (value.__class__, value.id)
+    return value
+
+
+@event.listens_for(Session, 'after_flush')
+def _after_flush(session, flush_context):
+    '''Invalidate classes of instances written by session'''
+    classes = set(obj.__class__ for obj in session.new | session.dirty | session.deleted)
+    classes = [cls for cls in classes if enabled(cls)]
+
+    if classes:
+        session.info.setdefault('cache_invalidate', set()).update(classes)
+        invalidate(*classes)
+
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_soft_rollback')
+def _after_transaction(session, *args):
+    '''Invalidate classes written during the transaction, they may have been cached since'''
+    classes = session.info.pop('cache_invalidate', None)
+    if classes:
+        invalidate(*classes)
@@ -2,22 +2,55 @@
 '''Entities Base Class'''
 
 # imports
+from collections import namedtuple
 from contextlib import contextmanager
-from sqlalchemy import inspect, MetaData, DateTime
+from sqlalchemy import (inspect, event, MetaData, DateTime, UniqueConstraint, select, func,
+                        distinct, bindparam, and_, or_)
+from sqlalchemy.ext import baked
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import Session, joinedload, selectinload, object_session
+from sqlalchemy.orm.dynamic import AppenderQuery
 from sqlalchemy.orm.util import identity_key
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.orm.exc import NoResultFound, MultipleResultsFound
 from sqlalchemy.exc import DataError, IntegrityError
 from .. import db
+from ..db import stats
+from ..db.dialects import upsert, insert_ignore, INSERTED
+from . import cache
 from ..core.pythonx import int, string_types
 from ..core import logging
 
 LOG = logging.getLogger(__name__, level=logging.INFO)
 
+# Rows per multi-row INSERT statement
+BULK_CHUNK_SIZE = 500
+
+# (entity, columns) : namedtuple class returned by find(columns=...)
+_ROW_TYPES = {}
+
+# Compiled find() queries, keyed by entity and filter shape
+_BAKERY = baked.bakery()
+
+# find() entity arguments filtering on a foreign key column
+_FIND_COLUMNS = {'project': 'project_id', 'sequence': 'sequence_id'}
+
+# Session info key counting commits, see link_tree()
+TREE_GENERATION = 'tree_generation'
+
 
 class BaseEntity(object):
     '''SCL entities base class'''
 
+    # Relationship paths eager loaded by find(with_parents=True)
+    PARENTS = ()
+
+    # find() argument names (sorted) served by cached baked queries e.g. ('name', 'project')
+    FIND_SHAPES = ()
+
+    # Cache find() and findby_id() results in the second-level cache, see entities.cache
+    CACHED = False
+
     def __init__(self, **columns):
         self._columns = columns
 
@@ -95,18 +128,265 @@ class BaseEntity(object):
             raise
 
     @classmethod
-    def find(cls, **kwargs):
-        '''find() must be override by subclass'''
+    @stats.instrument
+    def find(cls, load=None, with_parents=False, columns=None, **kwargs):
+        '''
+        Return entity instances by find_query() arguments.
+
+            Args:
+                load         (list) : relationship paths to eager load e.g. ['sequence.episode'].
+                with_parents (bool) : eager load the PARENTS relationship paths.
+                columns      (list) : column names e.g. ['id', 'name', 'status'].
+                                      Return namedtuple rows of those columns instead of
+                                      instances, selected without the ORM.
+                kwargs              : find_query() arguments.
+
+            Returns:
+                A list of instances (or namedtuple rows) matching find arguments.
+        '''
+        if not (load or with_parents or columns):
+            result = cache.get_find(cls, cls.__connect(), kwargs)
+            if result is None:
+                result = cls._find_baked(kwargs)
+                if result is None:
+                    result = cls.find_query(**kwargs).all()
+                cache.set_find(cls, kwargs, result)
+            return result
+
+        query = cls.find_query(**kwargs)
+
+        if columns:
+            return cls._find_columns(query, columns)
+
+        return cls.eager_load(query, load=load, with_parents=with_parents).all()
+
+    @classmethod
+    @stats.instrument
+    def find_iter(cls, batch_size=1000, load=None, with_parents=False, **kwargs):
+        '''
+        Iterate over entity instances by find_query() arguments, in id order.
+        Rows are fetched batch_size at a time using keyset pagination on id and each
+        batch is expunged from the session once consumed, keeping memory constant.
+        Use load/with_parents for relationships needed after the batch is expunged.
+
+            Args:
+                batch_size    (int) : rows per SELECT.
+                load         (list) : relationship paths to eager load e.g. ['sequence.episode'].
+                with_parents (bool) : eager load the PARENTS relationship paths.
+                kwargs              : find_query() arguments.
+
+            Returns:
+                A generator of instances matching find arguments.
+        '''
+        if batch_size < 1:
+            raise ValueError('batch_size must be a positive int. Given {!r}'.format(batch_size))
+
+        query = cls.find_query(**kwargs).order_by(None).order_by(cls.id)
+        query = cls.eager_load(query, load=load, with_parents=with_parents)
+        session = query.session
+        last_id = None
+
+        while True:
+            # Entities already in the session belong to the caller, don't expunge them.
+            known = set(session.identity_map.keys())
+
+            batch_query = query if last_id is None else query.filter(cls.id > last_id)
+            batch = batch_query.limit(batch_size).all()
+
+            for entity in batch:
+                yield entity
+
+            for entity in batch:
+                if identity_key(instance=entity) not in known and entity in session:
+                    session.expunge(entity)
+
+            if len(batch) < batch_size:
+                return
+
+            last_id = batch[-1].id
+
+    @classmethod
+    def find_query(cls, **kwargs):
+        '''find_query() must be override by subclass'''
         raise NotImplementedError(
-            'find() must be implemented by subclass "{}"'.format(cls.__name__))
+            'find_query() must be implemented by subclass "{}"'.format(cls.__name__))
+
+    @classmethod
+    def eager_load(cls, query, load=None, with_parents=False):
+        '''
+        Add eager loading options to query.
+        Many-to-one relationships are joined, collections are selectin loaded.
+
+            Args:
+                query       (Query) : query of cls instances.
+                load         (list) : relationship paths to eager load e.g. ['sequence.episode'].
+                with_parents (bool) : eager load the PARENTS relationship paths.
+
+            Returns:
+                Query instance.
+        '''
+        paths = list(cls.PARENTS) if with_parents else []
+        paths.extend(load or [])
+
+        for path in paths:
+            query = query.options(cls._load_option(path))
+
+        return query
+
+    @classmethod
+    @stats.instrument
+    def load_parents(cls, entities, chunk_size=BULK_CHUNK_SIZE):
+        '''
+        Load the PARENTS relationship paths of already loaded entities.
+        Parents missing from the session are selected by id, one query per relationship
+        level and chunk, and set on the entities so they are resolved without SQL.
+
+            Args:
+                entities  (list) : cls instances.
+                chunk_size (int) : parent ids per query.
+        '''
+        session = cls.__connect()
+
+        for path in cls.PARENTS:
+            (mapper, level) = (inspect(cls), list(entities))
+
+            for name in path.split('.'):
+                prop = mapper.relationships[name]
+                if prop.uselist:
+                    break
+
+                (column,) = prop.local_columns
+                parent_cls = prop.mapper.class_
+                ids = set(getattr(entity, column.key) for entity in level)
+                ids.discard(None)
+
+                parents = dict()
+                for id in ids:
+                    parent = session.identity_map.get(identity_key(parent_cls, id))
+                    if parent is not None:
+                        parents[id] = parent
+
+                for chunk in _chunks(sorted(ids.difference(parents)), chunk_size):
+                    query = parent_cls.query().filter(parent_cls.id.in_(chunk))
+                    parents.update((parent.id, parent) for parent in query)
+
+                for entity in level:
+                    if name not in inspect(entity).dict:
+                        set_committed_value(entity, name, parents.get(getattr(entity, column.key)))
+
+                (mapper, level) = (prop.mapper, list(parents.values()))
+
+    @classmethod
+    def _find_baked(cls, kwargs, limit=None):
+        '''
+        Return find() results using a cached baked query when kwargs match one of
+        FIND_SHAPES, skipping Query construction and SQL compilation.
+
+            Args:
+                kwargs (dict) : find_query() arguments.
+                limit   (int) : max rows.
+
+            Returns:
+                A list of instances, None if kwargs don't match a cached filter shape.
+        '''
+        filters = dict((name, value) for (name, value) in kwargs.items() if value is not None)
+        shape = tuple(sorted(filters))
+
+        if shape not in cls.FIND_SHAPES:
+            return None
+
+        params = dict()
+        for name in shape:
+            value = filters[name]
+
+            if isinstance(value, BaseEntity):
+                cls.assert_isinstance(value, name.capitalize())
+                value = value.id
+            elif isinstance(value, bool) or not isinstance(value, (int, string_types)) or not value:
+                # lists and falsy values are handled by find_query()
+                return None
+
+            params[name] = value
+
+        baked_query = _BAKERY(lambda session: cls.find_query(), cls, shape)
+        baked_query += lambda query: query.filter(and_(
+            *[cls.__table__.c[_FIND_COLUMNS.get(name, name)] == bindparam(name)
+              for name in shape]))
+
+        if limit:
+            baked_query.add_criteria(lambda query: query.limit(limit), limit)
+
+        # baked queries need the thread-local Session, not the scoped_session registry
+        return baked_query(cls.__connect()()).params(**params).all()
 
     @classmethod
-    def find_one(cls, **kwargs):
+    def row_type(cls, columns):
+        '''
+        Return a namedtuple class for given column names, cached per entity.
+
+            Args:
+                columns (list) : column names e.g. ['id', 'name', 'status'].
+
+            Returns:
+                namedtuple class.
+        '''
+        columns = tuple(columns)
+        key = (cls, columns)
+
+        if key not in _ROW_TYPES:
+            missing = [name for name in columns if name not in cls.__table__.c]
+            if missing:
+                raise ValueError('{} has no column(s) {}'.format(cls.__name__, missing))
+            _ROW_TYPES[key] = namedtuple('{}Row'.format(cls.__name__), columns)
+
+        return _ROW_TYPES[key]
+
+    @classmethod
+    def _find_columns(cls, query, columns):
+        '''Execute query as a Core SELECT of columns, return a list of namedtuple rows'''
+        row_type = cls.row_type(columns)
+        statement = query.with_entities(*[cls.__table__.c[name] for name in row_type._fields])
+        return [row_type(*row) for row in query.session.execute(statement.statement)]
+
+    @classmethod
+    def _load_option(cls, path):
+        '''Return a joinedload/selectinload option chain for a dotted relationship path'''
+        (option, mapper) = (None, inspect(cls))
+
+        for name in path.split('.'):
+            if name not in mapper.relationships:
+                raise ValueError('{} has no relationship {!r} in path {!r}'
+                                 .format(mapper.class_.__name__, name, path))
+
+            prop = mapper.relationships[name]
+            attr = prop.class_attribute
+
+            if prop.uselist:
+                option = selectinload(attr) if option is None else option.selectinload(attr)
+            else:
+                option = joinedload(attr) if option is None else option.joinedload(attr)
+
+            mapper = prop.mapper
+
+        return option
+
+    @classmethod
+    @stats.instrument
+    def find_one(cls, load=None, with_parents=False, **kwargs):
         '''
         Wrapper of find() that return a single result.
         Will error if None or more then one results found.
+        Fetches at most two rows, enough to tell a single result from many.
         '''
-        result = cls.find(**kwargs)
+        result = None
+        if not (load or with_parents):
+            result = cache.get_find(cls, cls.__connect(), kwargs)
+            if result is None:
+                result = cls._find_baked(kwargs, limit=2)
+
+        if result is None:
+            query = cls.eager_load(cls.find_query(**kwargs), load=load, with_parents=with_parents)
+            result = query.limit(2).all()
 
         if not result:
             raise NoResultFound(
@@ -118,6 +398,78 @@ class BaseEntity(object):
             return result[0]
 
     @classmethod
+    @stats.instrument
+    def count(cls, **kwargs):
+        '''
+        Return the number of entities matching find_query() arguments.
+        Executes a SELECT COUNT without loading any entity.
+
+            Args:
+                kwargs : find_query() arguments.
+
+            Returns:
+                int
+        '''
+        query = cls.find_query(**kwargs).order_by(None)
+        return query.with_entities(func.count(distinct(cls.id))).scalar()
+
+    @classmethod
+    @stats.instrument
+    def exists(cls, **kwargs):
+        '''
+        Return True if an entity matches find_query() arguments.
+        Executes a SELECT EXISTS without loading any entity.
+
+            Args:
+                kwargs : find_query() arguments.
+
+            Returns:
+                bool
+        '''
+        query = cls.find_query(**kwargs).order_by(None)
+        return bool(query.session.query(query.exists()).scalar())
+
+    @classmethod
+    def descendants_query(cls, ancestor, status=None):
+        '''
+        Return a Query of cls instances in the subtree of ancestor, at any depth.
+        A single range query on the indexed hierarchy column, see entities.hierarchy.
+
+            Args:
+                ancestor (Entity) : Project, Episode, Sequence, Shot, Asset or Instance.
+                status      (str) : filter by status.
+
+            Returns:
+                A Query of cls instances ordered by hierarchy.
+        '''
+        from . import hierarchy
+
+        if 'hierarchy' not in cls.__table__.columns:
+            raise NotImplementedError('{} has no hierarchy'.format(cls.__name__))
+
+        (low, high) = hierarchy.subtree_range(hierarchy.subtree_prefix(ancestor))
+        query = cls.query(status=status).filter(cls.hierarchy >= low, cls.hierarchy < high)
+        return query.order_by(cls.hierarchy, cls.id)
+
+    @classmethod
+    @stats.instrument
+    def find_descendants(cls, ancestor, status=None):
+        '''
+        Return a list of cls instances in the subtree of ancestor, at any depth.
+        e.g. Task.find_descendants(episode) returns all tasks of the episode shots
+        and sequences.
+
+            Args:
+                ancestor (Entity) : Project, Episode, Sequence, Shot, Asset or Instance.
+                status      (str) : filter by status.
+
+            Returns:
+                list of cls instances ordered by hierarchy.
+        '''
+        return cls.descendants_query(ancestor, status=status).all()
+
+    @classmethod
+    @stats.instrument
     def findby_id(cls, id):
         '''Return an instance based on given id
         Will error out if no result found.
@@ -125,13 +477,21 @@ class BaseEntity(object):
         args:
             id (int): The id to search by.
         '''
+        instance = cache.get_instance(cls, cls.__connect(), id)
+        if instance is not None:
+            return instance
+
         try:
-            return cls.query().filter_by(id=id).one()
+            instance = cls.query().filter_by(id=id).one()
         except NoResultFound:
             raise NoResultFound(
                 "No {} found for id:{}".format(cls.__name__, id))
 
+        cache.set_instance(instance)
+        return instance
+
     @classmethod
+    @stats.instrument
     def findby_ids(cls, ids):
         '''Return instances based on given ids.
         Will return an empty list if none found.
@@ -142,6 +502,7 @@ class BaseEntity(object):
         return cls.query().filter(cls.id.in_(ids)).all()
 
     @classmethod
+    @stats.instrument
     def create(cls, **kw):
         '''
         Create a new entity in the database.
@@ -152,6 +513,196 @@ class BaseEntity(object):
             session.add(new)
         return new
 
+    @classmethod
+    @stats.instrument
+    def bulk_create(cls, rows, key=None, chunk_size=BULK_CHUNK_SIZE, hydrate=False):
+        '''
+        Create new entities in the database using chunked multi-row INSERTs.
+        All chunks are inserted in one transaction, python column defaults
+        e.g. calc_episode() are executed for every row.
+
+            Args:
+                rows       (list) : list of column dicts, same as create() kw.
+                key        (list) : unique column names used to fetch back new ids.
+                                    defaults to the first unique constraint set in rows.
+                chunk_size  (int) : rows per INSERT statement.
+                hydrate    (bool) : return entity instances instead of ids.
+
+            Returns:
+                A list of new ids (or entity instances) in rows order.
+        '''
+        rows = [cls._insert_values(row) for row in rows]
+        if not rows:
+            return []
+
+        key = key or cls._unique_key(rows)
+        ids = []
+
+        with db.session_context() as session:
+            for chunk in _chunks(rows, chunk_size):
+                # Multi-row INSERT requires the same columns for every row
+                groups = dict()
+                for row in chunk:
+                    groups.setdefault(frozenset(row), []).append(row)
+
+                for group in groups.values():
+                    session.execute(cls.__table__.insert().values(group))
+
+                ids.extend(cls._fetch_ids(session, chunk, key))
+
+        # Core INSERTs don't go through the session flush
+        cache.invalidate(cls)
+
+        if hydrate:
+            entities = dict((e.id, e) for e in cls.findby_ids(ids))
+            return [entities[id] for id in ids]
+
+        return ids
+
+    @classmethod
+    @stats.instrument
+    def upsert_by_shotgun_id(cls, rows, chunk_size=BULK_CHUNK_SIZE):
+        '''
+        Insert or update entities keyed on their unique shotgun_id column.
+        Rows are compared with the database first, so only new or changed rows are
+        written using chunked INSERT ... ON DUPLICATE KEY UPDATE (ON CONFLICT on SQLite).
+
+            Args:
+                rows       (list) : list of column dicts, each with a shotgun_id.
+                chunk_size  (int) : rows per statement.
+
+            Returns:
+                AttributeDict with inserted, updated and unchanged counts.
+        '''
+        table = cls.__table__
+        if 'shotgun_id' not in table.columns:
+            raise NotImplementedError('{} has no shotgun_id column'.format(cls.__name__))
+
+        if any(row.get('shotgun_id') is None for row in rows):
+            raise ValueError('All {} rows must have a shotgun_id'.format(cls.__name__))
+
+        result = AttributeDict(inserted=0, updated=0, unchanged=0)
+
+        with db.session_context() as session:
+            dialect = session.get_bind(clause=table.insert()).dialect.name
+
+            for chunk in _chunks(rows, chunk_size):
+                sg_ids = [row['shotgun_id'] for row in chunk]
+                existing = dict((r['shotgun_id'], r) for r in session.execute(
+                                table.select().where(table.c.shotgun_id.in_(sg_ids))))
+
+                groups = dict()
+                for row in chunk:
+                    current = existing.get(row['shotgun_id'])
+                    if current is None:
+                        result.inserted += 1
+                        values = cls._insert_values(row)
+                    elif any(current[name] != value for name, value in row.items()):
+                        result.updated += 1
+                        values = cls._insert_values(cls._merge_columns(current, row))
+                    else:
+                        result.unchanged += 1
+                        continue
+
+                    groups.setdefault(frozenset(values), []).append(values)
+
+                for names, group in groups.items():
+                    update = cls._upsert_columns(names)
+                    session.execute(upsert(dialect, table, group, ['shotgun_id'], update))
+
+        cache.invalidate(cls)
+
+        return result
+
+    @classmethod
+    def _merge_columns(cls, current, row):
+        '''
+        Return current database record updated with row.
+        Primary key, onupdate and derived columns are skipped, to be computed by the
+        statement e.g. hierarchy and fullname.
+        '''
+        result = dict()
+        for column in cls.__table__.columns:
+            if not (column.primary_key or column.onupdate is not None or _derived(column)):
+                result[column.name] = current[column.name]
+
+        result.update(row)
+        return result
+
+    @classmethod
+    def _upsert_columns(cls, names):
+        '''
+        Return {column: value} to update on conflict for inserted column names.
+        Includes onupdate and derived columns e.g. calc_episode() or func.now().
+        '''
+        update = dict()
+        for column in cls.__table__.columns:
+            if column.primary_key or column.name == 'shotgun_id':
+                continue
+            elif column.name in names:
+                update[column.name] = INSERTED
+            elif _derived(column):
+                # python default computed from the other inserted values
+                update[column.name] = INSERTED
+            elif column.onupdate is None:
+                continue
+            elif column.onupdate.is_clause_element:
+                update[column.name] = column.onupdate.arg
+            elif column.default is not None:
+                # python default computed for the insert, from the same values
+                update[column.name] = INSERTED
+
+        return update or {'shotgun_id': INSERTED}
+
+    @classmethod
+    def _insert_values(cls, row):
+        '''
+        Return row as INSERT values, matching ORM behavior:
+        None values are left to column defaults, and missing columns without
+        a default are set to None.
+        '''
+        result = dict()
+        for name in row:
+            if name not in cls.__table__.columns:
+                raise ValueError('{} has no column {!r}'.format(cls.__name__, name))
+
+        for column in cls.__table__.columns:
+            has_default = (column.default is not None or column.server_default is not None
+                           or column.primary_key)
+            value = row.get(column.name)
+            if value is not None or not has_default:
+                result[column.name] = value
+
+        return result
+
+    @classmethod
+    def _unique_key(cls, rows):
+        '''Return column names of the first unique constraint set in all rows'''
+        constraints = [c for c in cls.__table__.constraints if isinstance(c, UniqueConstraint)]
+        for constraint in sorted(constraints, key=lambda c: c.name):
+            names = [c.name for c in constraint.columns]
+            if all(row.get(name) is not None for row in rows for name in names):
+                return names
+
+        raise ValueError('Unable to find a unique key for {} rows, please provide key arg'
+                         .format(cls.__name__))
+
+    @classmethod
+    def _fetch_ids(cls, session, rows, key):
+        '''Return primary keys of given inserted rows, matched by key columns'''
+        pk = inspect(cls).primary_key
+        columns = [cls.__table__.columns[name] for name in key]
+
+        where = or_(*[and_(*[col == row.get(col.name) for col in columns]) for row in rows])
+        result = session.execute(select(list(pk) + columns).where(where))
+
+        found = dict()
+        for record in result:
+            ids = tuple(record[:len(pk)])
+            found[tuple(record[len(pk):])] = ids[0] if len(pk) == 1 else ids
+
+        return [found[tuple(row.get(name) for name in key)] for row in rows]
+
     @classmethod
     def cls_name(cls):
         '''Returns entity's class name'''
@@ -272,5 +823,189 @@ class ResultSet(set):
         return not self.__eq__(other)
 
 
+class LinkSet(ResultSet):
+    '''
+    ResultSet of linked entities e.g. Task.users, remembering the owner and entities it
+    was loaded with so the owner setter only writes the links added and removed since.
+        users = task.users
+        users += user
+        task.users = users
+    '''
+    def __init__(self, entities=(), owner=None):
+        '''
+            Args:
+                entities (list) : linked entities.
+                owner  (Entity) : entity the links were loaded for e.g. a Task.
+        '''
+        super(LinkSet, self).__init__(entities)
+        self.owner = owner
+        self.loaded = frozenset(self)
+
+    def added(self):
+        '''Return entities added since loaded'''
+        return set(self) - self.loaded
+
+    def removed(self):
+        '''Return entities removed since loaded'''
+        return set(self.loaded) - set(self)
+
+
+class LinkTable(object):
+    '''
+    Set-based writes of a link table e.g. user_task, linking owner ids to item ids.
+    Links are compared as sets of ids and written with multi-row INSERT IGNORE and
+    DELETE ... WHERE IN statements, without loading any entity.
+    '''
+
+    def __init__(self, table, owner, item):
+        '''
+            Args:
+                table (Table) : link table.
+                owner   (str) : owner id column name e.g. 'task_id'.
+                item    (str) : item id column name e.g. 'user_id'.
+        '''
+        self.table = table
+        self.owner = table.columns[owner]
+        self.item = table.columns[item]
+
+    def __repr__(self):
+        return '{cls}({table}, {owner}, {item})'.format(cls=self.__class__.__name__,
+                                                        table=self.table.name,
+                                                        owner=self.owner.name,
+                                                        item=self.item.name)
+
+    def items(self, owner_ids, chunk_size=BULK_CHUNK_SIZE):
+        '''Return {owner id: set of linked item ids} for owner ids'''
+        links = dict((owner_id, set()) for owner_id in owner_ids)
+
+        with db.session_context() as session:
+            for chunk in _chunks(sorted(links), chunk_size):
+                statement = select([self.owner, self.item]).where(self.owner.in_(chunk))
+                for (owner_id, item_id) in session.execute(statement):
+                    links[owner_id].add(item_id)
+
+        return links
+
+    def add(self, pairs, chunk_size=BULK_CHUNK_SIZE):
+        '''Link (owner id, item id) pairs, existing links are skipped'''
+        rows = [{self.owner.name: owner_id, self.item.name: item_id}
+                for (owner_id, item_id) in sorted(set(pairs))]
+        if not rows:
+            return
+
+        with db.session_context() as session:
+            dialect = session.get_bind(clause=self.table.insert()).dialect.name
+            for chunk in _chunks(rows, chunk_size):
+                session.execute(insert_ignore(dialect, self.table, chunk))
+
+    def remove(self, owner_id, item_ids, chunk_size=BULK_CHUNK_SIZE):
+        '''Unlink item ids from owner id'''
+        with db.session_context() as session:
+            for chunk in _chunks(sorted(set(item_ids)), chunk_size):
+                session.execute(self.table.delete().where(
+                    and_(self.owner == owner_id, self.item.in_(chunk))))
+
+    def assign(self, links, chunk_size=BULK_CHUNK_SIZE):
+        '''
+        Replace the links of owner ids in one transaction.
+
+            Args:
+                links (dict) : {owner id: item ids}.
+
+            Returns:
+                (added, removed) number of links.
+        '''
+        (pairs, removed) = ([], 0)
+
+        with db.session_context():
+            current = self.items(links, chunk_size=chunk_size)
+
+            for (owner_id, item_ids) in links.items():
+                item_ids = set(item_ids)
+                pairs.extend((owner_id, item_id) for item_id in item_ids - current[owner_id])
+
+                unlinked = current[owner_id] - item_ids
+                if unlinked:
+                    self.remove(owner_id, unlinked, chunk_size=chunk_size)
+                    removed += len(unlinked)
+
+            self.add(pairs, chunk_size=chunk_size)
+
+        return (len(pairs), removed)
+
+
+class TreeQuery(AppenderQuery):
+    '''
+    Query class of dynamic relationships.
+    Iterating a relationship linked by link_tree() e.g. Project.load_tree(), reads the
+    linked instances without SQL, until the session commits or rolls back.
+    '''
+
+    def __iter__(self):
+        children = self._tree_children()
+        if children is not None:
+            return iter(children)
+        return super(TreeQuery, self).__iter__()
+
+    def __getitem__(self, index):
+        children = self._tree_children()
+        if children is not None:
+            return children[index]
+        return super(TreeQuery, self).__getitem__(index)
+
+    def count(self):
+        children = self._tree_children()
+        if children is not None:
+            return len(children)
+        return super(TreeQuery, self).count()
+
+    def _tree_children(self):
+        '''Return instances linked to this relationship, None if not linked or stale'''
+        tree = self.instance.__dict__.get('_tree')
+        if tree is None:
+            return None
+
+        (generation, children) = tree
+        session = object_session(self.instance)
+        if session is None or session.info.get(TREE_GENERATION, 0) != generation:
+            return None
+
+        return children.get(self.attr.key)
+
+
+def link_tree(session, instance, children):
+    '''
+    Link loaded instances to TreeQuery dynamic relationships of instance.
+
+        Args:
+            session (Session) : session instance belongs to.
+            instance (Entity) : parent instance.
+            children   (dict) : relationship name : list of instances
+                                e.g. {'_shots': [Shot, ...]}.
+    '''
+    instance.__dict__['_tree'] = (session.info.get(TREE_GENERATION, 0), children)
+
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_soft_rollback')
+def _expire_trees(session, *args):
+    '''Writes make instances linked by link_tree() stale'''
+    session.info[TREE_GENERATION] = session.info.get(TREE_GENERATION, 0) + 1
+
+
+def _derived(column):
+    '''
+    Return True if column is computed from other columns of its row by its default,
+    flagged with Column(..., info=dict(derived=True)).
+    '''
+    return column.info.get('derived', False)
+
+
+def _chunks(items, size):
+    '''Yield successive size chunks from items list'''
+    for index in range(0, len(items), size):
+        yield items[index:index + size]
+
+
 class EntityTypeError(TypeError):
     pass
@@ -4,7 +4,8 @@
 from sqlalchemy import (Table, Column, Integer, String, Enum, Index,
                         ForeignKey, UniqueConstraint)
 from sqlalchemy.orm import relationship
-from .core import Base
+from .core import Base, TreeQuery, BULK_CHUNK_SIZE
+from .hierarchy import hierarchy_default
 from .project import Project
 
 
@@ -18,16 +19,24 @@ class Episode(Base):
                       Column('project_id', Integer, ForeignKey(Project.id), nullable=False),
                       Column('shotgun_id', Integer),
                       Column('description', String(255)),
+                      Column('hierarchy', String(255), default=hierarchy_default('episode'),
+                             info=dict(derived=True)),
 
                       Index('ix_proj_name', 'project_id', 'name', 'status'),
                       Index('ix_sg', 'shotgun_id'),
+                      Index('ix_hierarchy', 'hierarchy'),
 
                       UniqueConstraint('project_id', 'name', name='uq_proj_name'),
                       UniqueConstraint('project_id', 'basename', name='uq_proj_basename'),
                       UniqueConstraint('shotgun_id', name='uq_sg')
                       )
     _sequences = relationship('Sequence', backref='episode', lazy='dynamic',
-                              order_by='Sequence.name', cascade="all, delete-orphan")
+                              order_by='Sequence.name', cascade="all, delete-orphan",
+                              query_class=TreeQuery)
+
+    PARENTS = ('project',)
+    FIND_SHAPES = (('id',), ('shotgun_id',), ('name', 'project'))
+    CACHED = True
 
     @property
     def parent(self):
@@ -37,9 +46,9 @@ class Episode(Base):
         return self.project
 
     @classmethod
-    def find(cls, project=None, name=None, status=None, id=None, shotgun_id=None):
+    def find_query(cls, project=None, name=None, status=None, id=None, shotgun_id=None):
         '''
-        Return Episode instances by query arguments
+        Return a Query of Episode instances by query arguments
 
             Args:
                 project     (Project) : parent Project instance.
@@ -49,10 +58,10 @@ class Episode(Base):
                 shotgun_id (int/list) : Epsiode shotgun id(s).
 
             Returns:
-                A list of Episode instances matching find arguments.
+                A Query of Episode instances matching find arguments.
         '''
         query = cls.query(project=project, name=name, id=id, status=status, shotgun_id=shotgun_id)
-        return query.all()
+        return query
 
     @classmethod
     def create(cls, name, project, status=None, shotgun_id=None):
@@ -68,12 +77,35 @@ class Episode(Base):
             Returns:
                 New Episode instance.
         '''
+        data = cls._create_data(name=name, project=project, status=status,
+                                shotgun_id=shotgun_id)
+
+        return super(Episode, cls).create(**data)
+
+    @classmethod
+    def bulk_create(cls, rows, chunk_size=BULK_CHUNK_SIZE, hydrate=False):
+        '''
+        Create many Episode instances in one transaction.
+
+            Args:
+                rows       (list) : list of dicts with create() arguments.
+                chunk_size  (int) : rows per INSERT statement.
+                hydrate    (bool) : return Episode instances instead of ids.
+
+            Returns:
+                A list of new Episode ids (or instances) in rows order.
+        '''
+        rows = [cls._create_data(**row) for row in rows]
+        return super(Episode, cls).bulk_create(rows, key=('project_id', 'name'),
+                                               chunk_size=chunk_size, hydrate=hydrate)
+
+    @classmethod
+    def _create_data(cls, name, project, status=None, shotgun_id=None):
+        '''Validate create() arguments and return Episode columns dict'''
         cls.assert_isinstance(project, 'Project')
 
-        data = dict(name=name,
+        return dict(name=name,
                     basename=name,
                     status=status,
                     project_id=project.id,
                     shotgun_id=shotgun_id)
-
-        return super(Episode, cls).create(**data)
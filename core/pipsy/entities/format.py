@@ -44,15 +44,18 @@ class Format(Base):
                       UniqueConstraint('shot_id', 'name', name='uq_shot_name')
                       )
 
+    PARENTS = ('project',)
+    FIND_SHAPES = (('id',),)
+
     def __repr__(self):
         return "{cls}(name='{name}', id={id})".format(cls=self.__class__.__name__,
                                                       name=self.name,
                                                       id=self.id)
 
     @classmethod
-    def find(cls, entity=None, name=None, status=None, id=None):
+    def find_query(cls, entity=None, name=None, status=None, id=None):
         '''
-        Return Format instances by query arguments
+        Return a Query of Format instances by query arguments
 
         args:
             entity (Entity) : linked Entity.
@@ -80,7 +83,7 @@ class Format(Base):
             else:
                 raise NotImplementedError('entity {!r} not implemented!'.format(entity.cls_name()))
 
-        return query.all()
+        return query
 
     @classmethod
     def create(cls, entity, name=None, high_res=None, mid_res=None, low_res=None,
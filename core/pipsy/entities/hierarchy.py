@@ -0,0 +1,443 @@
+#!/usr/bin/env python
+'''
+Materialized hierarchy paths and fullnames.
+
+Every episode, sequence, shot, asset, instance, task and publishgroup row stores the
+path of its ancestors in a hierarchy column e.g. '/p1/e2/q3/' for a Shot of Sequence 3
+of Episode 2 of Project 1. Any subtree is then an indexed range query on that column,
+see subtree_range() and BaseEntity.find_descendants().
+
+Sequence, shot and instance rows store their fullname e.g. '101_010_0040', prefixed by
+their parents names, so they can be found by fullname with an indexed lookup.
+
+Both columns are set on INSERT by hierarchy_default() and fullname_default(), and a
+renamed or reparented row rewrites its own and all its descendants values on UPDATE.
+Rebuild the values of existing data with:
+
+    python -m pipsy.entities.hierarchy
+'''
+
+# imports
+from sqlalchemy import event, select, func, and_, literal, bindparam, String
+from sqlalchemy.orm import object_session
+from .. import db
+from ..core import logging
+from . import cache
+from .core import Base, BULK_CHUNK_SIZE, _chunks
+
+LOG = logging.getLogger(__name__, level=logging.INFO)
+
+# Path tag of each ancestor table
+TAGS = dict(project='p', episode='e', sequence='q', shot='h', asset='a', instance='i')
+
+# Table : (foreign key column, parent table) in priority order. Rows without any parent
+# set are children of their project.
+PARENTS = dict(episode=(),
+               sequence=(('episode_id', 'episode'),),
+               shot=(('sequence_id', 'sequence'),),
+               asset=(),
+               instance=(('shot_id', 'shot'), ('sequence_id', 'sequence')),
+               task=(('shot_id', 'shot'), ('sequence_id', 'sequence'), ('asset_id', 'asset')),
+               publishgroup=(('instance_id', 'instance'), ('shot_id', 'shot'),
+                             ('sequence_id', 'sequence'), ('asset_id', 'asset')))
+
+# Table : (foreign key column, parent table) a fullname is prefixed with, in priority order
+FULLNAMES = dict(sequence=(('episode_id', 'episode'),),
+                 shot=(('sequence_id', 'sequence'),),
+                 instance=(('shot_id', 'shot'), ('sequence_id', 'sequence')))
+
+# Tables whose name prefix descendants fullnames
+RENAMES = ('episode', 'sequence', 'shot')
+
+# Tables ordered parents first
+TABLES = ('episode', 'sequence', 'shot', 'asset', 'instance', 'task', 'publishgroup')
+
+
+def path(table, row, lookup):
+    '''
+    Return the ancestors path of a table row.
+
+        Args:
+            table      (str) : table name e.g. 'shot'.
+            row       (dict) : row column values.
+            lookup (callable) : lookup(parent table, parent id) returning the parent path.
+
+        Returns:
+            path string e.g. '/p1/e2/q3/'.
+    '''
+    for (column, parent) in PARENTS[table]:
+        parent_id = row.get(column)
+        if parent_id:
+            return '{}{}{}/'.format(lookup(parent, parent_id), TAGS[parent], parent_id)
+
+    return '/{}{}/'.format(TAGS['project'], row.get('project_id'))
+
+
+def fullname(table, row, lookup):
+    '''
+    Return the fullname of a table row.
+
+        Args:
+            table      (str) : table name e.g. 'shot'.
+            row       (dict) : row column values.
+            lookup (callable) : lookup(parent table, parent id) returning the parent fullname.
+
+        Returns:
+            fullname string e.g. '101_010_0040'.
+    '''
+    for (column, parent) in FULLNAMES[table]:
+        parent_id = row.get(column)
+        if parent_id:
+            return '{}_{}'.format(lookup(parent, parent_id), row.get('name'))
+
+    return row.get('name')
+
+
+def subtree_prefix(entity):
+    '''
+    Return the path prefix shared by all descendants of entity.
+
+        Args:
+            entity (Entity) : Project, Episode, Sequence, Shot, Asset or Instance.
+
+        Returns:
+            path prefix string e.g. '/p1/e2/'.
+    '''
+    table = entity.__table__.name
+    if table not in TAGS:
+        raise ValueError('{} has no descendants. Expected any of {}'.format(
+                         entity, sorted(TAGS)))
+
+    if table == 'project':
+        return '/{}{}/'.format(TAGS[table], entity.id)
+
+    return '{}{}{}/'.format(entity.hierarchy, TAGS[table], entity.id)
+
+
+def subtree_range(prefix):
+    '''
+    Return (low, high) bounds of the paths starting with prefix, low inclusive.
+    '0' sorts right after '/', so high is the first path past the subtree.
+    '''
+    return (prefix, prefix[:-1] + '0')
+
+
+def tables():
+    '''Return the tables with a hierarchy column'''
+    return [Base.metadata.tables[name] for name in TABLES]
+
+
+def hierarchy_default(table):
+    '''
+    Return a column default function computing the hierarchy of an inserted table row,
+    reading parent paths within the INSERT connection once per statement.
+    '''
+    def default(context):
+        return path(table, context.get_current_parameters(),
+                    _statement_lookup(context, _lookup))
+
+    return default
+
+
+def fullname_default(table):
+    '''
+    Return a column default function computing the fullname of an inserted table row,
+    reading parent fullnames within the INSERT connection once per statement.
+    '''
+    def default(context):
+        return fullname(table, context.get_current_parameters(),
+                        _statement_lookup(context, _fullname_lookup))
+
+    return default
+
+
+def _statement_lookup(context, factory):
+    '''
+    Return factory(connection) lookup memoized for a statement execution context, so a
+    multi-row INSERT e.g. bulk_create() reads each parent once instead of once per row.
+    '''
+    lookups = context.__dict__.setdefault('_hierarchy_lookups', dict())
+    if factory not in lookups:
+        lookups[factory] = _memoize(factory(context.connection))
+
+    return lookups[factory]
+
+
+def _memoize(lookup):
+    '''Return lookup(parent table, parent id) caching its results'''
+    values = dict()
+
+    def memoized(table, id):
+        if (table, id) not in values:
+            values[(table, id)] = lookup(table, id)
+        return values[(table, id)]
+
+    return memoized
+
+
+def _lookup(connection):
+    '''Return a lookup(parent table, parent id) function reading parent paths'''
+    def lookup(table, id):
+        row = _select(connection, table, _columns(table), id)
+
+        # Parent not rebuilt yet
+        return row['hierarchy'] or path(table, row, lookup)
+
+    return lookup
+
+
+def _fullname_lookup(connection):
+    '''Return a lookup(parent table, parent id) function reading parent fullnames'''
+    def lookup(table, id):
+        if table not in FULLNAMES:
+            return _select(connection, table, ['name'], id)['name']
+
+        row = _select(connection, table, _fullname_columns(table), id)
+
+        # Parent not rebuilt yet
+        return row['fullname'] or fullname(table, row, lookup)
+
+    return lookup
+
+
+def _select(connection, table, names, id):
+    '''Return a table row columns by id as a dict'''
+    columns = Base.metadata.tables[table].c
+    row = connection.execute(select([columns[name] for name in names])
+                             .where(columns.id == id)).first()
+    if row is None:
+        raise ValueError('{} id {} does not exist'.format(table, id))
+
+    return dict(row)
+
+
+def _columns(table):
+    '''Return column names a table row path is computed from'''
+    return ['id', 'project_id', 'hierarchy'] + [column for (column, _) in PARENTS[table]]
+
+
+def _fullname_columns(table):
+    '''Return column names a table row fullname is computed from'''
+    return ['id', 'name', 'fullname'] + [column for (column, _) in FULLNAMES[table]]
+
+
+def _classes(names):
+    '''Return the entity classes mapped to table names'''
+    return [cls for cls in Base._decl_class_registry.values()
+            if getattr(cls, '__table__', None) is not None and cls.__table__.name in names]
+
+
+def _invalidate(names, session=None):
+    '''
+    Invalidate the entity cache of table names rows rewritten by a Core UPDATE, which
+    the session after_flush hook does not see, again after session commit if given.
+    '''
+    classes = _classes(names)
+    cache.invalidate(*classes)
+
+    if session is not None:
+        session.info.setdefault('cache_invalidate', set()).update(classes)
+
+
+def _keep_onupdate(table):
+    '''Return UPDATE values keeping table onupdate columns as is'''
+    return dict((column.name, column) for column in table.columns if column.onupdate is not None)
+
+
+def move_subtree(connection, old, new):
+    '''
+    Rewrite the paths starting with old prefix to start with new prefix, in all tables.
+
+        Args:
+            connection (Connection) : connection to execute with.
+            old               (str) : old prefix.
+            new               (str) : new prefix.
+
+        Returns:
+            list of table names updated.
+    '''
+    (low, high) = subtree_range(old)
+
+    for table in tables():
+        column = table.c.hierarchy
+        tail = func.substr(column, len(old) + 1, type_=String)
+
+        # Keep onupdate columns as is, only paths change
+        values = _keep_onupdate(table)
+        values['hierarchy'] = literal(new, String) + tail
+
+        connection.execute(table.update()
+                           .where(and_(column >= low, column < high))
+                           .values(**values))
+
+    names = [table.name for table in tables()]
+    _invalidate(names)
+    return names
+
+
+def rename_subtree(connection, prefix, old, new):
+    '''
+    Rewrite the fullnames starting with old name to start with new name, for the rows
+    of the subtree starting with prefix path.
+
+        Args:
+            connection (Connection) : connection to execute with.
+            prefix            (str) : subtree path prefix, see subtree_prefix().
+            old               (str) : old fullname of the subtree root.
+            new               (str) : new fullname of the subtree root.
+
+        Returns:
+            list of table names updated.
+    '''
+    (low, high) = subtree_range(prefix)
+
+    for name in FULLNAMES:
+        table = Base.metadata.tables[name]
+        column = table.c.hierarchy
+        tail = func.substr(table.c.fullname, len(old) + 1, type_=String)
+
+        values = _keep_onupdate(table)
+        values['fullname'] = literal(new, String) + tail
+
+        connection.execute(table.update()
+                           .where(and_(column >= low, column < high))
+                           .values(**values))
+
+    names = list(FULLNAMES)
+    _invalidate(names)
+    return names
+
+
+@event.listens_for(Base, 'before_update', propagate=True)
+def _before_update(mapper, connection, target):
+    '''Recompute a renamed or reparented row path and fullname, and its descendants'''
+    table = mapper.local_table.name
+    state = mapper.class_manager.state_getter()(target)
+
+    if table in PARENTS:
+        _update_path(table, state, connection, target)
+
+    if table in FULLNAMES or table in RENAMES:
+        _update_fullname(table, state, connection, target)
+
+
+def _changed(state, keys):
+    '''Return True if any of the instance state attribute keys changed'''
+    return any(state.attrs[key].history.has_changes() for key in keys)
+
+
+def _old_value(state, connection, table, key):
+    '''Return an instance attribute value before the flush, read from connection if expired'''
+    history = state.attrs[key].history
+    if history.deleted or history.unchanged:
+        return (history.deleted or history.unchanged)[0]
+
+    return _select(connection, table, [key], state.identity[0])[key]
+
+
+def _update_path(table, state, connection, target):
+    '''Recompute a reparented row path and move its descendants'''
+    keys = ['project_id'] + [column for (column, _) in PARENTS[table]]
+    if not _changed(state, keys):
+        return
+
+    old = _old_value(state, connection, table, 'hierarchy')
+    row = dict((key, getattr(target, key)) for key in keys)
+    new = path(table, row, _lookup(connection))
+    if new == old:
+        return
+
+    target.hierarchy = new
+    if old and table in TAGS:
+        suffix = '{}{}/'.format(TAGS[table], target.id)
+        names = move_subtree(connection, old + suffix, new + suffix)
+        _invalidate(names, object_session(target))
+
+
+def _update_fullname(table, state, connection, target):
+    '''Recompute a renamed or reparented row fullname and rename its descendants'''
+    keys = ['name'] + [column for (column, _) in FULLNAMES.get(table, ())]
+    if not _changed(state, keys):
+        return
+
+    if table in FULLNAMES:
+        old = _old_value(state, connection, table, 'fullname')
+        row = dict((key, getattr(target, key)) for key in keys)
+        new = fullname(table, row, _fullname_lookup(connection))
+        target.fullname = new
+    else:
+        old = _old_value(state, connection, table, 'name')
+        new = target.name
+
+    if old and new != old and table in RENAMES:
+        names = rename_subtree(connection, subtree_prefix(target), old + '_', new + '_')
+        _invalidate(names, object_session(target))
+
+
+def rebuild(chunk_size=BULK_CHUNK_SIZE):
+    '''
+    Recompute the hierarchy and fullname columns of all rows, parent tables first.
+
+        Args:
+            chunk_size (int) : rows per UPDATE executemany.
+
+        Returns:
+            dict of table name : number of rows updated.
+    '''
+    paths = dict((name, {}) for name in TABLES)   # table : {id : path}
+    names = dict((name, {}) for name in TABLES)   # table : {id : fullname}
+    updated = dict()
+
+    def lookup(table, id):
+        return paths[table][id]
+
+    def fullname_lookup(table, id):
+        return names[table][id]
+
+    with db.session_context() as session:
+        for table in tables():
+            name = table.name
+            keys = _columns(name) + ['name']
+            if name in FULLNAMES:
+                keys += _fullname_columns(name)
+            columns = [table.c[key] for key in sorted(set(keys) & set(table.c.keys()))]
+
+            rows = []
+            for row in session.execute(select(columns).order_by(table.c.id)):
+                row = dict(row)
+                values = dict(_hierarchy=path(name, row, lookup))
+                paths[name][row['id']] = values['_hierarchy']
+                names[name][row['id']] = row.get('name')
+
+                if name in FULLNAMES:
+                    values['_fullname'] = fullname(name, row, fullname_lookup)
+                    names[name][row['id']] = values['_fullname']
+
+                if any(row[key[1:]] != value for (key, value) in values.items()):
+                    rows.append(dict(values, _id=row['id']))
+
+            # Keep onupdate columns as is, only paths and fullnames change
+            values = _keep_onupdate(table)
+            values['hierarchy'] = bindparam('_hierarchy')
+            if name in FULLNAMES:
+                values['fullname'] = bindparam('_fullname')
+
+            statement = (table.update()
+                         .where(table.c.id == bindparam('_id'))
+                         .values(**values))
+            for chunk in _chunks(rows, chunk_size):
+                session.execute(statement, chunk)
+
+            updated[name] = len(rows)
+
+    _invalidate(TABLES)
+    return updated
+
+
+def main():
+    for (table, count) in sorted(rebuild().items()):
+        LOG.info('{} hierarchy and fullname rebuilt for {} rows'.format(table, count))
+
+
+if __name__ == '__main__':
+    main()
@@ -3,11 +3,11 @@
 # imports
 from sqlalchemy import (Table, Column, Integer, String, Enum, Index, DateTime,
                         ForeignKey, UniqueConstraint)
-from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from ..core.pythonx import string_types
-from .core import Base
+from .core import Base, BULK_CHUNK_SIZE
+from .hierarchy import hierarchy_default, fullname_default
 from .project import Project
 from .sequence import Sequence
 from .shot import Shot
@@ -29,11 +29,17 @@ class Instance(Base):
                       Column('description', String(255)),
                       Column('created', DateTime(timezone=True), server_default=func.now()),
                       Column('updated', DateTime(timezone=True), onupdate=func.now()),
+                      Column('hierarchy', String(255), default=hierarchy_default('instance'),
+                             info=dict(derived=True)),
+                      Column('fullname', String(255), default=fullname_default('instance'),
+                             info=dict(derived=True)),
 
                       Index('ix_proj_seq_name', 'project_id', 'sequence_id', 'name'),
                       Index('ix_proj_shot_name', 'project_id', 'shot_id', 'name'),
                       Index('ix_shot_asset', 'asset_id', 'shot_id'),
                       Index('ix_sg', 'shotgun_id'),
+                      Index('ix_hierarchy', 'hierarchy'),
+                      Index('ix_fullname', 'fullname'),
 
                       UniqueConstraint('sequence_id', 'name', name='uq_seq_name'),
                       UniqueConstraint('shot_id', 'name', name='uq_shot_name'),
@@ -43,6 +49,10 @@ class Instance(Base):
     _publishgroups = relationship('PublishGroup', backref='instance', lazy='dynamic',
                                   order_by='PublishGroup.id', cascade="all, delete-orphan")
 
+    PARENTS = ('project', 'shot.sequence.episode', 'sequence.episode', 'asset')
+    FIND_SHAPES = (('id',), ('shotgun_id',), ('name', 'project'), ('fullname',),
+                   ('fullname', 'project'))
+
     @property
     def parent(self):
         '''
@@ -56,15 +66,6 @@ class Instance(Base):
         elif self.asset_id:
             return self.asset
 
-    @hybrid_property
-    def fullname(self):
-        '''
-        Return Instance fullname string.
-        {episode.name}_{sequence.name}_{shot.name}_{instance.name} or
-        {sequence.name}_{shot.name}_{instance.name}
-        '''
-        return '{}_{}'.format(self.shot.fullname, self.name)
-
     @classmethod
     def add_instance(cls, entity, asset, name):
         '''
@@ -87,22 +88,23 @@ class Instance(Base):
         return Instance.create(project=entity.project, entity=entity, name=name, asset=asset)
 
     @classmethod
-    def find(cls, project=None, entity=None, name=None, asset=None, status=None,
-             id=None, shotgun_id=None):
+    def find_query(cls, project=None, entity=None, name=None, asset=None, status=None,
+                   id=None, shotgun_id=None, fullname=None):
         '''
-        Return Instance instances by query arguments
+        Return a Query of Instance instances by query arguments
 
             Args:
                 project      (Project) : parent Project instance.
                 entity (Sequence|Shot) : parent Sequence instance.
                 asset          (Asset) : Asset instance.
                 name             (str) : Instance name.
+                fullname         (str) : Instance fullname e.g. '101_010_0040_cupcake'.
                 status           (str) : Instance status.
                 id          (int/list) : Instance id(s).
                 shotgun_id  (int/list) : Instance shotgun id(s).
 
             Returns:
-                A list of Instance instances matching find arguments.
+                A Query of Instance instances matching find arguments.
         '''
         query = cls.query(project=project, name=name, id=id, status=status, shotgun_id=shotgun_id)
 
@@ -124,7 +126,10 @@ class Instance(Base):
             cls.assert_isinstance(asset, 'Asset')
             query = query.filter(cls.asset_id == asset.id)
 
-        return query.all()
+        if fullname:
+            query = query.filter(cls.fullname == fullname)
+
+        return query
 
     @classmethod
     def create(cls, name, project, entity, asset, status=None, shotgun_id=None):
@@ -143,6 +148,32 @@ class Instance(Base):
                 New Instance Instance.
 
         '''
+        data = cls._create_data(name=name, project=project, entity=entity, asset=asset,
+                                status=status, shotgun_id=shotgun_id)
+
+        return super(Instance, cls).create(**data)
+
+    @classmethod
+    def bulk_create(cls, rows, chunk_size=BULK_CHUNK_SIZE, hydrate=False):
+        '''
+        Create many Instance instances in one transaction.
+
+            Args:
+                rows       (list) : list of dicts with create() arguments.
+                chunk_size  (int) : rows per INSERT statement.
+                hydrate    (bool) : return Instance instances instead of ids.
+
+            Returns:
+                A list of new Instance ids (or instances) in rows order.
+        '''
+        rows = [cls._create_data(**row) for row in rows]
+        key = ('project_id', 'sequence_id', 'shot_id', 'name')
+        return super(Instance, cls).bulk_create(rows, key=key, chunk_size=chunk_size,
+                                                hydrate=hydrate)
+
+    @classmethod
+    def _create_data(cls, name, project, entity, asset, status=None, shotgun_id=None):
+        '''Validate create() arguments and return Instance columns dict'''
         cls.assert_isinstance(project, 'Project')
         cls.assert_isinstance(asset, 'Asset')
 
@@ -158,7 +189,7 @@ class Instance(Base):
             raise TypeError('entity arg must be a Sequence or Shot. Given {!r}'
                             .format(type(entity)))
 
-        data = dict(name=name,
+        return dict(name=name,
                     status=status,
                     project_id=project.id,
                     asset_id=asset.id,
@@ -166,8 +197,6 @@ class Instance(Base):
                     shot_id=getattr(shot, 'id', None),
                     shotgun_id=shotgun_id)
 
-        return super(Instance, cls).create(**data)
-
 
 class InstanceNameExists(RuntimeError):
     pass
@@ -2,9 +2,14 @@
 '''Project entity class'''
 
 # imports
-from sqlalchemy import (Table, Column, Integer, String, Enum, Index, UniqueConstraint)
+from collections import defaultdict
+from sqlalchemy import (Table, Column, Integer, String, Enum, Index, UniqueConstraint, inspect)
 from sqlalchemy.orm import relationship
-from .core import Base
+from .core import Base, TreeQuery, link_tree
+
+# Project.load_tree() levels and their depth below the project
+TREE_LEVELS = ('episodes', 'sequences', 'shots', 'assets', 'instances', 'tasks')
+TREE_DEPTHS = dict(episodes=1, assets=1, sequences=2, shots=3, instances=4, tasks=4)
 
 
 class Project(Base):
@@ -30,34 +35,103 @@ class Project(Base):
     _formats = relationship('Format', backref='project', lazy='dynamic',
                             cascade="all, delete-orphan")
     _episodes = relationship('Episode', backref='project', lazy='dynamic',
-                             order_by='Episode.name', cascade="all, delete-orphan")
+                             order_by='Episode.name', cascade="all, delete-orphan",
+                             query_class=TreeQuery)
     _sequences = relationship('Sequence', backref='project', lazy='dynamic',
-                              order_by='Sequence.name', cascade="all, delete-orphan")
+                              order_by='Sequence.name', cascade="all, delete-orphan",
+                              query_class=TreeQuery)
     _shots = relationship('Shot', backref='project', lazy='dynamic',
-                          order_by='Shot.name', cascade="all, delete-orphan")
+                          order_by='Shot.name', cascade="all, delete-orphan",
+                          query_class=TreeQuery)
     _assets = relationship('Asset', backref='project', lazy='dynamic',
-                           order_by='Asset.name', cascade="all, delete-orphan")
+                           order_by='Asset.name', cascade="all, delete-orphan",
+                           query_class=TreeQuery)
     _tasks = relationship('Task', backref='project', lazy='dynamic',
-                          order_by='Task.id', cascade="all, delete-orphan")
+                          order_by='Task.id', cascade="all, delete-orphan",
+                          query_class=TreeQuery)
     _userprojects = relationship('UserProject', backref='project', lazy='dynamic',
                                  cascade="all, delete-orphan")
     _instances = relationship('Instance', backref='project', lazy='dynamic',
-                              order_by='Instance.id', cascade="all, delete-orphan")
+                              order_by='Instance.id', cascade="all, delete-orphan",
+                              query_class=TreeQuery)
     _publishgroups = relationship('PublishGroup', backref='project', lazy='dynamic',
                                   order_by='PublishGroup.id', cascade="all, delete-orphan")
     _publish = relationship('Publish', backref='project', lazy='dynamic',
                             order_by='PublishGroup.id', cascade="all, delete-orphan")
 
+    FIND_SHAPES = (('id',), ('shotgun_id',))
+    CACHED = True
+
+    def load_tree(self, depth=None, include=TREE_LEVELS):
+        '''
+        Load the project hierarchy with one query per level and link it in memory.
+        Dynamic relationships e.g. project._episodes, episode._sequences, sequence._shots
+        and shot._instances then iterate the loaded entities without SQL, until the
+        session commits or rolls back.
+
+            Args:
+                depth    (int) : max depth below the project. 1 episodes and assets,
+                                 2 sequences, 3 shots, 4 instances and tasks.
+                                 defaults to all levels.
+                include (list) : levels to load, from TREE_LEVELS.
+
+            Returns:
+                dict of level name : list of loaded entities.
+        '''
+        from . import Episode, Sequence, Shot, Asset, Instance, Task
+        classes = dict(episodes=Episode, sequences=Sequence, shots=Shot, assets=Asset,
+                       instances=Instance, tasks=Task)
+
+        unknown = set(include) - set(TREE_LEVELS)
+        if unknown:
+            raise ValueError('Invalid include {}. Expected any of {}'.format(
+                             sorted(unknown), TREE_LEVELS))
+
+        levels = dict()
+        for level in TREE_LEVELS:
+            if level in include and (depth is None or TREE_DEPTHS[level] <= depth):
+                levels[level] = classes[level].query(project=self).all()
+
+        loaded = dict((classes[level], entities) for (level, entities) in levels.items())
+        loaded[Project] = [self]
+
+        # Group each level by parent for every TreeQuery relationship between loaded levels
+        trees = dict()   # id(parent) : (parent, {relationship key : children})
+        for (parent_cls, parents) in loaded.items():
+            for prop in inspect(parent_cls).relationships:
+                if prop.query_class is not TreeQuery or prop.mapper.class_ not in loaded:
+                    continue
+
+                ((local, remote),) = prop.local_remote_pairs
+                order = [column.key for column in prop.order_by or ()]
+
+                groups = defaultdict(list)
+                for child in loaded[prop.mapper.class_]:
+                    groups[getattr(child, remote.key)].append(child)
+
+                for group in groups.values():
+                    group.sort(key=lambda child: _order_key(child, order))
+
+                for parent in parents:
+                    (_, children) = trees.setdefault(id(parent), (parent, dict()))
+                    children[prop.key] = groups.get(getattr(parent, local.key), [])
+
+        session = inspect(self).session
+        for (parent, children) in trees.values():
+            link_tree(session, parent, children)
+
+        return levels
+
     @classmethod
     def findby_name(cls, name):
         '''Return a Project instance by name'''
         return cls.query().filter(cls.name == name).one()
 
     @classmethod
-    def find(cls, name=None, root=None, format=None, schema=None, status=None,
-             id=None, shotgun_id=None):
+    def find_query(cls, name=None, root=None, format=None, schema=None, status=None,
+                   id=None, shotgun_id=None):
         '''
-        Return Project instances by query arguments
+        Return a Query of Project instances by query arguments
 
             Args:
                 name            (str) : Project name.
@@ -69,7 +143,7 @@ class Project(Base):
                 shotgun_id (int/list) : Project shotgun id(s).
 
             Returns:
-                A list of Project instances matching find arguments.
+                A Query of Project instances matching find arguments.
 
         '''
         query = cls.query(name=name, id=id, status=status, shotgun_id=shotgun_id)
@@ -84,7 +158,7 @@ class Project(Base):
             query = query.filter(cls.root == root)
 
         query = query.order_by(cls.name)
-        return query.all()
+        return query
 
     @classmethod
     def create(cls, name, root, schema, description='', status=None, shotgun_id=None):
@@ -111,3 +185,8 @@ class Project(Base):
                     description = description)
 
         return super(Project, cls).create(**data)
+
+
+def _order_key(entity, keys):
+    '''Return entity sort key for relationship order_by column keys, None values last'''
+    return [(getattr(entity, key) is None, getattr(entity, key)) for key in keys]
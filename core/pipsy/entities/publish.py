@@ -1,11 +1,14 @@
 '''Publish entity class'''
 
 # imports
+from collections import defaultdict
 from sqlalchemy import (Table, Column, Integer, Enum, Index, DateTime, DECIMAL,
-                        String, SmallInteger, ForeignKey, UniqueConstraint)
+                        String, SmallInteger, ForeignKey, UniqueConstraint, select, and_)
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
-from .core import Base
+from .. import db
+from ..db import stats
+from .core import Base, BULK_CHUNK_SIZE, _chunks
 from ..core.pythonx import string_types
 from .project import Project
 from .user import User
@@ -38,6 +41,8 @@ class Publish(Base):
                       Index('ix_project_kind_root', 'project_id', 'publishkind_id', 'root'),
                       Index('ix_project_task', 'project_id', 'task_id'),
                       Index('ix_project_user', 'project_id', 'user_id'),
+                      Index('ix_group_kind_status_version', 'publishgroup_id', 'publishkind_id',
+                            'status', 'version'),
 
                       UniqueConstraint('publishgroup_id', 'publishkind_id', 'version',
                                        name="uq_group_kind_version"),
@@ -48,6 +53,13 @@ class Publish(Base):
     _publishmetadata = relationship('PublishMetadata', backref='publish', lazy='dynamic',
                                     cascade="all, delete-orphan")
 
+    PARENTS = ('project', 'publishkind', 'user',
+               'publishgroup.instance.shot.sequence.episode',
+               'publishgroup.shot.sequence.episode',
+               'publishgroup.sequence.episode',
+               'publishgroup.asset')
+    FIND_SHAPES = (('id',),)
+
     def __repr__(self):
         return "{cls}(id={id})".format(cls=self.__class__.__name__, id=self.id)
 
@@ -76,10 +88,10 @@ class Publish(Base):
         PublishMetadata.set_metadata(self, data)
 
     @classmethod
-    def find(cls, project=None, publishgroup=None, publishkind=None,
-             version=None, root=None, path=None, user=None, status=None, id=None):
+    def find_query(cls, project=None, publishgroup=None, publishkind=None,
+                   version=None, root=None, path=None, user=None, status=None, id=None):
         '''
-        Return Publish instances by query arguments
+        Return a Query of Publish instances by query arguments
 
             Args:
                 project           (Project) : parent Project instance.
@@ -93,7 +105,7 @@ class Publish(Base):
                 id               (int/list) : Publish id(s).
 
             Returns:
-                A list of Publish instances matching find arguments.
+                A Query of Publish instances matching find arguments.
         '''
         query = cls.query(project=project, id=id, status=status)
 
@@ -124,10 +136,122 @@ class Publish(Base):
                                                     .format(type(path)))
             query = query.filter(cls.path == path)
 
-        return query.all()
+        return query
+
+    @classmethod
+    @stats.instrument
+    def latest(cls, entity, publishkind=None, status='act'):
+        '''
+        Return the latest version Publish of a PublishGroup, or of a parent entity kind.
+
+            Args:
+                entity (PublishGroup|Sequence|Shot|Asset|Instance) : PublishGroup or parent.
+                publishkind (PublishKind) : Publish kind. defaults to the PublishGroup kind,
+                                            required for a parent entity.
+                status              (str) : Publish status. None for any status.
+
+            Returns:
+                Publish instance, None if no version matches.
+        '''
+        query = cls.query(status=status)
+
+        if isinstance(entity, PublishGroup):
+            kind_id = publishkind.id if publishkind else entity.publishkind_id
+            query = query.filter(cls.publishgroup_id == entity.id)
+        else:
+            kind_id = cls._parent_kind_id(entity, publishkind)
+            query = query.join(PublishGroup).filter(
+                PublishGroup.parent_column(entity) == entity.id,
+                PublishGroup.publishkind_id == kind_id)
+
+        query = query.filter(cls.publishkind_id == kind_id)
+        return query.order_by(cls.version.desc()).first()
 
     @classmethod
-    def create(cls, project, publishgroup, publishkind, user, version, root,
+    @stats.instrument
+    def latest_many(cls, entities, publishkind=None, status='act', chunk_size=BULK_CHUNK_SIZE):
+        '''
+        Return the latest version Publish of many PublishGroups, or parent entities kind.
+        Versions are resolved with one groupwise max query per chunk of PublishGroups.
+
+            Args:
+                entities             (list) : PublishGroup or parent entities.
+                publishkind   (PublishKind) : Publish kind. defaults to each PublishGroup
+                                              kind, required for parent entities.
+                status                (str) : Publish status. None for any status.
+                chunk_size            (int) : PublishGroups per query.
+
+            Returns:
+                dict of entity : Publish instance, None if no version matches.
+        '''
+        keys = cls._latest_keys(entities, publishkind)   # entity : (group id, kind id)
+        found = dict()
+
+        for chunk in _chunks(sorted(set(key for key in keys.values() if key)), chunk_size):
+            columns = [cls.publishgroup_id, cls.publishkind_id]
+            versions = (select(columns + [func.max(cls.version).label('version')])
+                        .where(cls.publishgroup_id.in_(set(key[0] for key in chunk)))
+                        .group_by(*columns))
+            if status:
+                versions = versions.where(cls.status == status)
+            versions = versions.alias('latest')
+
+            query = cls.query().join(versions, and_(
+                cls.publishgroup_id == versions.c.publishgroup_id,
+                cls.publishkind_id == versions.c.publishkind_id,
+                cls.version == versions.c.version))
+
+            for publish in query:
+                found[(publish.publishgroup_id, publish.publishkind_id)] = publish
+
+        return dict((entity, found.get(key)) for (entity, key) in keys.items())
+
+    @classmethod
+    def _latest_keys(cls, entities, publishkind=None):
+        '''
+        Return {entity: (publishgroup id, publishkind id)} for latest_many() entities,
+        None for parent entities without a PublishGroup of publishkind.
+        '''
+        keys = dict()
+        parents = defaultdict(list)   # PublishGroup parent column : entities
+
+        for entity in entities:
+            if isinstance(entity, PublishGroup):
+                kind_id = publishkind.id if publishkind else entity.publishkind_id
+                keys[entity] = (entity.id, kind_id)
+            else:
+                cls._parent_kind_id(entity, publishkind)
+                parents[PublishGroup.parent_column(entity)].append(entity)
+
+        for (column, group) in parents.items():
+            for chunk in _chunks(group, BULK_CHUNK_SIZE):
+                query = PublishGroup.query().filter(
+                    column.in_([entity.id for entity in chunk]),
+                    PublishGroup.publishkind_id == publishkind.id)
+                groups = dict((getattr(g, column.key), g.id) for g in query)
+
+                for entity in chunk:
+                    if entity.id in groups:
+                        keys[entity] = (groups[entity.id], publishkind.id)
+
+        # parents without a PublishGroup of publishkind
+        for entity in entities:
+            keys.setdefault(entity, None)
+
+        return keys
+
+    @classmethod
+    def _parent_kind_id(cls, entity, publishkind):
+        '''Validate a PublishGroup parent entity and its publishkind, return the kind id'''
+        PublishGroup.parent_column(entity)
+        if publishkind is None:
+            raise ValueError('publishkind arg is required for {!r}'.format(entity))
+
+        cls.assert_isinstance(publishkind, 'PublishKind')
+        return publishkind.id
+
+    @classmethod
+    def create(cls, project, publishgroup, publishkind, user, version=None, root=None,
                path=None, description=None, status=None):
         '''
         Create a Publish instance.
@@ -137,8 +261,9 @@ class Publish(Base):
                 publishgroup (PublishGroup) : PublishGroup parent.
                 publishkind   (PublishKind) : PublishKind link.
                 user                 (User) : Publish User instance.
-                version               (int) : Publish version number.
-                root                  (str) : Publish root in filesystem.
+                version               (int) : Publish version number. None allocates
+                                              publishgroup.next_version().
+                root                  (str) : Publish root in filesystem, optional.
                 path                  (str) : Publish path in filesystem.
                 status                (str) : Publish status.
 
@@ -149,10 +274,10 @@ class Publish(Base):
         cls.assert_isinstance(publishgroup, 'PublishGroup')
         cls.assert_isinstance(publishkind, 'PublishKind')
         cls.assert_isinstance(user, 'User')
-        assert isinstance(version, int), ('version arg must be int. Given {}'
-                                          .format(type(version)))
-        assert isinstance(root, string_types), ('root arg must be string. Given {}'
-                                                .format(type(root)))
+        assert version is None or isinstance(version, int), (
+            'version arg must be int. Given {}'.format(type(version)))
+        assert root is None or isinstance(root, string_types), (
+            'root arg must be string. Given {}'.format(type(root)))
 
         data = dict(project_id      = project.id,
                     publishgroup_id = publishgroup.id,
@@ -164,4 +289,9 @@ class Publish(Base):
                     description     = description,
                     status          = status)
 
-        return super(Publish, cls).create(**data)
+        if version is not None:
+            return super(Publish, cls).create(**data)
+
+        with db.session_context():
+            data['version'] = publishgroup.next_version()
+            return super(Publish, cls).create(**data)
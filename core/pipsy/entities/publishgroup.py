@@ -1,10 +1,15 @@
 '''PublishGroup entity class'''
 
 # imports
-from sqlalchemy import (Table, Column, Integer, Enum, Index, DateTime, Boolean,
-                        ForeignKey, UniqueConstraint)
+from sqlalchemy import (Table, Column, Integer, String, Enum, Index, DateTime, Boolean,
+                        ForeignKey, UniqueConstraint, select, case, func, and_, or_)
 from sqlalchemy.orm import relationship
+from sqlalchemy.orm.attributes import set_committed_value
+from .. import db
+from ..db.dialects import seconds_ago
+from ..config import config
 from .core import Base
+from .hierarchy import hierarchy_default
 from .project import Project
 from .sequence import Sequence
 from .shot import Shot
@@ -13,6 +18,17 @@ from .instance import Instance
 from .publishkind import PublishKind
 
 
+def _option(option, default=None):
+    '''Return an [entities] config option, or default if not set.'''
+    if config.has_option('entities', option):
+        return config.get('entities', option)
+    return default
+
+
+# configuration
+CHECKOUT_TIMEOUT = int(_option('checkout_timeout', 86400))
+
+
 class PublishGroup(Base):
 
     __table__ = Table('publishgroup', Base.metadata,
@@ -27,6 +43,10 @@ class PublishGroup(Base):
                       Column('shot_id', Integer, ForeignKey(Shot.id)),
                       Column('instance_id', Integer, ForeignKey(Instance.id)),
                       Column('asset_id', Integer, ForeignKey(Asset.id)),
+                      Column('last_version', Integer, default=0, server_default='0',
+                             nullable=False),
+                      Column('hierarchy', String(255), default=hierarchy_default('publishgroup'),
+                             info=dict(derived=True)),
 
                       Index('ix_project_kind', 'project_id', 'publishkind_id'),
                       Index('ix_project_seq_kind', 'project_id', 'sequence_id', 'publishkind_id'),
@@ -34,6 +54,7 @@ class PublishGroup(Base):
                       Index('ix_project_shot_kind', 'project_id', 'shot_id', 'publishkind_id'),
                       Index('ix_project_instance_kind', 'project_id', 'instance_id',
                             'publishkind_id'),
+                      Index('ix_hierarchy', 'hierarchy'),
 
                       UniqueConstraint('sequence_id', 'publishkind_id', name='uq_sequence_kind'),
                       UniqueConstraint('shot_id', 'publishkind_id', name='uq_shot_kind'),
@@ -44,6 +65,10 @@ class PublishGroup(Base):
     _publish = relationship('Publish', backref='publishgroup', lazy='dynamic',
                             order_by='PublishGroup.id', cascade="all, delete-orphan")
 
+    PARENTS = ('project', 'publishkind', 'instance.shot.sequence.episode',
+               'shot.sequence.episode', 'sequence.episode', 'asset')
+    FIND_SHAPES = (('id',),)
+
     def __repr__(self):
         return "{cls}(id={id})".format(cls=self.__class__.__name__, id=self.id)
 
@@ -62,10 +87,165 @@ class PublishGroup(Base):
         elif self.asset_id:
             return self.asset
 
+    def next_version(self):
+        '''
+        Allocate and return the next Publish version of the PublishGroup.
+
+        The last_version counter is incremented by a single UPDATE, which holds the
+        PublishGroup row lock until the transaction ends, so concurrent publishers get
+        consecutive versions without retrying. Call it within the transaction creating
+        the Publish e.g. Publish.create(version=None), so a failed publish rolls the
+        version back and versions stay gap-free.
+
+            Returns:
+                int version.
+        '''
+        from .publish import Publish
+
+        table = self.__table__
+        counter = table.c.last_version
+
+        # Catch up with versions created without the counter e.g. before it existed
+        published = (select([func.coalesce(func.max(Publish.version), 0)])
+                     .where(Publish.publishgroup_id == self.id)
+                     .as_scalar())
+        last = case([(counter >= published, counter)], else_=published)
+
+        with db.session_context() as session:
+            session.execute(table.update()
+                            .where(table.c.id == self.id)
+                            .values(last_version=last + 1))
+            version = session.execute(select([counter]).where(table.c.id == self.id)).scalar()
+
+        set_committed_value(self, 'last_version', version)
+        return version
+
+    def checkout(self, user, timeout=None):
+        '''
+        Checkout the PublishGroup to user, unless it is already checked out to another user.
+
+        The lock is taken by a single conditional UPDATE, so no row lock is held after
+        it returns and concurrent checkouts never wait on each other: one wins, the
+        others get False. A checkout older than timeout is stale and can be taken over.
+        Checking out again as the same user renews the checkout date.
+        Checkout dates are set and compared with the database server clock.
+
+            Args:
+                user     (User) : User checking out the PublishGroup.
+                timeout   (int) : seconds after which a checkout is stale.
+                                  defaults to CHECKOUT_TIMEOUT.
+
+            Returns:
+                True if user checked out the PublishGroup, False if it is locked.
+        '''
+        self.assert_isinstance(user, 'User')
+
+        table = self.__table__
+
+        with db.session_context() as session:
+            statement = table.update()
+            free = or_(table.c.lock.isnot(True),
+                       table.c.checkout_user_id == user.id,
+                       table.c.checkout_date < self._stale_date(session, statement, timeout))
+
+            result = session.execute(statement
+                                     .where(and_(table.c.id == self.id, free))
+                                     .values(lock=True, checkout_user_id=user.id,
+                                             checkout_date=func.now()))
+            checked_out = result.rowcount == 1
+
+        self._refresh_checkout()
+        return checked_out
+
+    def release(self, user=None):
+        '''
+        Release the PublishGroup checkout.
+
+            Args:
+                user (User) : release only if checked out to user.
+                              defaults to None, releasing any checkout.
+
+            Returns:
+                True if the PublishGroup was released, False if checked out to another user.
+        '''
+        table = self.__table__
+        where = table.c.id == self.id
+
+        if user is not None:
+            self.assert_isinstance(user, 'User')
+            where = and_(where, or_(table.c.lock.isnot(True),
+                                    table.c.checkout_user_id == user.id))
+
+        with db.session_context() as session:
+            result = session.execute(table.update()
+                                     .where(where)
+                                     .values(lock=False, checkout_user_id=None,
+                                             checkout_date=None))
+            released = result.rowcount == 1
+
+        self._refresh_checkout()
+        return released
+
+    def is_locked(self, timeout=None):
+        '''
+        Return True if the PublishGroup is checked out and the checkout is not stale.
+        Checkout columns are read from the database, not from the session state.
+
+            Args:
+                timeout (int) : seconds after which a checkout is stale.
+                                defaults to CHECKOUT_TIMEOUT.
+        '''
+        self._refresh_checkout()
+
+        if not self.lock:
+            return False
+        if self.checkout_date is None:
+            return True
+
+        table = self.__table__
+        with db.session_context() as session:
+            statement = select([table.c.id])
+            stale_date = self._stale_date(session, statement, timeout)
+            statement = statement.where(and_(table.c.id == self.id,
+                                             table.c.checkout_date >= stale_date))
+            return session.execute(statement).first() is not None
+
+    def _refresh_checkout(self):
+        '''Load the checkout columns from the database into the instance committed state'''
+        table = self.__table__
+        columns = (table.c.lock, table.c.checkout_user_id, table.c.checkout_date)
+
+        with db.session_context() as session:
+            row = session.execute(select(columns).where(table.c.id == self.id)).first()
+
+        for column in columns:
+            set_committed_value(self, column.key, row[column])
+
+    @staticmethod
+    def _stale_date(session, statement, timeout=None):
+        '''Return the server date expression before which a checkout is stale'''
+        dialect = session.get_bind(clause=statement).dialect.name
+        return seconds_ago(dialect, CHECKOUT_TIMEOUT if timeout is None else timeout)
+
+    @classmethod
+    def parent_column(cls, entity):
+        '''
+        Return the PublishGroup column linking to a parent entity.
+
+            Args:
+                entity (Sequence|Shot|Asset|Instance) : PublishGroup parent entity.
+
+            Returns:
+                Column e.g. PublishGroup.shot_id
+        '''
+        cls.assert_isinstance(entity, ('Sequence', 'Shot', 'Asset', 'Instance'))
+        return getattr(cls, '{}_id'.format(entity.__table__.name))
+
     @classmethod
-    def find(cls, project=None, entity=None, publishkind=None, lock=None, status=None, id=None):
+    def find_query(cls, project=None, entity=None, publishkind=None, lock=None, status=None,
+                   id=None):
         '''
-        Return PublishGroup instances by query arguments
+        Return a Query of PublishGroup instances by query arguments
 
             Args:
                 project          (Project) : parent Project instance.
@@ -76,20 +256,12 @@ class PublishGroup(Base):
                 id              (int/list) : PublishGroup id(s).
 
             Returns:
-                A list of PublishGroup instances matching find arguments.
+                A Query of PublishGroup instances matching find arguments.
         '''
         query = cls.query(project=project, id=id, status=status)
 
         if entity:
-            cls.assert_isinstance(entity, ('Sequence', 'Shot', 'Asset', 'Instance'))
-            if entity.cls_name() == 'Sequence':
-                field = cls.sequence_id
-            elif entity.cls_name() == 'Shot':
-                field = cls.shot_id
-            elif entity.cls_name() == 'Asset':
-                field = cls.asset_id
-            elif entity.cls_name() == 'Instance':
-                field = cls.instance_id
+            field = cls.parent_column(entity)
 
             if isinstance(entity, (list, tuple)):
                 query = query.filter(field.in_([e.id for e in entity]))
@@ -103,7 +275,7 @@ class PublishGroup(Base):
         if lock:
             query = query.filter(cls.lock == lock)
 
-        return query.all()
+        return query
 
     @classmethod
     def create(cls, project, entity, publishkind, lock=None, status=None):
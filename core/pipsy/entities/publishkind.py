@@ -1,9 +1,21 @@
 '''PublishKind entity class'''
 
 # imports
-from sqlalchemy import (Table, Column, Integer, String, Enum, Index, UniqueConstraint)
-from sqlalchemy.orm import relationship
+import hashlib
+import threading
+from timeit import default_timer
+from sqlalchemy import (Table, Column, Integer, String, Enum, Index, UniqueConstraint, event,
+                        select)
+from sqlalchemy.orm import Session, relationship
+from sqlalchemy.orm.exc import NoResultFound, MultipleResultsFound
 from .core import Base
+from . import cache
+
+# Seconds between registry version stamp checks
+REGISTRY_CHECK_INTERVAL = 30
+
+# find() arguments the registry can answer
+REGISTRY_FIELDS = frozenset(['name', 'nicename', 'kind', 'subkind', 'lod', 'status'])
 
 
 def calc_subkind(context):
@@ -47,11 +59,47 @@ class PublishKind(Base):
     _publish = relationship('Publish', backref='publishkind', lazy='dynamic',
                             order_by='PublishGroup.id', cascade="all, delete-orphan")
 
+    FIND_SHAPES = (('id',),)
+    CACHED = True
+
+    @classmethod
+    def find(cls, load=None, with_parents=False, columns=None, **kwargs):
+        '''
+        Return PublishKind instances by query arguments.
+        Lookups by name, nicename, kind, subkind, lod and status are answered by
+        the in-memory REGISTRY, see find_query() for arguments.
+        '''
+        if load or with_parents or columns or set(kwargs) - REGISTRY_FIELDS:
+            return super(PublishKind, cls).find(load=load, with_parents=with_parents,
+                                                columns=columns, **kwargs)
+        return REGISTRY.find(**kwargs)
+
     @classmethod
-    def find(cls, name=None, nicename=None, kind=None, subkind=None, lod=None,
-             status=None, id=None):
+    def find_one(cls, load=None, with_parents=False, **kwargs):
+        '''
+        Wrapper of find() that return a single result.
+        Will error if None or more then one results found.
         '''
-        Return PublishKind instances by query arguments
+        if load or with_parents or set(kwargs) - REGISTRY_FIELDS:
+            return super(PublishKind, cls).find_one(load=load, with_parents=with_parents,
+                                                    **kwargs)
+
+        result = REGISTRY.find(**kwargs)
+
+        if not result:
+            raise NoResultFound(
+                "No {} found for query:{}".format(cls.__name__, kwargs))
+        elif len(result) > 1:
+            raise MultipleResultsFound(
+                "More than one {} found for query:{}".format(cls.__name__, kwargs))
+        else:
+            return result[0]
+
+    @classmethod
+    def find_query(cls, name=None, nicename=None, kind=None, subkind=None, lod=None,
+                   status=None, id=None):
+        '''
+        Return a Query of PublishKind instances by query arguments
 
             Args:
                 name     (str) : PublishKind name.
@@ -63,7 +111,7 @@ class PublishKind(Base):
                 id  (int/list) : PublishKind id(s).
 
             Returns:
-                A list of PublishKind instances matching find arguments.
+                A Query of PublishKind instances matching find arguments.
         '''
         query = cls.query(name=name, id=id, status=status)
 
@@ -79,7 +127,7 @@ class PublishKind(Base):
         if lod:
             query = query.filter(cls.lod == lod)
 
-        return query.all()
+        return query
 
     @classmethod
     def create(cls, name, nicename, kind, subkind=None, lod=None, description=None, status=None):
@@ -108,3 +156,127 @@ class PublishKind(Base):
                     status=status)
 
         return super(PublishKind, cls).create(**data)
+
+
+class PublishKindRegistry(object):
+    '''
+    In-memory copy of the whole PublishKind table indexed by name, nicename and
+    (kind, subkind, lod). The table is reloaded when its version stamp, a checksum of
+    all rows checked at most every check_interval seconds, changes. PublishKind writes
+    of this process expire the registry, so they are seen on next lookup.
+    '''
+
+    def __init__(self, check_interval=REGISTRY_CHECK_INTERVAL):
+        '''
+            Args:
+                check_interval (int) : seconds between version stamp checks.
+        '''
+        self.check_interval = check_interval
+
+        self.__lock = threading.RLock()
+        self.__stamp = None
+        self.__checked = None
+        self.__rows = []
+        self.__by_name = dict()
+        self.__by_nicename = dict()
+        self.__by_kind = dict()   # (kind, subkind, lod) : row
+
+    def __repr__(self):
+        return '{cls}(rows={rows}, stamp={stamp})'.format(cls=self.__class__.__name__,
+                                                          rows=len(self.__rows),
+                                                          stamp=self.__stamp)
+
+    def find(self, name=None, nicename=None, kind=None, subkind=None, lod=None, status=None):
+        '''
+        Return PublishKind instances matching arguments, same as PublishKind.find_query().
+
+            Returns:
+                A list of PublishKind instances.
+        '''
+        self.check()
+
+        if name:
+            rows = [self.__by_name[name]] if name in self.__by_name else []
+        elif nicename:
+            rows = [self.__by_nicename[nicename]] if nicename in self.__by_nicename else []
+        elif kind and subkind and lod:
+            key = (kind, subkind, lod)
+            rows = [self.__by_kind[key]] if key in self.__by_kind else []
+        else:
+            rows = self.__rows
+
+        filters = dict(nicename=nicename, kind=kind, subkind=subkind, lod=lod)
+        filters = dict((field, value) for (field, value) in filters.items() if value)
+        statuses = status if isinstance(status, (list, tuple)) else [status]
+
+        rows = [row for row in rows
+                if all(getattr(row, field) == value for (field, value) in filters.items())
+                and (not status or row.status in statuses)]
+
+        session = PublishKind.query().session
+        return [cache.attach(session, row) for row in rows]
+
+    def check(self):
+        '''Reload the table if the version stamp changed, at most every check_interval'''
+        now = default_timer()
+        if self.__checked is not None and now - self.__checked < self.check_interval:
+            return
+
+        with self.__lock:
+            stamp = self.stamp()
+            if stamp != self.__stamp:
+                self.load()
+            self.__checked = now
+
+    def refresh(self):
+        '''Reload the table'''
+        with self.__lock:
+            self.load()
+            self.__checked = default_timer()
+
+    def expire(self):
+        '''Check the version stamp on next lookup'''
+        self.__checked = None
+
+    def load(self):
+        '''Load all PublishKind rows and rebuild indexes'''
+        with self.__lock:
+            stamp = self.stamp()
+            rows = [cache.detached_copy(r) for r in PublishKind.query().order_by(PublishKind.id)]
+
+            self.__rows = rows
+            self.__by_name = dict((row.name, row) for row in rows)
+            self.__by_nicename = dict((row.nicename, row) for row in rows)
+            self.__by_kind = dict(((row.kind, row.subkind, row.lod), row) for row in rows)
+            self.__stamp = stamp
+
+    @staticmethod
+    def stamp():
+        '''Return table version stamp, a checksum of all rows column values'''
+        table = PublishKind.__table__
+        statement = select([table]).order_by(table.c.id)
+
+        checksum = hashlib.sha1()
+        for row in PublishKind.query().session.execute(statement):
+            checksum.update(repr(tuple(row)).encode('utf-8'))
+        return checksum.hexdigest()
+
+
+REGISTRY = PublishKindRegistry()
+
+
+@event.listens_for(Session, 'after_flush')
+def _after_flush(session, flush_context):
+    '''Expire the registry when session writes PublishKind rows'''
+    if any(isinstance(obj, PublishKind)
+           for obj in session.new | session.dirty | session.deleted):
+        session.info['publishkind_expire'] = True
+        REGISTRY.expire()
+
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_soft_rollback')
+def _after_transaction(session, *args):
+    '''Expire the registry again once PublishKind writes are committed, or rolled back'''
+    if session.info.pop('publishkind_expire', None):
+        REGISTRY.expire()
@@ -1,14 +1,51 @@
-'''Publish entity class'''
+#!/usr/bin/env python
+'''
+PublishMetadata entity class
+
+Metadata keys registered in PublishMetadata.INDEXED_KEYS are indexed, and
+find(key_value=, has_key=) on them is an index lookup instead of a publishmetadata table
+scan. MySQL indexes a VIRTUAL generated meta_<key> column, SQLite an expression index on
+json_extract(). Keys are read from the [entities] metadata_keys config option, or
+registered with PublishMetadata.register_key(). Indexes are created with the table,
+create the indexes of newly registered keys over existing rows with:
+
+    python -m pipsy.entities.publishmetadata
+'''
 
 # imports
+import re
 from sqlalchemy import (Table, Column, Index, Integer, JSON,
-                        ForeignKey, UniqueConstraint)
+                        ForeignKey, UniqueConstraint, event, inspect, literal_column)
 from sqlalchemy.orm.exc import NoResultFound
 from sqlalchemy.sql.expression import cast
 from sqlalchemy import func
+from .. import db
+from ..config import config
+from ..core import logging
+from ..core.pythonx import string_types
 from .core import Base
 from .publish import Publish
 
+LOG = logging.getLogger(__name__, level=logging.INFO)
+
+
+def _option(option, default=None):
+    '''Return an [entities] config option, or default if not set.'''
+    if config.has_option('entities', option):
+        return config.get('entities', option)
+    return default
+
+
+# configuration
+METADATA_KEYS = tuple(key.strip() for key in _option('metadata_keys',
+                                                      'frame_range, renderer, source_file')
+                      .split(',') if key.strip())
+
+# Length of indexed MySQL values, longer values are indexed by their prefix
+INDEXED_LENGTH = 255
+
+__COLUMNS = dict()   # engine : publishmetadata column names, see _columns()
+
 
 class PublishMetadata(Base):
 
@@ -22,6 +59,9 @@ class PublishMetadata(Base):
                       UniqueConstraint('publish_id', name="uq_publish"),
                       )
 
+    PARENTS = ('publish',)
+    INDEXED_KEYS = set()   # see register_key()
+
     def __repr__(self):
         return "{cls}(publish_id={id})".format(cls=self.__class__.__name__, id=self.publish_id)
 
@@ -46,9 +86,22 @@ class PublishMetadata(Base):
             PublishMetadata.create(publish=publish, metadata=data)
 
     @classmethod
-    def find(cls, publish=None, key_value=None, has_key=None):
+    def register_key(cls, key):
         '''
-        Return PublishMetadata instances by query arguments
+        Register a metadata key to index.
+        Run index_keys() to create the index of a key registered after the table.
+
+            Args:
+                key (str) : metadata key e.g. 'frame_range'.
+        '''
+        if not isinstance(key, string_types) or not re.match(r'^\w+$', key):
+            raise ValueError('Invalid metadata key {!r}. Expected a word'.format(key))
+        cls.INDEXED_KEYS.add(key)
+
+    @classmethod
+    def find_query(cls, publish=None, key_value=None, has_key=None):
+        '''
+        Return a Query of PublishMetadata instances by query arguments
 
             Args:
                 publish  (Publish) : PublishMetadata parent Publish instance.
@@ -56,24 +109,36 @@ class PublishMetadata(Base):
                 has_key      (str) : PublishMetadata has 'key'.
 
             Returns:
-                A list of PublishMetadata instances matching find arguments.
+                A Query of PublishMetadata instances matching find arguments.
         '''
         query = cls.query()
+        bind = query.session.get_bind(clause=cls.__table__.insert())
+        dialect = bind.dialect.name
 
         if publish:
             cls.assert_isinstance(publish, 'Publish')
             query = query.filter(cls.publish_id == publish.id)
 
         if key_value:
-            assert isinstance(key_value, tuple), ('key_value are must be a tuple. Given {}'
-                                                 .format(type(key_value)))
-            query = query.filter(PublishMetadata.metadata[key_value[0]] == cast(key_value[1], JSON))
+            assert isinstance(key_value, tuple), (
+                'key_value are must be a tuple. Given {}'.format(type(key_value)))
+            (key, value) = key_value
+            indexed = _indexed_value(dialect, value) if _use_index(bind, key) else None
+
+            if indexed is not None:
+                query = query.filter(_indexed(dialect, key) == indexed)
+            if indexed is None or dialect == 'mysql':
+                # MySQL indexes the value text, the JSON value tells apart e.g. 1 and '1'
+                query = query.filter(PublishMetadata.metadata[key] == cast(value, JSON))
 
         if has_key:
-            query = query.filter(func.json_extract(PublishMetadata.metadata,
-                                                   '$."{}"'.format(has_key)) != None)
+            if _use_index(bind, has_key):
+                query = query.filter(_indexed(dialect, has_key).isnot(None))
+            else:
+                query = query.filter(func.json_extract(PublishMetadata.metadata,
+                                                       '$."{}"'.format(has_key)).isnot(None))
 
-        return query.all()
+        return query
 
     @classmethod
     def create(cls, publish, metadata=None):
@@ -96,3 +161,127 @@ class PublishMetadata(Base):
                     metadata   = metadata)
 
         return super(PublishMetadata, cls).create(**data)
+
+
+for key in METADATA_KEYS:
+    PublishMetadata.register_key(key)
+
+
+def _use_index(bind, key):
+    '''
+    Return True if find() can query the index of a metadata key.
+    A MySQL generated column only exists once index_keys() created it, e.g. not for a
+    key registered after the table, until then the key is queried on the JSON value.
+    '''
+    if key not in PublishMetadata.INDEXED_KEYS:
+        return False
+    if bind.dialect.name != 'mysql':
+        return True   # SQLite expression works without its index
+    return 'meta_{}'.format(key) in _columns(bind)
+
+
+def _columns(bind):
+    '''Return the publishmetadata column names of an engine, reflected once per engine'''
+    engine = bind.engine
+    if engine not in __COLUMNS:
+        columns = inspect(engine).get_columns('publishmetadata')
+        __COLUMNS[engine] = frozenset(column['name'] for column in columns)
+    return __COLUMNS[engine]
+
+
+def _indexed(dialect, key):
+    '''Return the indexed expression of a metadata key'''
+    if dialect == 'mysql':
+        return literal_column('publishmetadata.meta_{}'.format(key))
+
+    # Same expression as the index, with an inline path literal for the planner to match it
+    return func.json_extract(PublishMetadata.__table__.c.metadata,
+                             literal_column("'$.\"{}\"'".format(key)))
+
+
+def _indexed_value(dialect, value):
+    '''
+    Return value as stored in a metadata key index, None if value type is not indexed.
+    MySQL indexes the value text prefix, SQLite the string or integer value itself.
+    '''
+    if isinstance(value, bool) or not isinstance(value, string_types + (int,)):
+        return None
+
+    if dialect == 'mysql':
+        return u'{}'.format(value)[:INDEXED_LENGTH]
+    return value
+
+
+def _index_ddl(dialect, key):
+    '''Return (column DDL, index DDL) statements indexing a metadata key'''
+    path = '$."{}"'.format(key)
+
+    if dialect == 'mysql':
+        return ("ALTER TABLE publishmetadata ADD COLUMN meta_{key} VARCHAR({length}) "
+                "GENERATED ALWAYS AS (LEFT(JSON_UNQUOTE(JSON_EXTRACT(metadata, '{path}')), "
+                "{length})) VIRTUAL".format(key=key, path=path, length=INDEXED_LENGTH),
+                'CREATE INDEX ix_meta_{key} ON publishmetadata (meta_{key})'.format(key=key))
+
+    elif dialect == 'sqlite':
+        return (None, "CREATE INDEX ix_meta_{key} ON publishmetadata "
+                      "(json_extract(metadata, '{path}'))".format(key=key, path=path))
+
+    raise NotImplementedError('metadata key index is not implemented for {!r}'.format(dialect))
+
+
+def index_keys(connection=None):
+    '''
+    Create the missing indexes of PublishMetadata.INDEXED_KEYS, over existing rows.
+
+        Args:
+            connection (Connection) : connection to run DDL on. defaults to a new
+                                      db.session_context() connection.
+
+        Returns:
+            list of newly indexed keys.
+    '''
+    if connection is None:
+        with db.session_context() as session:
+            return index_keys(session.connection(clause=PublishMetadata.__table__.insert()))
+
+    dialect = connection.dialect.name
+    inspector = inspect(connection)
+    columns = set(column['name'] for column in inspector.get_columns('publishmetadata'))
+
+    if dialect == 'sqlite':
+        # SQLAlchemy does not reflect SQLite expression indexes
+        indexes = set(row[0] for row in connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' "
+            "AND tbl_name = 'publishmetadata'"))
+    else:
+        indexes = set(index['name'] for index in inspector.get_indexes('publishmetadata'))
+
+    created = []
+    for key in sorted(PublishMetadata.INDEXED_KEYS):
+        if 'ix_meta_{}'.format(key) in indexes:
+            continue
+
+        (column_ddl, index_ddl) = _index_ddl(dialect, key)
+        if column_ddl and 'meta_{}'.format(key) not in columns:
+            connection.execute(column_ddl)
+        connection.execute(index_ddl)
+        created.append(key)
+
+    # Reflect the new generated columns on next find()
+    __COLUMNS.pop(connection.engine, None)
+    return created
+
+
+@event.listens_for(PublishMetadata.__table__, 'after_create')
+def _after_create(table, connection, **kw):
+    '''Index the registered metadata keys of a new publishmetadata table'''
+    index_keys(connection)
+
+
+def main():
+    for key in index_keys():
+        LOG.info('publishmetadata {!r} key indexed'.format(key))
+
+
+if __name__ == '__main__':
+    main()
@@ -2,10 +2,10 @@
 
 # imports
 from sqlalchemy import (Table, Column, Integer, String, Enum, Index, SmallInteger,
-                        ForeignKey, UniqueConstraint)
-from sqlalchemy.ext.hybrid import hybrid_property
+                        ForeignKey, UniqueConstraint, event)
 from sqlalchemy.orm import relationship
-from .core import Base, ResultSet
+from .core import Base, TreeQuery, ResultSet, BULK_CHUNK_SIZE
+from .hierarchy import hierarchy_default, fullname_default
 from .project import Project
 from .episode import Episode
 
@@ -13,7 +13,8 @@ from .episode import Episode
 def calc_episode(context):
     '''
     Update episode_id_virtual with the episode_id as a none primary_key. A workaround
-    for UniqueConstraint issue with NULL fields.
+    for UniqueConstraint issue with NULL fields. Kept in sync on UPDATE by
+    _update_episode_virtual().
     '''
     # Generated column for episode_id_virtual to support unique constraint with NULL episodes
     # Column('episode_id_virtual', Integer, FetchedValue(), nullable=False),
@@ -32,15 +33,21 @@ class Sequence(Base):
                       Column('status', Enum('act', 'dis'), default='act', nullable=False),
                       Column('project_id', Integer, ForeignKey(Project.id), nullable=False),
                       Column('episode_id', Integer, ForeignKey(Episode.id)),
-                      Column('episode_id_virtual', Integer,
-                             default=calc_episode, onupdate=calc_episode),
+                      Column('episode_id_virtual', Integer, default=calc_episode,
+                             info=dict(derived=True)),
                       Column('shotgun_id', Integer),
                       Column('cut_order', SmallInteger),
                       Column('description', String(255)),
+                      Column('hierarchy', String(255), default=hierarchy_default('sequence'),
+                             info=dict(derived=True)),
+                      Column('fullname', String(255), default=fullname_default('sequence'),
+                             info=dict(derived=True)),
 
                       Index('ix_proj_name', 'project_id', 'name', 'status'),
                       Index('ix_episode_name', 'episode_id', 'name', 'status'),
                       Index('ix_sg', 'shotgun_id'),
+                      Index('ix_hierarchy', 'hierarchy'),
+                      Index('ix_fullname', 'fullname'),
 
                       UniqueConstraint('project_id', 'episode_id_virtual', 'name',
                                        name='uq_proj_ep_name'),
@@ -50,13 +57,21 @@ class Sequence(Base):
                       )
 
     _shots = relationship('Shot', backref='sequence', lazy='dynamic',
-                          order_by='Shot.name', cascade="all, delete-orphan")
+                          order_by='Shot.name', cascade="all, delete-orphan",
+                          query_class=TreeQuery)
     _instances = relationship('Instance', backref='sequence', lazy='dynamic',
-                              order_by='Instance.name', cascade="all, delete-orphan")
+                              order_by='Instance.name', cascade="all, delete-orphan",
+                              query_class=TreeQuery)
     _publishgroups = relationship('PublishGroup', backref='sequence', lazy='dynamic',
                                   order_by='PublishGroup.id', cascade="all, delete-orphan")
     _tasks = relationship('Task', backref='sequence', lazy='dynamic',
-                          order_by='Task.name', cascade="all, delete-orphan")
+                          order_by='Task.name', cascade="all, delete-orphan",
+                          query_class=TreeQuery)
+
+    PARENTS = ('project', 'episode')
+    FIND_SHAPES = (('id',), ('shotgun_id',), ('name', 'project'), ('fullname',),
+                   ('fullname', 'project'))
+    CACHED = True
 
     @property
     def parent(self):
@@ -68,16 +83,6 @@ class Sequence(Base):
         else:
             return self.project
 
-    @hybrid_property
-    def fullname(self):
-        '''
-        Return Sequence fullname string.
-        {episode.name}_{sequence.name} or {sequence.name}
-        '''
-        if self.episode_id:
-            return '{}_{}'.format(self.episode.name, self.name)
-        return '{}'.format(self.name)
-
     @property
     def instances(self):
         '''Return all Shot Instances active and disabled'''
@@ -90,27 +95,32 @@ class Sequence(Base):
         return ResultSet(instances)
 
     @classmethod
-    def find(cls, project=None, episode=False, name=None, status=None, id=None, shotgun_id=None):
+    def find_query(cls, project=None, episode=False, name=None, status=None, id=None,
+                   shotgun_id=None, fullname=None):
         '''
-        Return Sequence instances by query arguments
+        Return a Query of Sequence instances by query arguments
 
             Args:
                 project     (Project) : parent Project instance.
                 episode     (Episode) : parent Episode instance (optional).
                 name            (str) : Episode name.
+                fullname        (str) : Sequence fullname e.g. '101_010'.
                 status          (str) : Episode status.
                 id         (int/list) : Episode id(s).
                 shotgun_id (int/list) : Epsiode shotgun id(s).
 
             Returns:
-                A list of Sequence instances matching find arguments.
+                A Query of Sequence instances matching find arguments.
         '''
         query = cls.query(project=project, name=name, id=id, status=status, shotgun_id=shotgun_id)
 
         if episode:
             query = query.filter(cls.episode_id == episode.id)
 
-        return query.all()
+        if fullname:
+            query = query.filter(cls.fullname == fullname)
+
+        return query
 
     @classmethod
     def create(cls, name, project, episode=None, status=None, shotgun_id=None):
@@ -128,16 +138,45 @@ class Sequence(Base):
                 New Sequence Instance.
 
         '''
+        data = cls._create_data(name=name, project=project, episode=episode, status=status,
+                                shotgun_id=shotgun_id)
+
+        return super(Sequence, cls).create(**data)
+
+    @classmethod
+    def bulk_create(cls, rows, chunk_size=BULK_CHUNK_SIZE, hydrate=False):
+        '''
+        Create many Sequence instances in one transaction.
+
+            Args:
+                rows       (list) : list of dicts with create() arguments.
+                chunk_size  (int) : rows per INSERT statement.
+                hydrate    (bool) : return Sequence instances instead of ids.
+
+            Returns:
+                A list of new Sequence ids (or instances) in rows order.
+        '''
+        rows = [cls._create_data(**row) for row in rows]
+        return super(Sequence, cls).bulk_create(rows, key=('project_id', 'episode_id', 'name'),
+                                                chunk_size=chunk_size, hydrate=hydrate)
+
+    @classmethod
+    def _create_data(cls, name, project, episode=None, status=None, shotgun_id=None):
+        '''Validate create() arguments and return Sequence columns dict'''
         cls.assert_isinstance(project, 'Project')
 
         if episode:
             cls.assert_isinstance(episode, 'Episode')
 
-        data = dict(name=name,
+        return dict(name=name,
                     basename=name,
                     status=status,
                     project_id=project.id,
                     episode_id=getattr(episode, 'id', None),
                     shotgun_id=shotgun_id)
 
-        return super(Sequence, cls).create(**data)
+
+@event.listens_for(Sequence, 'before_update')
+def _update_episode_virtual(mapper, connection, target):
+    '''Update episode_id_virtual along with the episode_id, see calc_episode()'''
+    target.episode_id_virtual = target.episode_id or 0
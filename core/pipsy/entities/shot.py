@@ -5,7 +5,8 @@ from sqlalchemy import (Table, Column, Integer, String, Enum, Index, SmallIntege
                         ForeignKey, UniqueConstraint)
 from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
-from .core import Base, ResultSet
+from .core import Base, TreeQuery, ResultSet, BULK_CHUNK_SIZE
+from .hierarchy import hierarchy_default, fullname_default
 from .project import Project
 from .sequence import Sequence
 
@@ -26,10 +27,16 @@ class Shot(Base):
                       Column('handles_in', SmallInteger),
                       Column('handles_out', SmallInteger),
                       Column('description', String(255)),
+                      Column('hierarchy', String(255), default=hierarchy_default('shot'),
+                             info=dict(derived=True)),
+                      Column('fullname', String(255), default=fullname_default('shot'),
+                             info=dict(derived=True)),
 
                       Index('ix_proj_seq_name', 'status', 'project_id', 'sequence_id', 'name'),
                       Index('ix_seq_name', 'sequence_id', 'name'),
                       Index('ix_sg', 'shotgun_id'),
+                      Index('ix_hierarchy', 'hierarchy'),
+                      Index('ix_fullname', 'fullname'),
 
                       UniqueConstraint('sequence_id', 'name', name='uq_seq_name'),
                       UniqueConstraint('sequence_id', 'basename', name='uq_seq_basename'),
@@ -37,11 +44,18 @@ class Shot(Base):
                       )
 
     _instances = relationship('Instance', backref='shot', lazy='dynamic',
-                              order_by='Instance.name', cascade="all, delete-orphan")
+                              order_by='Instance.name', cascade="all, delete-orphan",
+                              query_class=TreeQuery)
     _publishgroups = relationship('PublishGroup', backref='shot', lazy='dynamic',
                                   order_by='PublishGroup.id', cascade="all, delete-orphan")
     _tasks = relationship('Task', backref='shot', lazy='dynamic',
-                          order_by='Task.name', cascade="all, delete-orphan")
+                          order_by='Task.name', cascade="all, delete-orphan",
+                          query_class=TreeQuery)
+
+    PARENTS = ('project', 'sequence.episode')
+    FIND_SHAPES = (('id',), ('shotgun_id',), ('name', 'project'), ('name', 'sequence'),
+                   ('fullname',), ('fullname', 'project'))
+    CACHED = True
 
     @property
     def parent(self):
@@ -50,14 +64,6 @@ class Shot(Base):
         '''
         return self.sequence
 
-    @hybrid_property
-    def fullname(self):
-        '''
-        Return Shot fullname string.
-        {episode.name}_{sequence.name}_{shot.name} or {sequence.name}_{shot.name}
-        '''
-        return '{}_{}'.format(self.sequence.fullname, self.name)
-
     @hybrid_property
     def cut(self):
         return (self.cut_in, self.cut_out)
@@ -80,22 +86,23 @@ class Shot(Base):
         return ResultSet(instances)
 
     @classmethod
-    def find(cls, project=None, sequence=None, name=None, basename=None, status=None,
-             id=None, shotgun_id=None):
+    def find_query(cls, project=None, sequence=None, name=None, basename=None, status=None,
+                   id=None, shotgun_id=None, fullname=None):
         '''
-        Return Shot instances by query arguments
+        Return a Query of Shot instances by query arguments
 
             Args:
                 project     (Project) : parent Project instance.
                 sequence   (Sequence) : parent Sequence instance (optional).
                 name            (str) : Shot name.
                 basename        (str) : Shot basename.
+                fullname        (str) : Shot fullname e.g. '101_010_0040'.
                 status          (str) : Shot status.
                 id         (int/list) : Shot id(s).
                 shotgun_id (int/list) : Shot shotgun id(s).
 
             Returns:
-                A list of Shot instances matching find arguments.
+                A Query of Shot instances matching find arguments.
         '''
         query = cls.query(project=project, name=name, id=id, status=status, shotgun_id=shotgun_id)
 
@@ -105,7 +112,10 @@ class Shot(Base):
         if basename:
             query = query.filter(cls.basename == basename)
 
-        return query.all()
+        if fullname:
+            query = query.filter(cls.fullname == fullname)
+
+        return query
 
     @classmethod
     def create(cls, name, project, sequence, cut=None, status=None, shotgun_id=None):
@@ -124,15 +134,41 @@ class Shot(Base):
                 New Shot Instance.
 
         '''
+        data = cls._create_data(name=name, project=project, sequence=sequence, cut=cut,
+                                status=status, shotgun_id=shotgun_id)
+
+        return super(Shot, cls).create(**data)
+
+    @classmethod
+    def bulk_create(cls, rows, chunk_size=BULK_CHUNK_SIZE, hydrate=False):
+        '''
+        Create many Shot instances in one transaction.
+
+            Args:
+                rows       (list) : list of dicts with create() arguments.
+                chunk_size  (int) : rows per INSERT statement.
+                hydrate    (bool) : return Shot instances instead of ids.
+
+            Returns:
+                A list of new Shot ids (or instances) in rows order.
+        '''
+        rows = [cls._create_data(**row) for row in rows]
+        return super(Shot, cls).bulk_create(rows, key=('sequence_id', 'name'),
+                                            chunk_size=chunk_size, hydrate=hydrate)
+
+    @classmethod
+    def _create_data(cls, name, project, sequence, cut=None, status=None, shotgun_id=None):
+        '''Validate create() arguments and return Shot columns dict'''
         cls.assert_isinstance(project, 'Project')
         cls.assert_isinstance(sequence, 'Sequence')
 
-        data = dict(name=name,
+        (cut_in, cut_out) = cut or (None, None)
+
+        return dict(name=name,
                     basename=name,
                     status=status,
                     project_id=project.id,
                     sequence_id=sequence.id,
-                    cut = cut or (None, None),
+                    cut_in=cut_in,
+                    cut_out=cut_out,
                     shotgun_id=shotgun_id)
-
-        return super(Shot, cls).create(**data)
@@ -4,7 +4,8 @@
 from sqlalchemy import (Table, Column, Integer, String, Enum, Index, ForeignKey,
                         UniqueConstraint, DateTime)
 from sqlalchemy.orm import relationship
-from .core import Base, ResultSet
+from .core import Base, LinkSet, LinkTable, BULK_CHUNK_SIZE
+from .hierarchy import hierarchy_default
 from .project import Project
 from .sequence import Sequence
 from .shot import Shot
@@ -28,11 +29,14 @@ class Task(Base):
                       Column('description', String(255)),
                       Column('start_date', DateTime, default=None),
                       Column('end_date', DateTime, default=None),
+                      Column('hierarchy', String(255), default=hierarchy_default('task'),
+                             info=dict(derived=True)),
 
                       Index('ix_proj_seq_stat', 'project_id', 'sequence_id', 'status'),
                       Index('ix_proj_shot_stat', 'project_id', 'shot_id', 'status'),
                       Index('ix_proj_asset_stat', 'project_id', 'asset_id', 'status'),
                       Index('ix_sg', 'shotgun_id'),
+                      Index('ix_hierarchy', 'hierarchy'),
 
                       UniqueConstraint('shot_id', 'name', name='uq_shot_name'),
                       UniqueConstraint('sequence_id', 'name', name='uq_seq_name'),
@@ -43,6 +47,9 @@ class Task(Base):
     _usertasks = relationship('UserTask', backref='task', lazy='dynamic',
                               cascade="all, delete-orphan")
 
+    PARENTS = ('project', 'shot.sequence.episode', 'sequence.episode', 'asset')
+    FIND_SHAPES = (('id',), ('shotgun_id',), ('name', 'project'))
+
     @property
     def parent(self):
         '''
@@ -61,7 +68,7 @@ class Task(Base):
         '''Returns Users instances assigned to Task'''
         query = User.query()
         query = query.join(UserTask).filter(UserTask.task_id == self.id)
-        return ResultSet(query.all())
+        return LinkSet(query.all(), owner=self)
 
     @users.setter
     def users(self, users):
@@ -74,14 +81,21 @@ class Task(Base):
                 self.users -= user
                 self.users += [user]
                 self.users -= [user]
+
+            Operators only write the Users added or removed. Users of another Task
+            are assigned as a whole.
         '''
-        UserTask.assign_users_to_task(task=self, users=users)
+        if isinstance(users, LinkSet) and users.owner is self:
+            UserTask.remove_users(task=self, users=users.removed())
+            UserTask.add_users(task=self, users=users.added())
+        else:
+            UserTask.assign_users_to_task(task=self, users=users)
 
     @classmethod
-    def find(cls, project=None, entity=None, name=None, stage=None, status=None,
-             user=None, start_date=None, end_date=None, id=None, shotgun_id=None):
+    def find_query(cls, project=None, entity=None, name=None, stage=None, status=None,
+                   user=None, start_date=None, end_date=None, id=None, shotgun_id=None):
         '''
-        Return Task instances by query arguments
+        Return a Query of Task instances by query arguments
 
             Args:
                 project     (Project) : parent Project instance.
@@ -96,7 +110,7 @@ class Task(Base):
                 shotgun_id (int/list) : Task shotgun id(s).
 
             Returns:
-                A list of Task instances matching find arguments.
+                A Query of Task instances matching find arguments.
         '''
         query = cls.query(project=project, name=name, id=id, status=status, shotgun_id=shotgun_id)
 
@@ -126,7 +140,7 @@ class Task(Base):
         if end_date:
             query = query.filter(cls.end_date == end_date)
 
-        return query.all()
+        return query
 
     @classmethod
     def create(cls, name, project, entity, stage, start_date=None, end_date=None,
@@ -147,6 +161,34 @@ class Task(Base):
                 New Task Instance.
 
         '''
+        data = cls._create_data(name=name, project=project, entity=entity, stage=stage,
+                                start_date=start_date, end_date=end_date, status=status,
+                                shotgun_id=shotgun_id)
+
+        return super(Task, cls).create(**data)
+
+    @classmethod
+    def bulk_create(cls, rows, chunk_size=BULK_CHUNK_SIZE, hydrate=False):
+        '''
+        Create many Task instances in one transaction.
+
+            Args:
+                rows       (list) : list of dicts with create() arguments.
+                chunk_size  (int) : rows per INSERT statement.
+                hydrate    (bool) : return Task instances instead of ids.
+
+            Returns:
+                A list of new Task ids (or instances) in rows order.
+        '''
+        rows = [cls._create_data(**row) for row in rows]
+        key = ('project_id', 'sequence_id', 'shot_id', 'asset_id', 'name')
+        return super(Task, cls).bulk_create(rows, key=key, chunk_size=chunk_size,
+                                            hydrate=hydrate)
+
+    @classmethod
+    def _create_data(cls, name, project, entity, stage, start_date=None, end_date=None,
+                     status=None, shotgun_id=None):
+        '''Validate create() arguments and return Task columns dict'''
         cls.assert_isinstance(project, 'Project')
         cls.assert_isinstance(entity, ('Sequence', 'Shot', 'Asset'))
 
@@ -158,7 +200,7 @@ class Task(Base):
         elif entity.cls_name() == 'Asset':
             asset_id = entity.id
 
-        data = dict(name=name,
+        return dict(name=name,
                     project_id=project.id,
                     sequence_id=sequence_id,
                     shot_id=shot_id,
@@ -169,8 +211,6 @@ class Task(Base):
                     status=status,
                     shotgun_id=shotgun_id)
 
-        return super(Task, cls).create(**data)
-
 
 class UserTask(Base):
 
@@ -186,6 +226,9 @@ class UserTask(Base):
                       UniqueConstraint('user_id', 'task_id', name='uq_user_task'),
                       )
 
+    PARENTS = ('user', 'task')
+    LINKS = LinkTable(__table__, 'task_id', 'user_id')
+
     def __repr__(self):
         return "{cls}(user='{user}', task='{task}')".format(cls =self.__class__.__name__,
                                                             task=self.task_id,
@@ -194,39 +237,75 @@ class UserTask(Base):
     @classmethod
     def assign_users_to_task(cls, task, users):
         '''
-        Assign Users to Task.
+        Assign Users to Task, unassigning its other Users.
 
             Args:
                 task       (Task) : Task to assignment.
                 users (User/list) : User(s) to assign.
         '''
-        cls.assert_isinstances(users, 'User')
-        cls.assert_isinstance(task, 'Task')
+        cls.assign_users_to_tasks({task: users})
+
+    @classmethod
+    def assign_users_to_tasks(cls, assignments, chunk_size=BULK_CHUNK_SIZE):
+        '''
+        Assign Users to many Tasks in one transaction, unassigning their other Users.
+
+            Args:
+                assignments (dict) : {Task: User/list} e.g. {task: [user1, user2]}.
+                chunk_size   (int) : rows per statement.
+
+            Returns:
+                (added, removed) number of assignments.
+        '''
+        links = dict()
+        for (task, users) in assignments.items():
+            cls.assert_isinstance(task, 'Task')
+            links[task.id] = cls._user_ids(users)
 
-        utasks = cls.find(task=task)
+        return cls.LINKS.assign(links, chunk_size=chunk_size)
+
+    @classmethod
+    def add_users(cls, task, users):
+        '''
+        Assign Users to Task, keeping its current Users.
+
+            Args:
+                task       (Task) : Task to assignment.
+                users (User/list) : User(s) to assign.
+        '''
+        cls.assert_isinstance(task, 'Task')
+        cls.LINKS.add((task.id, user_id) for user_id in cls._user_ids(users))
 
-        with task.session_context() as session:
+    @classmethod
+    def remove_users(cls, task, users):
+        '''
+        Unassign Users from Task.
 
-            for utask in utasks:
-                if utask.user_id not in [u.id for u in users]:
-                    session.delete(utask)
+            Args:
+                task       (Task) : Task to unassign from.
+                users (User/list) : User(s) to unassign.
+        '''
+        cls.assert_isinstance(task, 'Task')
+        cls.LINKS.remove(task.id, cls._user_ids(users))
 
-            for user in users:
-                if user.id not in [u.user_id for u in utasks]:
-                    new = UserTask(user_id=user.id, task_id=task.id)
-                    session.add(new)
+    @classmethod
+    def _user_ids(cls, users):
+        '''Validate User/list argument and return a set of User ids'''
+        users = [users] if isinstance(users, Base) else list(users)
+        cls.assert_isinstances(users, 'User')
+        return set(user.id for user in users)
 
     @classmethod
-    def find(cls, user=None, task=None):
+    def find_query(cls, user=None, task=None):
         '''
-        Return UserTask instances by query arguments
+        Return a Query of UserTask instances by query arguments
 
             Args:
                 user     (User) : User instance.
                 task     (Task) : Task instance.
 
             Returns:
-                A list of UserTask instances matching find arguments.
+                A Query of UserTask instances matching find arguments.
         '''
         query = cls.query()
 
@@ -236,7 +315,7 @@ class UserTask(Base):
         if task:
             query = query.filter(cls.task_id == task.id)
 
-        return query.all()
+        return query
 
     @classmethod
     def create(cls, user, task):
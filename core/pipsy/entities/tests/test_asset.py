@@ -1,5 +1,6 @@
 from sqlalchemy.exc import IntegrityError
 from pipsy.entities import Asset
+from pipsy.entities.core import EntityTypeError
 
 
 def test_cls_name():
@@ -43,3 +44,19 @@ def test_create_unique_proj_name(asset):
     except IntegrityError:
         return
     raise AssertionError('Expected IntegrityError due to "Duplicate entry"')
+
+
+def test_bulk_create(project):
+    assets = Asset.bulk_create([dict(name='bulk_char', project=project, kind='char'),
+                                dict(name='bulk_prop', project=project, kind='prop')],
+                               hydrate=True)
+    assert [a.name for a in assets] == ['bulk_char', 'bulk_prop']
+    assert [a.kind for a in assets] == ['char', 'prop']
+
+
+def test_bulk_create_entitytypeerror(sequence):
+    try:
+        Asset.bulk_create([dict(name='bulk_bad', project=sequence, kind='char')])
+    except EntityTypeError:
+        return
+    raise AssertionError('Expected EntityTypeError due to invalid project')
@@ -0,0 +1,100 @@
+import time
+import pytest
+from sqlalchemy import event
+from pipsy.entities import cache, Shot, Task
+
+
+@pytest.fixture
+def enable_cache():
+    cache.enable(size=100, ttl=60)
+    yield cache
+    cache.disable()
+
+
+@pytest.fixture
+def statements(session):
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(session.bind, 'before_cursor_execute', count)
+    yield statements
+    event.remove(session.bind, 'before_cursor_execute', count)
+
+
+def test_lru_eviction():
+    lru = cache.LRUCache(size=2, ttl=60)
+    lru.set('a', 1)
+    lru.set('b', 2)
+    assert lru.get('a') == 1
+    lru.set('c', 3)
+
+    assert lru.get('b') is None
+    assert lru.get('a') == 1
+    assert lru.get('c') == 3
+    assert lru.stats()['evictions'] == 1
+    assert lru.stats()['hits'] == 3
+    assert lru.stats()['misses'] == 1
+    assert lru.stats()['hit_rate'] == 0.75
+
+
+def test_lru_ttl():
+    lru = cache.LRUCache(size=2, ttl=0.01)
+    lru.set('a', 1)
+    time.sleep(0.02)
+
+    assert lru.get('a') is None
+    assert lru.stats()['expirations'] == 1
+    assert len(lru) == 0
+
+
+def test_disabled(shot):
+    assert not cache.enabled(Shot)
+    Shot.findby_id(shot.id)
+    assert cache.stats()['entries'] == 0
+
+
+def test_findby_id(enable_cache, shot, statements):
+    assert Shot.findby_id(shot.id) == shot
+    del statements[:]
+
+    assert Shot.findby_id(shot.id) == shot
+    assert not statements
+    assert cache.stats()['hits'] == 1
+
+
+def test_find(enable_cache, shot, statements):
+    assert Shot.find(sequence=shot.sequence, name=shot.name) == [shot]
+    del statements[:]
+
+    assert Shot.find(name=shot.name, sequence=shot.sequence) == [shot]
+    assert Shot.find_one(name=shot.name, sequence=shot.sequence) == shot
+    assert not statements
+
+
+def test_not_cached_class(enable_cache, task_shot):
+    assert not cache.enabled(Task)
+    Task.findby_id(task_shot.id)
+    assert cache.stats()['entries'] == 0
+
+
+def test_create_invalidates(enable_cache, shot):
+    shots = Shot.find(sequence=shot.sequence)
+
+    new_shot = Shot.create(project=shot.project, sequence=shot.sequence, name='cache_010')
+    assert cache.stats()['invalidations']
+    assert new_shot in Shot.find(sequence=shot.sequence)
+    assert len(Shot.find(sequence=shot.sequence)) == len(shots) + 1
+
+
+def test_session_context_invalidates(enable_cache, shot):
+    assert Shot.findby_id(shot.id).description == shot.description
+
+    with shot.session_context():
+        shot.description = 'cached'
+
+    assert Shot.findby_id(shot.id).description == 'cached'
+
+    with shot.session_context():
+        shot.description = None
@@ -0,0 +1,141 @@
+import pytest
+from pipsy.entities import cache, hierarchy, Project, Sequence, Shot, Instance, Task
+
+
+@pytest.fixture
+def subtree(request, episode, asset):
+    # names unique per test, entities are not deleted
+    prefix = request.function.__name__[len('test_'):]
+    project = episode.project
+
+    sequence_a = Sequence.create(project=project, episode=episode, name=prefix + '_a')
+    sequence_b = Sequence.create(project=project, episode=episode, name=prefix + '_b')
+    shot = Shot.create(project=project, sequence=sequence_a, name='010')
+    instance = Instance.create(project=project, entity=shot, asset=asset, name='cupcake')
+    task = Task.create(project=project, entity=shot, name='anim', stage='anim')
+    return (sequence_a, sequence_b, shot, instance, task)
+
+
+def test_create(episode, sequence_episode, shot_episode, task_shot):
+    project = episode.project
+    assert episode.hierarchy == '/p{}/'.format(project.id)
+    assert sequence_episode.hierarchy == '/p{}/e{}/'.format(project.id, episode.id)
+    assert shot_episode.hierarchy == '/p{}/e{}/q{}/'.format(project.id, episode.id,
+                                                            sequence_episode.id)
+    assert task_shot.hierarchy == '{}h{}/'.format(task_shot.shot.hierarchy, task_shot.shot.id)
+
+
+def test_find_descendants(episode, sequence, sequence_episode, shot, shot_episode):
+    assert shot_episode in Shot.find_descendants(episode)
+    assert shot not in Shot.find_descendants(episode)
+    assert Shot.find_descendants(sequence_episode) == [shot_episode]
+
+    shots = Shot.find_descendants(episode.project)
+    assert shot in shots and shot_episode in shots
+    assert Shot.find_descendants(shot) == []
+
+
+def test_find_descendants_invalid(task_shot):
+    try:
+        Shot.find_descendants(task_shot)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('Task has no descendants')
+
+    try:
+        Project.find_descendants(task_shot.project)
+    except NotImplementedError:
+        return
+
+    raise AssertionError('Project has no hierarchy')
+
+
+def test_reparent(subtree):
+    (sequence_a, sequence_b, shot, instance, task) = subtree
+
+    with shot.session_context():
+        shot.sequence = sequence_b
+
+    prefix = '{}q{}/h{}/'.format(sequence_b.hierarchy, sequence_b.id, shot.id)
+    assert shot.hierarchy == '{}q{}/'.format(sequence_b.hierarchy, sequence_b.id)
+    assert instance.hierarchy == prefix
+    assert task.hierarchy == prefix
+
+    assert Task.find_descendants(sequence_a) == []
+    assert Task.find_descendants(sequence_b) == [task]
+    assert Instance.find_descendants(sequence_b) == [instance]
+
+
+def test_rename(subtree):
+    (sequence_a, sequence_b, shot, instance, task) = subtree
+    episode = sequence_a.episode
+
+    with sequence_a.session_context():
+        sequence_a.name = 'rename_c'
+
+    assert sequence_a.fullname == '{}_rename_c'.format(episode.name)
+    assert shot.fullname == '{}_rename_c_010'.format(episode.name)
+    assert instance.fullname == '{}_rename_c_010_cupcake'.format(episode.name)
+    assert Shot.find(fullname=shot.fullname) == [shot]
+
+    name = episode.name
+    with episode.session_context():
+        episode.name = 'rename_ep'
+
+    assert instance.fullname == 'rename_ep_rename_c_010_cupcake'
+
+    with episode.session_context():
+        episode.name = name
+
+    assert instance.fullname == '{}_rename_c_010_cupcake'.format(name)
+
+
+def test_rename_cached(subtree):
+    (sequence_a, sequence_b, shot, instance, task) = subtree
+    old = shot.fullname
+
+    cache.enable(size=100, ttl=60)
+    try:
+        assert Shot.find(fullname=old) == [shot]
+        assert Shot.findby_id(shot.id).fullname == old
+
+        with sequence_a.session_context():
+            sequence_a.name = 'rename_cached_c'
+
+        assert Shot.find(fullname=old) == []
+        assert Shot.findby_id(shot.id).fullname == '{}_010'.format(sequence_a.fullname)
+        assert Instance.findby_id(instance.id).fullname.startswith(sequence_a.fullname)
+    finally:
+        cache.disable()
+
+
+def test_rebuild(task_shot):
+    task = task_shot
+    expected = task.hierarchy
+
+    with task.session_context() as session:
+        session.execute(Task.__table__.update().where(Task.id == task.id)
+                        .values(hierarchy=None))
+
+    updated = hierarchy.rebuild()
+    assert updated['task'] == 1
+    assert updated['shot'] == 0
+
+    session.refresh(task)
+    assert task.hierarchy == expected
+
+
+def test_rebuild_keeps_updated(instance):
+    expected = instance.hierarchy
+    table = Instance.__table__
+
+    with instance.session_context() as session:
+        session.execute(table.update().where(table.c.id == instance.id)
+                        .values(hierarchy=None, updated=None))
+
+    assert hierarchy.rebuild()['instance'] == 1
+
+    session.refresh(instance)
+    assert instance.hierarchy == expected
+    assert instance.updated is None
@@ -27,6 +27,14 @@ def instance_sequence(sequence, asset):
 
 def test_fullname(instance_shot):
     assert isinstance(instance_shot.fullname, string_types)
+    assert instance_shot.fullname == '{}_{}'.format(instance_shot.shot.fullname,
+                                                    instance_shot.name)
+
+
+def test_fullname_sequence(instance_sequence):
+    assert instance_sequence.fullname == '{}_{}'.format(instance_sequence.sequence.fullname,
+                                                        instance_sequence.name)
+    assert Instance.find(fullname=instance_sequence.fullname) == [instance_sequence]
 
 
 def test_cls_name():
@@ -1,5 +1,6 @@
+from sqlalchemy import event
 from sqlalchemy.exc import IntegrityError
-from pipsy.entities import Project
+from pipsy.entities import Project, Shot
 
 
 def test_cls_name():
@@ -22,6 +23,52 @@ def test_find_one(project):
     assert project == project.find_one(name=project.name)
 
 
+def test_load_tree(project, shot_episode, instance, task_shot, session):
+    tree = project.load_tree()
+    assert shot_episode in tree['shots']
+    assert instance in tree['instances']
+
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(session.bind, 'before_cursor_execute', count)
+    try:
+        shots = [shot for episode in project._episodes
+                 for sequence in episode._sequences
+                 for shot in sequence._shots]
+        instances = [i for shot in project._shots for i in shot._instances]
+        assert shot_episode in shots
+        assert instance in instances
+        assert task_shot in list(task_shot.shot._tasks)
+        assert project._shots.count() == len(tree['shots'])
+        assert [s.fullname for s in shots]
+    finally:
+        event.remove(session.bind, 'before_cursor_execute', count)
+
+    assert not statements
+
+
+def test_load_tree_depth(project, shot):
+    tree = project.load_tree(depth=2, include=('episodes', 'sequences', 'shots'))
+    assert sorted(tree) == ['episodes', 'sequences']
+
+    try:
+        project.load_tree(include=('publishes',))
+    except ValueError:
+        return
+    raise AssertionError('Expected ValueError for an invalid include level')
+
+
+def test_load_tree_commit(project, shot):
+    project.load_tree()
+    shots = list(shot.sequence._shots)
+
+    new_shot = Shot.create(project=project, sequence=shot.sequence, name='tree_010')
+    assert list(shot.sequence._shots) == sorted(shots + [new_shot], key=lambda s: s.name)
+
+
 def test_create_unique_name(project):
     # Expecting IntegrityError error "Duplicate entry..."
     try:
@@ -1,7 +1,8 @@
 import pytest
+from sqlalchemy import event
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm.exc import NoResultFound
-from pipsy.entities import Publish
+from pipsy.entities import Publish, PublishGroup
 
 
 @pytest.fixture(scope="module")
@@ -48,6 +49,56 @@ def test_find_one(publish):
                                        root=publish.root)
 
 
+def test_find_with_parents(publish, session):
+    Publish.bulk_create([dict(project_id=publish.project_id,
+                              publishgroup_id=publish.publishgroup_id,
+                              publishkind_id=publish.publishkind_id,
+                              user_id=publish.user_id,
+                              version=version,
+                              root='/tmp/path_v{}'.format(version))
+                         for version in range(100, 110)])
+
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    project = publish.project
+    session.expire_all()
+    session.refresh(project)
+
+    event.listen(session.bind, 'before_cursor_execute', count)
+    try:
+        publishes = Publish.find(project=project, with_parents=True)
+        assert all(p.parent.fullname for p in publishes)
+        assert all((p.project, p.publishkind, p.user) for p in publishes)
+    finally:
+        event.remove(session.bind, 'before_cursor_execute', count)
+
+    assert len(publishes) > 10
+    assert len(statements) == 1, statements
+
+
+def test_find_iter(publish, session):
+    publishes = Publish.find(project=publish.project)
+    found = list(Publish.find_iter(project=publish.project, batch_size=3))
+
+    assert len(publishes) > 3
+    assert [p.id for p in found] == sorted(p.id for p in publishes)
+    assert publish in session
+
+
+def test_find_iter_expunge(publish, session):
+    for other in Publish.find(project=publish.project):
+        if other != publish:
+            session.expunge(other)
+
+    found = list(Publish.find_iter(project=publish.project, batch_size=3))
+
+    assert publish in session
+    assert not any(p in session for p in found if p != publish)
+
+
 def test_findby_id(publish):
     assert publish == Publish.findby_id(publish.id)
 
@@ -76,3 +127,76 @@ def test_create_unique_group_kind_root(publish):
     except IntegrityError:
         return
     raise AssertionError('Expected IntegrityError due to "Duplicate entry"')
+
+
+@pytest.fixture(scope="module")
+def publishgroup_sequence(sequence, publishkind_geohigh, user):
+    group = PublishGroup.create(project=sequence.project, entity=sequence,
+                                publishkind=publishkind_geohigh)
+    for (version, status) in ((1, 'act'), (2, 'act'), (3, 'dis')):
+        Publish.create(project=sequence.project, publishgroup=group, publishkind=group.publishkind,
+                       user=user, version=version, root='/tmp/latest/v{}'.format(version),
+                       status=status)
+    return group
+
+
+def test_latest(publishgroup_sequence, sequence):
+    kind = publishgroup_sequence.publishkind
+    assert Publish.latest(publishgroup_sequence).version == 2
+    assert Publish.latest(publishgroup_sequence, status=None).version == 3
+    assert Publish.latest(sequence, publishkind=kind) == Publish.latest(publishgroup_sequence)
+
+
+def test_latest_parent_kind(sequence):
+    try:
+        Publish.latest(sequence)
+    except ValueError:
+        return
+    raise AssertionError('Expected ValueError for a parent entity without publishkind')
+
+
+def test_latest_many(publish, publishgroup_sequence, sequence, asset):
+    kind = publishgroup_sequence.publishkind
+    versions = [p.version for p in Publish.find(publishgroup=publish.publishgroup, status='act')]
+
+    latest = Publish.latest_many([publish.publishgroup, publishgroup_sequence])
+    assert latest[publish.publishgroup].version == max(versions)
+    assert latest[publishgroup_sequence].version == 2
+
+    latest = Publish.latest_many([sequence, asset], publishkind=kind, chunk_size=1)
+    assert latest == {sequence: Publish.latest(publishgroup_sequence), asset: None}
+
+
+def test_next_version(publishgroup_sequence):
+    version = publishgroup_sequence.next_version()
+    assert version == 4
+    assert publishgroup_sequence.next_version() == version + 1
+    assert publishgroup_sequence.last_version == version + 1
+
+
+def test_create_next_version(publish, user):
+    group = publish.publishgroup
+    latest = Publish.latest(group, status=None)
+
+    new = Publish.create(project=group.project, publishgroup=group, publishkind=group.publishkind,
+                         user=user, root='/tmp/next_version')
+    assert new.version == latest.version + 1
+
+    # a failed publish gives its version back
+    try:
+        Publish.create(project=group.project, publishgroup=group,
+                       publishkind=group.publishkind, user=user, root='/tmp/next_version')
+    except IntegrityError:
+        pass
+    else:
+        raise AssertionError('Expected IntegrityError due to "Duplicate entry"')
+
+    assert group.next_version() == new.version + 1
+
+
+def test_create_without_root(publish, user):
+    group = publish.publishgroup
+    new = Publish.create(project=group.project, publishgroup=group, publishkind=group.publishkind,
+                         user=user)
+    assert new.root is None
+    assert new.version == Publish.latest(group, status=None).version
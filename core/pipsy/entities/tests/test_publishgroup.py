@@ -1,7 +1,7 @@
 import pytest
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm.exc import NoResultFound
-from pipsy.entities import PublishKind, PublishGroup
+from pipsy.entities import PublishKind, PublishGroup, User
 
 
 @pytest.fixture(scope="module")
@@ -33,6 +33,15 @@ def sequence_group(sequence, kind_geohigh):
         return PublishGroup.create(project=sequence.project, entity=sequence, publishkind=kind_geohigh)
 
 
+@pytest.fixture(scope="module")
+def user_other(user):
+    try:
+        return User.find_one(login='unittest_other')
+    except NoResultFound:
+        return User.create(first_name='other', last_name='unittest',
+                           email='other@unittest.com', login='unittest_other')
+
+
 def test_project(project, shot_group):
     assert shot_group.project == project
 
@@ -106,3 +115,38 @@ def test_create_unique_uq_instance_kind(instance_group):
     except IntegrityError:
         return
     raise AssertionError('Expected IntegrityError due to "Duplicate entry"')
+
+
+def test_checkout(sequence_group, user, user_other):
+    sequence_group.release()
+    assert sequence_group.is_locked() is False
+
+    assert sequence_group.checkout(user) is True
+    assert sequence_group.is_locked() is True
+    assert sequence_group.checkout_user_id == user.id
+
+    # Another user fails to take it
+    assert sequence_group.checkout(user_other) is False
+    assert sequence_group.checkout_user_id == user.id
+
+    # Renewed by the same user
+    assert sequence_group.checkout(user) is True
+
+    assert sequence_group.release(user_other) is False
+    assert sequence_group.release(user) is True
+    assert sequence_group.is_locked() is False
+    assert sequence_group.checkout_user_id is None
+
+    assert sequence_group.checkout(user_other) is True
+    assert sequence_group.release() is True
+
+
+def test_checkout_stale(shot_group, user, user_other):
+    assert shot_group.checkout(user) is True
+    assert shot_group.checkout(user_other) is False
+
+    # A checkout older than timeout is stale, and can be taken over
+    assert shot_group.is_locked(timeout=-1) is False
+    assert shot_group.checkout(user_other, timeout=-1) is True
+    assert shot_group.checkout_user_id == user_other.id
+    assert shot_group.release(user_other) is True
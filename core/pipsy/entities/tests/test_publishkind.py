@@ -1,6 +1,8 @@
 import pytest
+from sqlalchemy import event
 from sqlalchemy.exc import IntegrityError
 from pipsy.entities import PublishKind
+from pipsy.entities.publishkind import REGISTRY, PublishKindRegistry
 
 
 @pytest.fixture(scope="module")
@@ -33,6 +35,65 @@ def test_findby_name(kind_geohigh):
     assert kind_geohigh == PublishKind.find_one(name=kind_geohigh.name)
 
 
+def test_registry_find(kind_geohigh, session):
+    REGISTRY.check()
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(session.bind, 'before_cursor_execute', count)
+    try:
+        assert REGISTRY.find(name=kind_geohigh.name) == [kind_geohigh]
+        assert REGISTRY.find(nicename=kind_geohigh.nicename) == [kind_geohigh]
+        assert REGISTRY.find(kind=kind_geohigh.kind, lod=kind_geohigh.lod) == [kind_geohigh]
+        assert PublishKind.find_one(name=kind_geohigh.name).id == kind_geohigh.id
+        assert REGISTRY.find(name='missing') == []
+    finally:
+        event.remove(session.bind, 'before_cursor_execute', count)
+
+    assert not statements
+
+
+def test_registry_stamp(kind_geohigh):
+    registry = PublishKindRegistry(check_interval=3600)
+    count = len(registry.find())
+
+    kind = PublishKind.create(name='registry', nicename='registry', kind='registry')
+    assert len(registry.find()) == count
+
+    registry.expire()
+    assert registry.find(name='registry') == [kind]
+    assert len(registry.find()) == count + 1
+
+
+def test_registry_stamp_edit(kind_geohigh, session):
+    registry = PublishKindRegistry(check_interval=3600)
+    kind = PublishKind.find_one(name='registry')
+    assert registry.find(name='registry')[0].description is None
+
+    # edited in place by another process, seen once the stamp is checked
+    table = PublishKind.__table__
+    session.execute(table.update().where(table.c.id == kind.id)
+                    .values(description='edited', subkind=kind.subkind))
+    registry.expire()
+    session.expire(kind)
+    assert registry.find(name='registry')[0].description == 'edited'
+
+
+def test_registry_expire_on_flush(kind_geohigh):
+    REGISTRY.check()
+    kind = PublishKind.find_one(name='registry')
+
+    # subkind is required by the subkind_virtual onupdate
+    with kind.session_context():
+        kind.nicename = 'registry_renamed'
+        kind.subkind = 'renamed'
+
+    assert PublishKind.find_one(nicename='registry_renamed') == kind
+    assert PublishKind.find(nicename='registry') == []
+
+
 def test_create_unique_name(kind_geohigh):
     # Expecting IntegrityError error "Duplicate entry..."
     try:
@@ -2,6 +2,7 @@ import pytest
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm.exc import NoResultFound
 from pipsy.entities import PublishKind, PublishGroup, Publish, PublishMetadata
+from pipsy.entities.publishmetadata import index_keys
 
 
 @pytest.fixture(scope="module")
@@ -52,3 +53,63 @@ def test_has_key(publish_metadata):
     key = publish_metadata.metadata.keys()[0]
     value = publish_metadata.metadata[key]
     assert publish_metadata in PublishMetadata.find(key_value=(key, value))
+
+
+@pytest.fixture(scope="module")
+def publish_render(publishgroup_shot, user):
+    publish = Publish.create(project=publishgroup_shot.project, publishgroup=publishgroup_shot,
+                             publishkind=publishgroup_shot.publishkind, user=user,
+                             root='/tmp/path_render')
+    publish.metadata = {'renderer': 'arnold', 'frame_range': '1001-1100', 'samples': 8}
+    return PublishMetadata.find_one(publish=publish)
+
+
+@pytest.fixture
+def indexed_keys():
+    # Keys registered by a test are unregistered after it
+    keys = set(PublishMetadata.INDEXED_KEYS)
+    yield PublishMetadata.INDEXED_KEYS
+    PublishMetadata.INDEXED_KEYS.intersection_update(keys)
+
+
+def test_indexed_keys():
+    assert set(['frame_range', 'renderer', 'source_file']) <= PublishMetadata.INDEXED_KEYS
+
+    # Created with the table
+    assert index_keys() == []
+
+
+def test_find_indexed_key(publish_render):
+    assert PublishMetadata.find(key_value=('renderer', 'arnold')) == [publish_render]
+    assert PublishMetadata.find(key_value=('renderer', 'vray')) == []
+    assert PublishMetadata.find(key_value=('frame_range', '1001-1100')) == [publish_render]
+    assert publish_render in PublishMetadata.find(has_key='renderer')
+    assert publish_render not in PublishMetadata.find(has_key='source_file')
+
+
+def test_index_keys(publish_render, indexed_keys):
+    PublishMetadata.register_key('samples')
+    assert index_keys() == ['samples']
+    assert index_keys() == []
+
+    assert PublishMetadata.find(key_value=('samples', 8)) == [publish_render]
+    assert PublishMetadata.find(key_value=('samples', '8')) == []
+    assert publish_render in PublishMetadata.find(has_key='samples')
+    assert 'samples' in indexed_keys
+
+
+def test_find_registered_key(publish_render, indexed_keys):
+    # Registered after the table, queried on the JSON value until index_keys()
+    PublishMetadata.register_key('denoiser')
+    assert PublishMetadata.find(key_value=('denoiser', 'optix')) == []
+    assert publish_render not in PublishMetadata.find(has_key='denoiser')
+    assert index_keys() == ['denoiser']
+    assert PublishMetadata.find(key_value=('renderer', 'arnold')) == [publish_render]
+
+
+def test_register_key_invalid():
+    try:
+        PublishMetadata.register_key("key')")
+    except ValueError:
+        return
+    raise AssertionError('Expected ValueError for an invalid metadata key')
@@ -70,3 +70,23 @@ def test_create_unique_proj_ep_name(sequence_episode):
     except IntegrityError:
         return
     raise AssertionError('Expected IntegrityError due to "Duplicate entry"')
+
+
+def test_bulk_create(project, episode):
+    sequences = Sequence.bulk_create([dict(name='bulk001', project=project),
+                                      dict(name='bulk001', project=project, episode=episode)],
+                                     hydrate=True)
+    assert sequences[0].episode_id is None
+    assert sequences[0].episode_id_virtual == 0
+    assert sequences[1].episode_id == episode.id
+    assert sequences[1].episode_id_virtual == episode.id
+
+
+def test_upsert_by_shotgun_id(project, episode):
+    row = dict(name='sg001', basename='sg001', project_id=project.id, shotgun_id=9100)
+    assert Sequence.upsert_by_shotgun_id([row]).inserted == 1
+    assert Sequence.find_one(shotgun_id=9100).episode_id_virtual == 0
+
+    row['episode_id'] = episode.id
+    assert Sequence.upsert_by_shotgun_id([row]).updated == 1
+    assert Sequence.find_one(shotgun_id=9100).episode_id_virtual == episode.id
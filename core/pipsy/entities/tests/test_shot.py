@@ -1,5 +1,7 @@
+from sqlalchemy import inspect, event
 from sqlalchemy.exc import IntegrityError
 from pipsy.core.pythonx import string_types
+from pipsy.db import stats
 from pipsy.entities import Shot
 
 
@@ -31,10 +33,71 @@ def test_find(shot):
     assert shot in Shot.find()
 
 
+def test_find_load(shot):
+    assert shot in Shot.find(load=['sequence.episode'])
+
+    try:
+        Shot.find(load=['sequence.cut'])
+    except ValueError:
+        return
+    raise AssertionError('Expected ValueError for an invalid load path')
+
+
+def test_find_columns(shot):
+    rows = Shot.find(id=shot.id, columns=['id', 'name', 'status'])
+    assert rows == [(shot.id, shot.name, shot.status)]
+    assert rows[0].name == shot.name
+    assert type(rows[0]) is Shot.row_type(['id', 'name', 'status'])
+
+    try:
+        Shot.find(columns=['id', 'parent'])
+    except ValueError:
+        return
+    raise AssertionError('Expected ValueError for an unknown column')
+
+
+def test_find_baked(shot):
+    for kwargs in (dict(id=shot.id),
+                   dict(project=shot.project, name=shot.name),
+                   dict(sequence=shot.sequence, name=shot.name)):
+        assert shot in Shot._find_baked(kwargs)
+        assert Shot.find(**kwargs) == Shot.find_query(**kwargs).all()
+
+    # Not a cached filter shape, handled by find_query()
+    assert Shot._find_baked(dict(id=[shot.id])) is None
+    assert Shot._find_baked(dict(sequence=shot.sequence, name=shot.name, status='act')) is None
+
+
+def test_find_stats(shot):
+    stats.reset()
+    Shot.find(sequence=shot.sequence, status='act')
+    assert stats.snapshot()['callers']['Shot.find']['count'] == 1
+
+
+def test_count(shot):
+    assert Shot.count(sequence=shot.sequence) == len(Shot.find(sequence=shot.sequence))
+    assert Shot.count(id=shot.id) == 1
+    assert Shot.count(id=-1) == 0
+
+
+def test_exists(shot):
+    assert Shot.exists(id=shot.id) is True
+    assert Shot.exists(id=-1) is False
+
+
 def test_findby_ids(shot):
     assert shot in Shot.findby_ids([shot.id])
 
 
+def test_load_parents(shot, shot_episode):
+    Shot.load_parents([shot, shot_episode])
+    for entity in (shot, shot_episode):
+        state = inspect(entity)
+        assert state.dict['project'] == entity.sequence.project
+        assert state.dict['sequence'].id == entity.sequence_id
+        assert inspect(state.dict['sequence']).dict['episode'] == entity.sequence.episode
+
+
 def test_find_one(shot):
     assert shot == Shot.find_one(id=shot.id)
 
@@ -65,3 +128,76 @@ def test_fullname(shot):
 
 def test_fullname_episode(shot_episode):
     assert isinstance(shot_episode.fullname, string_types)
+    assert shot_episode.fullname == '{}_{}_{}'.format(shot_episode.sequence.episode.name,
+                                                      shot_episode.sequence.name,
+                                                      shot_episode.name)
+
+
+def test_find_fullname(shot, shot_episode):
+    assert Shot.find(fullname=shot_episode.fullname) == [shot_episode]
+    assert Shot.find_one(project=shot.project, fullname=shot.fullname) == shot
+
+
+def test_bulk_create(sequence):
+    rows = [dict(name='bulk{:03d}'.format(i), project=sequence.project, sequence=sequence)
+            for i in range(5)]
+    ids = Shot.bulk_create(rows, chunk_size=2)
+    assert len(ids) == 5
+
+    shots = Shot.bulk_create([dict(name='bulk_hydrate', project=sequence.project,
+                                   sequence=sequence, cut=(1001, 1050))], hydrate=True)
+    assert shots[0].name == 'bulk_hydrate'
+    assert shots[0].cut == (1001, 1050)
+    assert [s.id for s in Shot.findby_ids(ids)] == sorted(ids)
+    assert Shot.findby_id(ids[0]).name == 'bulk000'
+    assert Shot.findby_id(ids[0]).status == Shot.default_status()
+
+
+def test_bulk_create_statements(sequence, session):
+    rows = [dict(name='bulk_stmt{:03d}'.format(i), project=sequence.project, sequence=sequence)
+            for i in range(50)]
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    # per chunk: INSERT, parent hierarchy, parent fullname and new ids, not one per row
+    event.listen(session.bind, 'before_cursor_execute', count)
+    try:
+        ids = Shot.bulk_create(rows, chunk_size=25)
+    finally:
+        event.remove(session.bind, 'before_cursor_execute', count)
+
+    assert len(statements) <= 2 * 4, statements
+    shots = Shot.findby_ids(ids)
+    assert set(s.hierarchy for s in shots) == set([shots[0].hierarchy])
+    assert shots[0].fullname == '{}_{}'.format(sequence.fullname, shots[0].name)
+
+
+def test_upsert_by_shotgun_id(sequence):
+    rows = [dict(name='sg{:03d}'.format(i), basename='sg{:03d}'.format(i), shotgun_id=9000 + i,
+                 project_id=sequence.project_id, sequence_id=sequence.id) for i in range(4)]
+    result = Shot.upsert_by_shotgun_id(rows, chunk_size=3)
+    assert (result.inserted, result.updated, result.unchanged) == (4, 0, 0)
+
+    rows[0]['cut_out'] = 1100
+    rows[1]['description'] = 'updated'
+    result = Shot.upsert_by_shotgun_id(rows, chunk_size=3)
+    assert (result.inserted, result.updated, result.unchanged) == (0, 2, 2)
+
+    shot = Shot.find_one(shotgun_id=9000)
+    assert shot.cut_out == 1100
+    assert Shot.find_one(shotgun_id=9001).description == 'updated'
+    assert Shot.find_one(shotgun_id=9002).cut_out == 1011
+
+
+def test_upsert_fullname(sequence):
+    rows = [dict(name='sg100', basename='sg100', shotgun_id=9100,
+                 project_id=sequence.project_id, sequence_id=sequence.id)]
+    Shot.upsert_by_shotgun_id(rows)
+    assert Shot.find_one(shotgun_id=9100).fullname == '{}_sg100'.format(sequence.fullname)
+
+    rows[0]['name'] = 'sg101'
+    Shot.upsert_by_shotgun_id(rows)
+    assert Shot.find(fullname='{}_sg101'.format(sequence.fullname)) == \
+        [Shot.find_one(shotgun_id=9100)]
@@ -78,3 +78,12 @@ def test_create_bad_arguments(task_shot):
     except TypeError:
         return
     raise AssertionError('Expected TypeError due to wrong arg type')
+
+
+def test_bulk_create(shot, asset, sequence):
+    rows = [dict(name='bulk', project=shot.project, entity=shot, stage='layout'),
+            dict(name='bulk', project=asset.project, entity=asset, stage='layout'),
+            dict(name='bulk', project=sequence.project, entity=sequence, stage='layout')]
+    tasks = Task.bulk_create(rows, hydrate=True)
+    assert [t.parent for t in tasks] == [shot, asset, sequence]
+    assert len(set(t.id for t in tasks)) == 3
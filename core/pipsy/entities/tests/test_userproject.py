@@ -1,6 +1,6 @@
 import pytest
 from sqlalchemy.orm.exc import NoResultFound
-from pipsy.entities import UserProject
+from pipsy.entities import User, UserProject
 
 
 @pytest.fixture(scope="module")
@@ -51,3 +51,34 @@ def test_task_user_assignment(project, user):
 
 def test_assign_projects_to_user(user, project):
     UserProject.assign_projects_to_user(user, [project])
+
+
+def test_assign_projects_to_user_keeps(user, project):
+    UserProject.assign_projects_to_user(user, [project])
+    UserProject.assign_projects_to_user(user, project)
+    assert user.projects == [project]
+
+
+def test_add_remove_projects(user, project):
+    UserProject.remove_projects(user, project)
+    assert user.projects == []
+
+    UserProject.add_projects(user, [project])
+    assert UserProject.assign_projects_to_users({user: [project]}) == (0, 0)
+    assert user.projects == [project]
+
+
+def test_projects_copy_between_users(project, user):
+    try:
+        other = User.find_one(login='unittest_other')
+    except NoResultFound:
+        other = User.create(first_name='other', last_name='unittest',
+                            email='other@unittest.com', login='unittest_other')
+
+    user.projects = [project]
+    other.projects = []
+
+    # Links of another User are assigned as a whole
+    other.projects = user.projects
+    assert other.projects == [project]
+    assert user.projects == [project]
@@ -54,3 +54,43 @@ def test_task_user_assignment(task_asset, user):
 
 def test_assign_users_to_task(task_asset, user):
     UserTask.assign_users_to_task(task_asset, [user])
+
+
+def test_add_remove_users(task_sequence, user):
+    UserTask.add_users(task_sequence, user)
+    UserTask.add_users(task_sequence, [user])
+    assert task_sequence.users == [user]
+
+    UserTask.remove_users(task_sequence, [user])
+    assert task_sequence.users == []
+
+
+def test_assign_users_to_tasks(task_shot, task_sequence, task_asset, user):
+    assignments = {task_shot: [user], task_sequence: [user], task_asset: []}
+    UserTask.assign_users_to_tasks(assignments)
+    assert UserTask.assign_users_to_tasks(assignments) == (0, 0)
+
+    assert task_sequence.users == [user]
+    assert task_asset.users == []
+    assert UserTask.assign_users_to_tasks({task_sequence: []}) == (0, 1)
+
+
+def test_users_operators_write_changes(task_asset, user):
+    task_asset.users = []
+    users = task_asset.users
+    users += user
+    assert users.added() == set([user])
+    assert not users.removed()
+
+    task_asset.users = users
+    assert task_asset.users == [user]
+
+
+def test_users_copy_between_tasks(task_shot, task_sequence, user):
+    task_shot.users = [user]
+    task_sequence.users = []
+
+    # Links of another Task are assigned as a whole
+    task_sequence.users = task_shot.users
+    assert task_sequence.users == [user]
+    assert task_shot.users == [user]
@@ -5,7 +5,7 @@ from sqlalchemy import (Table, Column, Integer, String, Enum, Index,
                         ForeignKey, UniqueConstraint)
 from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
-from .core import Base, ResultSet
+from .core import Base, LinkSet, LinkTable, BULK_CHUNK_SIZE
 from .project import Project
 
 
@@ -38,6 +38,9 @@ class User(Base):
     _publishes = relationship('Publish', backref='user', lazy='dynamic',
                               cascade="all, delete-orphan")
 
+    FIND_SHAPES = (('id',), ('shotgun_id',))
+    CACHED = True
+
     def __repr__(self):
         return "{cls}(login='{login}', id={id})".format(cls=self.__class__.__name__,
                                                         login=self.login,
@@ -57,7 +60,7 @@ class User(Base):
         '''Returns Users instances assigned to Task'''
         query = Project.query()
         query = query.join(UserProject).filter(UserProject.user_id == self.id)
-        return ResultSet(query.all())
+        return LinkSet(query.all(), owner=self)
 
     @projects.setter
     def projects(self, projects):
@@ -70,8 +73,15 @@ class User(Base):
                 self.projects -= project
                 self.projects += [project]
                 self.projects -= [project]
+
+            Operators only write the Projects added or removed. Projects of another User
+            are assigned as a whole.
         '''
-        UserProject.assign_projects_to_user(user=self, projects=projects)
+        if isinstance(projects, LinkSet) and projects.owner is self:
+            UserProject.remove_projects(user=self, projects=projects.removed())
+            UserProject.add_projects(user=self, projects=projects.added())
+        else:
+            UserProject.assign_projects_to_user(user=self, projects=projects)
 
     @property
     def tasks(self):
@@ -80,10 +90,10 @@ class User(Base):
         return Task.find(user=self)
 
     @classmethod
-    def find(cls, first_name=None, last_name=None, fullname=None, login=None,
-             email=None, status=None, id=None, shotgun_id=None):
+    def find_query(cls, first_name=None, last_name=None, fullname=None, login=None,
+                   email=None, status=None, id=None, shotgun_id=None):
         '''
-        Return User instances by query arguments
+        Return a Query of User instances by query arguments
 
             Args:
                 first_name      (str) : User first name.
@@ -96,7 +106,7 @@ class User(Base):
                 shotgun_id (int/list) : User shotgun id(s)
 
             Returns:
-                A list of User instances matching find arguments.
+                A Query of User instances matching find arguments.
         '''
         query = cls.query(id=id, status=status, shotgun_id=shotgun_id)
 
@@ -115,7 +125,7 @@ class User(Base):
         if email:
             query = query.filter(cls.email == email)
 
-        return query.all()
+        return query
 
     @classmethod
     def create(cls, first_name, last_name, login, email, status=None, shotgun_id=None):
@@ -134,15 +144,38 @@ class User(Base):
                 New User Instance.
 
         '''
-        data = dict(first_name=first_name,
+        data = cls._create_data(first_name=first_name, last_name=last_name, login=login,
+                                email=email, status=status, shotgun_id=shotgun_id)
+
+        return super(User, cls).create(**data)
+
+    @classmethod
+    def bulk_create(cls, rows, chunk_size=BULK_CHUNK_SIZE, hydrate=False):
+        '''
+        Create many User instances in one transaction.
+
+            Args:
+                rows       (list) : list of dicts with create() arguments.
+                chunk_size  (int) : rows per INSERT statement.
+                hydrate    (bool) : return User instances instead of ids.
+
+            Returns:
+                A list of new User ids (or instances) in rows order.
+        '''
+        rows = [cls._create_data(**row) for row in rows]
+        return super(User, cls).bulk_create(rows, key=('login',), chunk_size=chunk_size,
+                                            hydrate=hydrate)
+
+    @classmethod
+    def _create_data(cls, first_name, last_name, login, email, status=None, shotgun_id=None):
+        '''Validate create() arguments and return User columns dict'''
+        return dict(first_name=first_name,
                     last_name=last_name,
                     login=login,
                     email=email,
                     status=status,
                     shotgun_id=shotgun_id)
 
-        return super(User, cls).create(**data)
-
 
 class UserProject(Base):
 
@@ -159,6 +192,9 @@ class UserProject(Base):
                                        name='uq_user_project'),
                       )
 
+    PARENTS = ('user', 'project')
+    LINKS = LinkTable(__table__, 'user_id', 'project_id')
+
     def __repr__(self):
         return "{cls}(user='{user}', project='{project}')".format(cls=self.__class__.__name__,
                                                                   user=self.user_id,
@@ -167,39 +203,75 @@ class UserProject(Base):
     @classmethod
     def assign_projects_to_user(cls, user, projects):
         '''
-        Assign Projects to User.
+        Assign Projects to User, unassigning its other Projects.
 
            Args:
                 user            (User): User to assignment.
                 project (Project/list): Project(s) to assign.
         '''
-        cls.assert_isinstances(projects, 'Project')
-        cls.assert_isinstance(user, 'User')
+        cls.assign_projects_to_users({user: projects})
 
-        uprojects = UserProject.find(user=user)
+    @classmethod
+    def assign_projects_to_users(cls, assignments, chunk_size=BULK_CHUNK_SIZE):
+        '''
+        Assign Projects to many Users in one transaction, unassigning their other Projects.
 
-        with user.session_context() as session:
+            Args:
+                assignments (dict) : {User: Project/list} e.g. {user: [project1, project2]}.
+                chunk_size   (int) : rows per statement.
 
-            for uproj in uprojects:
-                if uproj.user_id not in [p.id for p in projects]:
-                    session.delete(uproj)
+            Returns:
+                (added, removed) number of assignments.
+        '''
+        links = dict()
+        for (user, projects) in assignments.items():
+            cls.assert_isinstance(user, 'User')
+            links[user.id] = cls._project_ids(projects)
+
+        return cls.LINKS.assign(links, chunk_size=chunk_size)
+
+    @classmethod
+    def add_projects(cls, user, projects):
+        '''
+        Assign Projects to User, keeping its current Projects.
 
-            for project in projects:
-                if project.id not in [u.project_id for u in uprojects]:
-                    new = UserProject(project_id=project.id, user_id=user.id)
-                    session.add(new)
+           Args:
+                user            (User): User to assignment.
+                project (Project/list): Project(s) to assign.
+        '''
+        cls.assert_isinstance(user, 'User')
+        cls.LINKS.add((user.id, project_id) for project_id in cls._project_ids(projects))
+
+    @classmethod
+    def remove_projects(cls, user, projects):
+        '''
+        Unassign Projects from User.
+
+           Args:
+                user            (User): User to unassign from.
+                project (Project/list): Project(s) to unassign.
+        '''
+        cls.assert_isinstance(user, 'User')
+        cls.LINKS.remove(user.id, cls._project_ids(projects))
+
+    @classmethod
+    def _project_ids(cls, projects):
+        '''Validate Project/list argument and return a set of Project ids'''
+        projects = [projects] if isinstance(projects, Base) else list(projects)
+        cls.assert_isinstances(projects, 'Project')
+        return set(project.id for project in projects)
 
     @classmethod
-    def find(cls, user=None, project=None):
+    def find_query(cls, user=None, project=None):
         '''
-        Return UserProject instances by query arguments
+        Return a Query of UserProject instances by query arguments
 
             Args:
                 user       (User) : User instance.
                 project (Project) : Project instance.
 
             Returns:
-                A list of UserProject instances matching find arguments.
+                A Query of UserProject instances matching find arguments.
         '''
         query = cls.query()
 
@@ -209,7 +281,7 @@ class UserProject(Base):
         if project:
             query = query.filter(cls.project_id == project.id)
 
-        return query.all()
+        return query
 
     @classmethod
     def create(cls, user, project):
@@ -1,16 +1,53 @@
 import os
 import re
+import sys
 import yaml
+import pickle
 import pprint
+import hashlib
+import tempfile
+from operator import attrgetter
+from timeit import default_timer
+from ..core import logging
+from ..core.pythonx import string_types
+
+LOG = logging.getLogger(__name__, level=logging.INFO)
 
 # Schemas root folder
 SCHEMAS_ROOT = os.path.join(os.path.dirname(__file__), 'schemas')
 
+# Per-user folder of compiled schemas, see read_schema()
+CACHE_ROOT = os.environ.get('PIPSY_SCHEMA_CACHE') or os.path.join(
+    os.path.expanduser('~'), '.cache', 'pipsy', 'schemas')
+CACHE_VERSION = 1
+
+# Seconds between checks of a loaded schema file for changes
+RELOAD_INTERVAL = 2.0
+
 REG_KEY   = re.compile(r'(\$[\w]+)')              # $key
 REG_SPLIT = re.compile(r'<([\w]+)\.?([\w.]+)?>')  # <entity.attr>
 
 __SCHEMAS_DATA = dict()
 __SCHEMAS_PATH = dict()
+__SCHEMAS_RAW_PATHS = dict()   # schema : {key: expanded raw path}
+__SCHEMAS_STAT = dict()        # schema : (mtime, size) of the loaded file
+__SCHEMAS_CHECKED = dict()     # schema : default_timer() of the last file check
+__SCHEMAS_TEMPLATES = dict()
+__SCHEMAS_KEYS = dict()
+
+# Leading token matched against the known Project roots, see match_path()
+ROOT_TOKEN = ('project', 'root')
+
+# Entity fields resolved by parse_path() parents first, with their parents fields in
+# filter priority order
+PARSE_PARENTS = (('project', ()),
+                 ('user', ()),
+                 ('episode', ('project',)),
+                 ('sequence', ('episode', 'project')),
+                 ('shot', ('sequence', 'project')),
+                 ('asset', ('project',)),
+                 ('instance', ('shot', 'sequence', 'project')),
+                 ('task', ('shot', 'sequence', 'asset', 'project')))
 
 
 def get_path(key, fields, schema):
@@ -29,9 +66,195 @@ def get_path(key, fields, schema):
             >>> get_path('shot_root', {'shot':Shot()}, 'film')
             "/projects/unittest/sequence/101/001"
     '''
-    raw_path = get_raw_path(key, schema)
-    fields = _expand_fields(fields)
-    return _resolve_path(raw_path, fields)
+    return get_template(key, schema).resolve(_expand_fields(fields))
+
+
+def get_paths(key, entities, schema, fields=None, chunk_size=None):
+    '''
+    Return resolved paths of many entities.
+    Entities parents are loaded in bulk by load_parents(), one query per relationship
+    level and chunk, and the key template is compiled once.
+
+        Args:
+            key          (str) : key to resolve.
+            entities    (list) : entities e.g. Shot instances of a Sequence.
+            schema       (str) : schema's name.
+            fields      (dict) : extra fields shared by all entities e.g. {'user': User()}.
+            chunk_size   (int) : parent ids per query, see expand_entities().
+
+        Retrun:
+            dict of entity : resolved path
+
+        Example:
+            >>> get_paths('shot_pub', [Shot(), Shot()], 'film')
+            {Shot(): "/projects/unittest/sequence/101/001/pub",
+             Shot(): "/projects/unittest/sequence/101/002/pub"}
+    '''
+    template = get_template(key, schema)
+    return dict((entity, template.resolve(entity_fields))
+                for (entity, entity_fields) in expand_entities(entities, fields, chunk_size))
+
+
+def expand_entities(entities, fields=None, chunk_size=None):
+    '''
+    Return the expanded fields of many entities, see _expand_fields().
+    Entities parents are loaded in bulk by load_parents(), one query per relationship
+    level and chunk.
+
+        Args:
+            entities    (list) : entities e.g. Shot instances of a Sequence.
+            fields      (dict) : extra fields shared by all entities e.g. {'user': User()}.
+            chunk_size   (int) : parent ids per query, defaults to entities BULK_CHUNK_SIZE.
+
+        Retrun:
+            list of (entity, fields dict) tuples, in entities order
+    '''
+    if chunk_size is None:
+        # Imported here, entities pulls in SQLAlchemy and the db connection.
+        from ..entities.core import BULK_CHUNK_SIZE
+        chunk_size = BULK_CHUNK_SIZE
+
+    fields = dict(fields or {})
+
+    by_class = dict()
+    for entity in entities:
+        by_class.setdefault(type(entity), []).append(entity)
+
+    for (cls, group) in by_class.items():
+        cls.load_parents(group, chunk_size=chunk_size)
+
+    result = []
+    for entity in entities:
+        entity_fields = dict(fields)
+        entity_fields[entity.cls_name()] = entity
+        result.append((entity, _expand_fields(entity_fields)))
+
+    return result
+
+
+def get_template(key, schema):
+    '''
+    Return the compiled PathTemplate of given key, compiled once per schema key.
+
+        Args:
+            key    (str) : key to resolve.
+            schema (str) : schema's name.
+
+        Retrun:
+            PathTemplate instance
+
+        Example:
+            >>> get_template('shot_root', 'film').fields
+            ['project', 'sequence', 'shot']
+    '''
+    _check_reload(schema)
+
+    cache_key = (schema, key.lower())
+    template = __SCHEMAS_TEMPLATES.get(cache_key)
+
+    if template is None:
+        template = PathTemplate(get_raw_path(key, schema))
+        __SCHEMAS_TEMPLATES[cache_key] = template
+
+    return template
+
+
+def parse_path(path, schema, roots=None):
+    '''
+    Return the schema key matching path and its fields entities.
+    Path can be a file or folder under the key path. The key matching the longest
+    part of path wins. Entities are resolved with one query per field.
+
+        Args:
+            path   (str) : filesystem path.
+            schema (str) : schema's name.
+            roots (list) : Project roots, see match_path(). Pass them to parse many paths
+                           without reading the roots again.
+
+        Retrun:
+            (key, fields) tuple, None if path matches no key e.g. outside every project.
+            Fields entity is None when no entity, or more than one, matches.
+
+        Example:
+            >>> parse_path('/projects/unittest/sequence/101/001/pub/cam.abc', 'film')
+            ('shot_pub', {'project': Project(), 'sequence': Sequence(), 'shot': Shot()})
+    '''
+    matched = match_path(path, schema, roots)
+    if matched is None:
+        return None
+
+    (key, values) = matched
+    return (key, _resolve_entities(values))
+
+
+def match_path(path, schema, roots=None):
+    '''
+    Return the schema key matching path and its fields values.
+    A leading <project.root> token matches the longest of roots prefixing path, so
+    paths outside every project match no key.
+
+        Args:
+            path   (str) : filesystem path.
+            schema (str) : schema's name.
+            roots (list) : Project roots. defaults to all Project roots, read with one
+                           query. Pass them to match many paths without queries.
+
+        Retrun:
+            (key, {field: {attr: value}}) tuple, None if path matches no key.
+
+        Example:
+            >>> match_path('/projects/unittest/sequence/101/001/pub/cam.abc', 'film')
+            ('shot_pub', {'project': {'root': '/projects/unittest'},
+                          'sequence': {'basename': '101'}, 'shot': {'basename': '001'}})
+    '''
+    best = None
+    roots = project_roots() if roots is None else roots
+
+    for (key, template) in get_templates(schema):
+        matched = template.match(path, roots)
+        if matched is None:
+            continue
+
+        rank = (matched[0], len(matched[1]))
+        if best is None or rank > best[0]:
+            best = (rank, key, matched[1])
+
+    if best is None:
+        return None
+    return best[1:]
+
+
+def project_roots():
+    '''
+    Return all Project roots, longest first as matched by match_path().
+
+        Retrun:
+            list of root paths
+    '''
+    from ..entities import Project
+
+    roots = [row.root for row in Project.find(columns=['root']) if row.root]
+    return sorted(roots, key=len, reverse=True)
+
+
+def get_templates(schema):
+    '''
+    Return (key, PathTemplate) tuples of every schema key, sorted by key.
+
+        Args:
+            schema (str) : schema's name.
+
+        Retrun:
+            list of (key, PathTemplate) tuples
+    '''
+    _check_reload(schema)
+
+    if schema not in __SCHEMAS_KEYS:
+        raw_schema = read_schema(schema)
+        __SCHEMAS_KEYS[schema] = [(key, get_template(key, schema)) for key in sorted(raw_schema)
+                                  if isinstance(raw_schema[key], string_types)]
+
+    return __SCHEMAS_KEYS[schema]
 
 
 def get_raw_path(key, schema):
@@ -55,7 +278,11 @@ def get_raw_path(key, schema):
         raise KeyError('Key "{}" was not found in "{}".'.format(
             key, __SCHEMAS_PATH[schema]))
 
-    return _get_raw_path_schema(key.lower(), raw_schema)
+    raw_path = __SCHEMAS_RAW_PATHS[schema].get(key.lower())
+    if raw_path is None:
+        raw_path = _get_raw_path_schema(key.lower(), raw_schema)
+
+    return raw_path
 
 
 def get_raw_path_fields(key, schema):
@@ -74,13 +301,15 @@ def get_raw_path_fields(key, schema):
             ['project', 'sequence', 'shot']
 
     '''
-    raw_path = get_raw_path(key, schema)
-    return _get_raw_path_fields(raw_path)
+    return list(get_template(key, schema).fields)
 
 
 def read_schema(schema):
     '''
     Return schema with given name.
+    The schema is compiled once per file version into a per-user cache file under
+    CACHE_ROOT, valid while the schema file mtime and size, or content hash, match.
+    A loaded schema is reloaded when its file changes, checked every RELOAD_INTERVAL.
 
         Args:
             schema (str) : schema's name.
@@ -88,7 +317,9 @@ def read_schema(schema):
         Return:
             schema's dict
     '''
-    if __SCHEMAS_DATA.get(schema):
+    _check_reload(schema)
+
+    if schema in __SCHEMAS_DATA:
         return __SCHEMAS_DATA[schema]
 
     filename = '{}.schema'.format(schema)
@@ -97,16 +328,136 @@ def read_schema(schema):
     if not os.path.exists(path):
         raise SchemaNotFound('Schema filename not found:{!r}'.format(path))
 
-    with open(path, mode='r') as fs:
-        schema_list = [t for t in yaml.load_all(fs)]
-        assert len(schema_list) == 1, 'Schema expected to have one root item only {} {!r}'.format(
-            schema_list, path)
-        schema_data = schema_list.pop()
+    compiled = _load_compiled(path)
 
-    __SCHEMAS_DATA[schema] = schema_data
+    __SCHEMAS_DATA[schema] = compiled['data']
     __SCHEMAS_PATH[schema] = path
+    __SCHEMAS_RAW_PATHS[schema] = compiled['raw_paths']
+    __SCHEMAS_STAT[schema] = compiled['stat']
+    __SCHEMAS_CHECKED[schema] = default_timer()
+
+    return compiled['data']
+
+
+def _check_reload(schema):
+    '''Forget a loaded schema whose file changed, at most every RELOAD_INTERVAL'''
+    checked = __SCHEMAS_CHECKED.get(schema)
+    if checked is None or default_timer() - checked < RELOAD_INTERVAL:
+        return
+
+    __SCHEMAS_CHECKED[schema] = default_timer()
+    try:
+        stat = _file_stat(__SCHEMAS_PATH[schema])
+    except OSError:
+        stat = None
+
+    if stat != __SCHEMAS_STAT[schema]:
+        LOG.info('Reloading changed schema {!r}'.format(__SCHEMAS_PATH[schema]))
+        _forget(schema)
+
+
+def _forget(schema):
+    '''Drop a schema and its compiled templates from memory'''
+    for cache in (__SCHEMAS_DATA, __SCHEMAS_PATH, __SCHEMAS_RAW_PATHS, __SCHEMAS_STAT,
+                  __SCHEMAS_CHECKED, __SCHEMAS_KEYS):
+        cache.pop(schema, None)
+
+    for cache_key in [k for k in __SCHEMAS_TEMPLATES if k[0] == schema]:
+        del __SCHEMAS_TEMPLATES[cache_key]
+
+
+def _file_stat(path):
+    '''Return (mtime, size) of path'''
+    stat = os.stat(path)
+    return (stat.st_mtime, stat.st_size)
+
+
+def _cache_path(path):
+    '''Return the compiled cache file of a schema file, per python major version'''
+    digest = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()[:12]
+    name = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(CACHE_ROOT, '{}-{}.py{}.pickle'.format(name, digest, sys.version_info[0]))
+
+
+def _load_compiled(path):
+    '''
+    Return the compiled schema of a schema file, from its cache file when valid.
+    The cache is valid when the schema file mtime and size match, or else its content
+    hash, e.g. for a touched or copied file.
+
+        Return:
+            dict(data=schema dict, raw_paths={key: expanded raw path},
+                 stat=(mtime, size), hash=content sha1, version=CACHE_VERSION)
+    '''
+    stat = _file_stat(path)
+    cache_path = _cache_path(path)
+    compiled = _read_compiled(cache_path)
+
+    if compiled is not None and compiled['stat'] == stat:
+        return compiled
+
+    with open(path, mode='rb') as fs:
+        content = fs.read()
+    digest = hashlib.sha1(content).hexdigest()
+
+    if compiled is not None and compiled['hash'] == digest:
+        compiled['stat'] = stat
+        _save_compiled(cache_path, compiled)
+        return compiled
+
+    schema_list = [t for t in yaml.load_all(content)]
+    assert len(schema_list) == 1, 'Schema expected to have one root item only {} {!r}'.format(
+        schema_list, path)
+    schema_data = schema_list.pop()
+
+    raw_paths = dict()
+    for key in schema_data:
+        try:
+            raw_paths[key] = _get_raw_path_schema(key, schema_data)
+        except (KeyError, TypeError):
+            continue   # not a path, or an unknown $key raised by get_raw_path()
+
+    compiled = dict(version=CACHE_VERSION, stat=stat, hash=digest, data=schema_data,
+                    raw_paths=raw_paths)
+    _save_compiled(cache_path, compiled)
+    return compiled
+
 
-    return schema_data
+def _read_compiled(cache_path):
+    '''Return a compiled schema cache file content, None if missing or invalid'''
+    if not os.path.exists(cache_path):
+        return None
+
+    try:
+        with open(cache_path, mode='rb') as fs:
+            compiled = pickle.load(fs)
+    except Exception as err:
+        LOG.warning('Ignoring invalid schema cache {!r}: {}'.format(cache_path, err))
+        return None
+
+    if not isinstance(compiled, dict) or compiled.get('version') != CACHE_VERSION:
+        return None
+    return compiled
+
+
+def _save_compiled(cache_path, compiled):
+    '''Write a compiled schema cache file, atomically replacing any previous one'''
+    try:
+        if not os.path.isdir(CACHE_ROOT):
+            os.makedirs(CACHE_ROOT)
+
+        (handle, temp_path) = tempfile.mkstemp(dir=CACHE_ROOT, suffix='.tmp')
+        with os.fdopen(handle, 'wb') as fs:
+            pickle.dump(compiled, fs, protocol=2)
+
+        try:
+            os.rename(temp_path, cache_path)
+        except OSError:
+            # Windows does not rename over an existing file
+            os.remove(cache_path)
+            os.rename(temp_path, cache_path)
+    except (IOError, OSError) as err:
+        LOG.warning('Can not write schema cache {!r}: {}'.format(cache_path, err))
 
 
 def _resolve_path(raw_path, fields):
@@ -121,48 +472,64 @@ def _resolve_path(raw_path, fields):
         Return:
             resovled path
     '''
-    needed = _get_raw_path_fields(raw_path)
-    missing = list(set(needed).difference(fields))
+    return PathTemplate(raw_path).resolve(fields)
 
-    if missing:
-        raise SchemaMissingFields('Missing fields {} to resolve {!r}'.format(missing, raw_path))
 
-    for reg_element in REG_SPLIT.finditer(raw_path):
-        (value, attr) = reg_element.groups()
-        value = fields[value]
+def _get_raw_path_fields(raw_path):
+    '''
+    Return a list of fields needed to resolve given raw path.
+    '''
+    return list(PathTemplate(raw_path).fields)
 
-        if not hasattr(value, attr.split(".")[0]):
-            raise AttributeError('{} has no attribute {!r}.'.format(value, attr))
 
-        value = eval("value.{}".format(attr))
+def _get_raw_path_schema(key, raw_scehma):
+    '''Return a raw path_schema string, with $key placeholders expanded'''
+    def expand(reg_placeholder):
+        return raw_scehma[reg_placeholder.group()[1:]]
 
-        raw_path = re.sub(reg_element.group(), str(value), raw_path)
+    path_schema = raw_scehma[key]
+    while REG_KEY.search(path_schema):
+        path_schema = REG_KEY.sub(expand, path_schema)
 
-    return raw_path
+    return path_schema
 
 
-def _get_raw_path_fields(raw_path):
+def _resolve_entities(values):
     '''
-    Return a list of fields needed to resolve given raw path.
+    Return match_path() fields values resolved to entities, one query per field.
+    Fields are resolved parents first, each filtered by its closest resolved parent.
+
+        Example:
+            >>> _resolve_entities({'project': {'root': '/projects/unittest'},
+                                   'sequence': {'basename': '101'}})
+            {'project': Project(), 'sequence': Sequence()}
     '''
-    result = list()
-    for regex in REG_SPLIT.finditer(raw_path):
-        field = regex.groups()[0]
-        if field not in result:
-            result.append(field)
-    return result
+    from .. import entities
 
+    fields = dict((field, value) for (field, value) in values.items()
+                  if not isinstance(value, dict))
 
-def _get_raw_path_schema(key, raw_scehma):
-    '''Return a raw path_schema string'''
-    path_schema  = raw_scehma[key]
-    reg_placholder = REG_KEY.search(path_schema)
-    while reg_placholder:
-        place_value    = reg_placholder.group()
-        path_schema  = REG_KEY.sub(raw_scehma[place_value[1:]], path_schema)
-        reg_placholder = REG_KEY.search(path_schema)
+    for (field, parents) in PARSE_PARENTS:
+        if field not in values:
+            continue
 
-    return path_schema
+        cls = getattr(entities, field.capitalize())
+        query = cls.query().filter_by(**values[field])
+
+        for parent in parents:
+            column = '{}_id'.format(parent)
+            if fields.get(parent) is not None and column in cls.__table__.c:
+                query = query.filter(cls.__table__.c[column] == fields[parent].id)
+                break
+
+        found = query.limit(2).all()
+        fields[field] = found[0] if len(found) == 1 else None
+
+    unknown = set(values).difference(fields)
+    if unknown:
+        raise ValueError('Can not resolve {} fields to entities'.format(sorted(unknown)))
+
+    return fields
 
 
 def _expand_fields(fields):
@@ -189,15 +556,173 @@ def _expand_fields(fields):
     for key, val in fields.items():
         parent = _get_parent(val)
         while parent:
-            if parent.__class__.__name__ not in result:
-                result[parent.__class__.__name__] = parent
-                parent = _get_parent(parent)
+            # Ancestors already known from another field
+            if parent.__class__.__name__ in result:
+                break
+            result[parent.__class__.__name__] = parent
+            parent = _get_parent(parent)
 
     fields.update(result)
     fields = {k.lower(): v for k, v in fields.items()}
     return fields
 
 
+class PathTemplate(object):
+    '''
+    Raw path compiled once into literal strings and <entity.attr> tokens,
+    so resolving a path is a join of attribute lookups.
+
+        Example:
+            >>> PathTemplate('<project.root>/sequence/<sequence.basename>').resolve(fields)
+            "/projects/unittest/sequence/101"
+    '''
+
+    def __init__(self, raw_path):
+        '''
+            Args:
+                raw_path (str) : raw path e.g. "<project.root>/assets/<asset.kind>".
+        '''
+        self.raw_path = raw_path
+        self.fields = []   # fields needed to resolve, in raw path order
+        self.tokens = []   # literal strings and (field, attr, getter) tokens
+
+        position = 0
+        for reg_element in REG_SPLIT.finditer(raw_path):
+            (field, attr) = reg_element.groups()
+            field = field.lower()   # fields are matched case insensitive, see _expand_fields()
+
+            if reg_element.start() > position:
+                self.tokens.append(raw_path[position:reg_element.start()])
+            self.tokens.append((field, attr, attrgetter(attr) if attr else None))
+            position = reg_element.end()
+
+            if field not in self.fields:
+                self.fields.append(field)
+
+        if position < len(raw_path):
+            self.tokens.append(raw_path[position:])
+
+        (self.regex, self._groups) = self._compile_regex(self.tokens)
+        # Raw path after a leading <project.root> token, matched after a known root
+        self._root_regex = None
+        if self.tokens and self.tokens[0][:2] == ROOT_TOKEN:
+            self._root_regex = self._compile_regex(self.tokens[1:], anchor='')[0]
+        # Longest literal of the raw path, to reject paths without it before regex matching
+        self._literal = max([t for t in self.tokens if not isinstance(t, tuple)] or [''], key=len)
+
+    def __repr__(self):
+        return '{cls}({raw_path!r})'.format(cls=self.__class__.__name__, raw_path=self.raw_path)
+
+    def resolve(self, fields):
+        '''
+        Return the path resolved with given fields.
+
+            Args:
+                fields (dict) : fields dict, see _expand_fields().
+
+            Return:
+                resolved path
+        '''
+        try:
+            return ''.join([self._value(token, fields) if isinstance(token, tuple) else token
+                            for token in self.tokens])
+        except KeyError:
+            missing = [field for field in self.fields if field not in fields]
+            if not missing:
+                raise
+            raise SchemaMissingFields('Missing fields {} to resolve {!r}'.format(
+                missing, self.raw_path))
+
+    def match(self, path, roots=None):
+        '''
+        Return the raw path token values of path, or of its parent folder matching it.
+
+            Args:
+                path   (str) : filesystem path.
+                roots (list) : Project roots a leading <project.root> token matches,
+                               longest first. None matches the shortest folders prefix.
+
+            Return:
+                (matched length, {field: {attr: value}}) tuple, None if path does not match.
+                <field> tokens without attr are returned as {field: value}.
+        '''
+        if self._literal not in path:
+            return None
+
+        if self._root_regex is not None and roots is not None:
+            return self._match_root(path, roots)
+
+        reg_match = self.regex.match(path)
+        if reg_match is None:
+            return None
+
+        return self._values(reg_match, reg_match.groups())
+
+    def _match_root(self, path, roots):
+        '''Return match() values of path under the longest root prefixing it'''
+        for root in roots:
+            root = root.rstrip('/')
+            if not path.startswith(root) or path[len(root):len(root) + 1] not in ('', '/'):
+                continue
+
+            reg_match = self._root_regex.match(path, len(root))
+            if reg_match is not None:
+                return self._values(reg_match, (root,) + reg_match.groups())
+
+        return None
+
+    def _values(self, reg_match, groups):
+        '''Return (matched length, {field: {attr: value}}) of regex match groups values'''
+        values = dict()
+        for (index, value) in enumerate(groups):
+            (field, attr) = self._groups[index]
+
+            if attr is None:
+                known = values.setdefault(field, value)
+            else:
+                known = values.setdefault(field, dict()).setdefault(attr, value)
+
+            # Same token found twice with different values
+            if known != value:
+                return None
+
+        return (reg_match.end(), values)
+
+    @staticmethod
+    def _compile_regex(tokens, anchor='^'):
+        '''
+        Return the anchored regex matching the raw path and the paths under it,
+        and the (field, attr) of each of its groups.
+        A token starting the raw path e.g. <project.root> matches any folders,
+        other tokens match a single folder name.
+        '''
+        (pattern, groups) = ([anchor], [])
+
+        for token in tokens:
+            if isinstance(token, tuple):
+                pattern.append('(.+?)' if len(pattern) == 1 and anchor else '([^/]+)')
+                groups.append(token[:2])
+            else:
+                pattern.append(re.escape(token))
+
+        pattern.append('(?=/|$)')
+        return (re.compile(''.join(pattern)), groups)
+
+    @staticmethod
+    def _value(token, fields):
+        '''Return a <entity.attr> token value string'''
+        (field, attr, getter) = token
+        value = fields[field]
+
+        if getter is None:
+            return str(value)
+
+        try:
+            return str(getter(value))
+        except AttributeError:
+            raise AttributeError('{} has no attribute {!r}.'.format(value, attr))
+
+
 class SchemaNotFound(TypeError):
     pass
 
@@ -0,0 +1,266 @@
+'''
+Folder creation engine driven by folders_*.schema files.
+
+A folders schema is a tree of folder nodes:
+
+    name: <Project.root>      # folder name, may hold <entity.attr> tokens
+    pgrp: pipeline            # optional group set on the folder
+    defer: true               # optional, sub-tree only created for entities providing
+                              # its tokens fields e.g. <sequence.basename> for a Shot
+    children: [...]           # optional child nodes
+
+get_folders() walks the tree for a set of entities and returns the folders to create.
+create_folders() creates the missing ones with a thread pool, one task per parent folder
+and depth, listing each existing parent once to skip existing folders.
+'''
+
+# imports
+import os
+import errno
+from multiprocessing.pool import ThreadPool
+from ..core import logging
+from .core import PathTemplate, SchemaMissingFields, read_schema, expand_entities
+
+try:
+    import grp
+except ImportError:
+    grp = None   # Windows
+
+try:
+    from os import scandir
+except ImportError:
+    try:
+        # Python 2.7 backport
+        from scandir import scandir
+    except ImportError:
+        scandir = None
+
+LOG = logging.getLogger(__name__, level=logging.INFO)
+
+# Default folders schema and thread pool size of create_folders()
+SCHEMA  = 'folders_film'
+THREADS = 8
+
+__TREES = dict()   # schema : (schema data, FolderNode)
+__GIDS = dict()    # group name : gid, None if unknown
+
+
+class FolderNode(object):
+    '''Folder schema node, its name compiled into a PathTemplate'''
+
+    def __init__(self, data):
+        '''
+            Args:
+                data (dict) : folders schema node e.g. {'name': 'pub', 'pgrp': 'pipeline'}.
+        '''
+        self.template = PathTemplate(str(data['name']))
+        self.pgrp = data.get('pgrp')
+        self.defer = bool(data.get('defer', False))
+        self.children = [FolderNode(child) for child in data.get('children') or []]
+
+    def __repr__(self):
+        return '{cls}({name!r})'.format(cls=self.__class__.__name__,
+                                        name=self.template.raw_path)
+
+    def walk(self, fields, parent, folders):
+        '''
+        Add this node and its children folders to folders.
+
+            Args:
+                fields  (dict) : expanded fields, see core._expand_fields().
+                parent   (str) : parent folder path, None for the root node.
+                folders (dict) : folder path : pgrp, updated.
+
+            Raises:
+                SchemaMissingFields if fields miss a token field of a node not deferred.
+        '''
+        if self.defer and any(field not in fields for field in self.template.fields):
+            return
+
+        try:
+            name = self.template.resolve(fields)
+        except SchemaMissingFields as err:
+            raise SchemaMissingFields('{} under {!r}, set defer: true to skip the folder for '
+                                      'entities without these fields'.format(err, parent))
+        path = name if parent is None else '{}/{}'.format(parent, name)
+        folders[path] = self.pgrp
+
+        for child in self.children:
+            child.walk(fields, path, folders)
+
+
+def get_tree(schema=SCHEMA):
+    '''
+    Return the root FolderNode of a folders schema, compiled once per schema file version.
+
+        Args:
+            schema (str) : folders schema's name.
+
+        Return:
+            FolderNode instance
+    '''
+    data = read_schema(schema)
+    cached = __TREES.get(schema)
+
+    if cached is None or cached[0] is not data:
+        cached = (data, FolderNode(data))
+        __TREES[schema] = cached
+
+    return cached[1]
+
+
+def get_folders(entities, schema=SCHEMA, fields=None, chunk_size=None):
+    '''
+    Return the folders of entities described by a folders schema.
+
+        Args:
+            entities    (list) : entities e.g. Shot instances of a Sequence.
+            schema       (str) : folders schema's name.
+            fields      (dict) : extra fields shared by all entities.
+            chunk_size   (int) : parent ids per query, see core.expand_entities().
+
+        Return:
+            dict of folder path : pgrp group name or None
+
+        Example:
+            >>> get_folders([Shot()])
+            {'/projects/unittest': 'pipeline', '/projects/unittest/assets': 'pipeline', ...
+             '/projects/unittest/shots/101/001/pub': None}
+    '''
+    tree = get_tree(schema)
+    folders = dict()
+
+    for (_, entity_fields) in expand_entities(entities, fields, chunk_size):
+        tree.walk(entity_fields, None, folders)
+
+    return folders
+
+
+def create_folders(entities, schema=SCHEMA, fields=None, dry_run=False, threads=THREADS):
+    '''
+    Create the missing folders of entities described by a folders schema.
+    Folders are created parents first, depth by depth. Each depth is a batch of one
+    task per parent folder run by a pool of threads, listing the parent folder once
+    when it already existed to skip existing folders.
+
+        Args:
+            entities    (list) : entities e.g. Shot instances of a Sequence.
+            schema       (str) : folders schema's name.
+            fields      (dict) : extra fields shared by all entities.
+            dry_run     (bool) : only return the missing folders, create nothing.
+            threads      (int) : thread pool size.
+
+        Return:
+            sorted list of created folders, or of missing folders when dry_run.
+    '''
+    folders = get_folders(entities, schema=schema, fields=fields)
+
+    depths = dict()   # depth : {parent: [folders]}
+    for path in folders:
+        parent = os.path.dirname(path)
+        depths.setdefault(path.count('/'), dict()).setdefault(parent, []).append(path)
+
+    created = []
+    new = set()   # folders created, or missing when dry_run, by previous depths
+
+    pool = ThreadPool(max(1, threads))
+    try:
+        for depth in sorted(depths):
+            tasks = [(folder, paths, folder in new, folders, dry_run)
+                     for (folder, paths) in depths[depth].items()]
+
+            for paths in pool.map(_create_batch, tasks):
+                created.extend(paths)
+                new.update(paths)
+    finally:
+        pool.close()
+        pool.join()
+
+    LOG.info('{} {} of {} folders'.format('Missing' if dry_run else 'Created',
+                                          len(created), len(folders)))
+    return sorted(created)
+
+
+def _create_batch(task):
+    '''
+    Create the missing folders of a parent folder.
+
+        Args:
+            task (tuple) : (parent path, folders, parent is new, folders pgrp dict, dry_run)
+
+        Return:
+            list of created folders, or missing folders when dry_run.
+    '''
+    (parent, paths, parent_new, folders, dry_run) = task
+    existing = set() if parent_new else _list_folders(parent)
+
+    created = []
+    for path in paths:
+        if os.path.basename(path) in existing:
+            continue
+
+        if not dry_run and not _make_folder(path, folders[path]):
+            continue
+        created.append(path)
+
+    return created
+
+
+def _list_folders(path):
+    '''Return the set of folder names in path, empty if path does not exist'''
+    try:
+        if scandir is None:
+            return set(name for name in os.listdir(path)
+                       if os.path.isdir(os.path.join(path, name)))
+        return set(entry.name for entry in scandir(path) if entry.is_dir())
+    except OSError as err:
+        if err.errno in (errno.ENOENT, errno.ENOTDIR):
+            return set()
+        raise
+
+
+def _make_folder(path, pgrp=None):
+    '''
+    Create a folder and set its group.
+
+        Return:
+            True if created, False if it already existed.
+    '''
+    try:
+        os.mkdir(path)
+    except OSError as err:
+        if err.errno == errno.EEXIST:
+            return False
+        if err.errno != errno.ENOENT:
+            raise
+        # Folders above the schema tree e.g. the project root parent
+        try:
+            os.makedirs(path)
+        except OSError as err:
+            if err.errno != errno.EEXIST:
+                raise
+            return False
+
+    if pgrp:
+        _chgrp(path, pgrp)
+    return True
+
+
+def _chgrp(path, group):
+    '''Set the group of path, warn once per unknown or forbidden group'''
+    if grp is None:
+        return
+
+    if group not in __GIDS:
+        try:
+            __GIDS[group] = grp.getgrnam(group).gr_gid
+        except KeyError:
+            LOG.warning('Unknown pgrp group {!r}, folders group left unchanged'.format(group))
+            __GIDS[group] = None
+
+    if __GIDS[group] is not None:
+        try:
+            os.chown(path, -1, __GIDS[group])
+        except OSError as err:
+            LOG.warning('Can not set {!r} group {!r}: {}'.format(path, group, err))
+            __GIDS[group] = None
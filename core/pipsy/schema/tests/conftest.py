@@ -1,3 +1,5 @@
+import pytest
+from pipsy.schema import core
 from pipsy.entities.tests.conftest import (session, create_db, project, episode,
                                            sequence, sequence_episode,
                                            shot, shot_episode,
@@ -5,3 +7,9 @@ from pipsy.entities.tests.conftest import (session, create_db, project, episode,
                                            instance, user,
                                            task_shot, task_sequence, task_asset,
                                            publishkind_geohigh, publishgroup_shot)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema_cache_root(tmpdir_factory):
+    core.CACHE_ROOT = str(tmpdir_factory.mktemp('schema_cache'))
+    return core.CACHE_ROOT
@@ -0,0 +1,80 @@
+import os
+import pytest
+from pipsy.schema import core, folders
+from pipsy.schema.core import SchemaMissingFields
+
+
+@pytest.fixture
+def schema_folders(tmpdir, monkeypatch):
+    schemas_root = tmpdir.mkdir('schemas')
+    root = tmpdir.join('projects')
+    schemas_root.join('folders_test.schema').write('\n'.join([
+        'name: {}'.format(root),
+        'pgrp: pipsy_unknown_group',
+        'children:',
+        '    - name: assets',
+        '      children:',
+        '        - name: <asset.kind>',
+        '          defer: true',
+        '    - name: shots',
+        '      children:',
+        '        - name: <sequence.basename>',
+        '          defer: true',
+        '          children:',
+        '            - name: <shot.basename>',
+        '              defer: true',
+        '              children:',
+        '                - name: pub',
+        '                - name: wip',
+        '']))
+
+    monkeypatch.setattr(core, 'SCHEMAS_ROOT', str(schemas_root))
+    yield str(root)
+    core._forget('folders_test')
+
+
+def test_get_folders_film(shot):
+    result = folders.get_folders([shot])
+    shot_root = '{}/shots/{}/{}'.format(shot.project.root, shot.sequence.basename,
+                                        shot.basename)
+    assert result[shot.project.root] == 'pipeline'
+    assert '{}/pub'.format(shot_root) in result
+    assert '{}/wip'.format(shot_root) in result
+    assert not any(path.startswith('{}/assets/'.format(shot.project.root)) for path in result)
+
+
+def test_create_folders(schema_folders, shot):
+    shot_root = '{}/shots/{}/{}'.format(schema_folders, shot.sequence.basename, shot.basename)
+
+    missing = folders.create_folders([shot], schema='folders_test', dry_run=True)
+    assert '{}/pub'.format(shot_root) in missing
+    assert missing == sorted(missing)
+    assert not os.path.exists(schema_folders)
+
+    created = folders.create_folders([shot], schema='folders_test', threads=2)
+    assert created == missing
+    assert all(os.path.isdir(path) for path in created)
+
+    assert folders.create_folders([shot], schema='folders_test') == []
+
+
+def test_create_folders_existing(schema_folders, shot):
+    shot_root = '{}/shots/{}/{}'.format(schema_folders, shot.sequence.basename, shot.basename)
+    os.makedirs('{}/pub'.format(shot_root))
+
+    result = folders.create_folders([shot], schema='folders_test', dry_run=True)
+    assert result == ['{}/assets'.format(schema_folders), '{}/wip'.format(shot_root)]
+
+
+def test_get_folders_missing_fields(schema_folders, tmpdir, sequence):
+    # <shot.basename> node not deferred, required by a Sequence
+    schema_file = tmpdir.join('schemas', 'folders_test.schema')
+    schema_file.write(schema_file.read().replace('              defer: true\n', ''))
+    core._forget('folders_test')
+
+    try:
+        folders.get_folders([sequence], schema='folders_test')
+    except SchemaMissingFields as err:
+        assert 'defer' in str(err)
+        return
+    raise AssertionError('Expected SchemaMissingFields for a node not deferred')
@@ -1,3 +1,4 @@
+import os
 import pytest
 from pipsy.schema import core
 
@@ -9,6 +10,18 @@ def schema_film():
     return schema
 
 
+@pytest.fixture
+def schema_cached(tmpdir, monkeypatch):
+    schemas_root = tmpdir.mkdir('schemas')
+    schema_file = schemas_root.join('cached.schema')
+    schema_file.write('project_root: <project.root>\nshot_root: $project_root/<shot.basename>\n')
+
+    monkeypatch.setattr(core, 'SCHEMAS_ROOT', str(schemas_root))
+    monkeypatch.setattr(core, 'CACHE_ROOT', str(tmpdir.join('cache')))
+    yield schema_file
+    core._forget('cached')
+
+
 def test_expand_values_task_shot(task_shot):
     result = core._expand_fields({task_shot.cls_name(): task_shot, 'key': 'value'})
     assert task_shot.project in result.values()
@@ -25,6 +38,14 @@ def test_expand_values_task_asset(task_asset):
     assert 'value' in result.values()
 
 
+def test_expand_values_shared_parent(task_asset):
+    # Fields sharing ancestors, used to loop forever
+    result = core._expand_fields({'asset': task_asset.asset, 'Task': task_asset})
+    assert result['asset'] == task_asset.asset
+    assert result['project'] == task_asset.project
+    assert result['task'] == task_asset
+
+
 def test_film_get_raw_path():
     assert core.get_raw_path('project_root', 'film')
     assert core.get_raw_path('asset_root', 'film')
@@ -46,6 +67,126 @@ def test_get_path_shot_film(shot):
     assert core.get_path('shot_pub', fields, 'film') == '/tmp/unittest/sequence/101/001/pub'
 
 
+def test_get_raw_path_schema_keys():
+    raw_schema = {'root': '<project.root>', 'kind': '<asset.kind>', 'asset': '$root/$kind/asset'}
+    assert core._get_raw_path_schema('asset', raw_schema) == '<project.root>/<asset.kind>/asset'
+
+
+def test_get_paths(shot, shot_episode):
+    paths = core.get_paths('shot_pub', [shot, shot_episode], 'film')
+    assert paths == {shot: core.get_path('shot_pub', {'shot': shot}, 'film'),
+                     shot_episode: core.get_path('shot_pub', {'shot': shot_episode}, 'film')}
+
+
+def test_get_paths_fields(task_asset, user):
+    paths = core.get_paths('asset_wip_stage_user', [task_asset], 'film', fields={'user': user})
+    assert paths[task_asset].endswith('/wip/{}/{}'.format(task_asset.stage, user.login))
+
+    fields = {'asset': task_asset.asset, 'user': user}
+    assert core.get_paths('asset_wip_stage_user', [task_asset], 'film', fields=fields) == paths
+
+
+def test_read_schema_cache(schema_cached, monkeypatch):
+    assert core.get_raw_path('shot_root', 'cached') == '<project.root>/<shot.basename>'
+    assert len(os.listdir(core.CACHE_ROOT)) == 1
+
+    # As in a new process, the compiled schema is loaded without parsing YAML
+    core._forget('cached')
+    monkeypatch.setattr(core.yaml, 'load_all', None)
+    assert core.get_raw_path('shot_root', 'cached') == '<project.root>/<shot.basename>'
+    assert core.read_schema('cached')['shot_root'] == '$project_root/<shot.basename>'
+
+
+def test_read_schema_reload(schema_cached, monkeypatch):
+    assert core.get_template('shot_root', 'cached').fields == ['project', 'shot']
+
+    monkeypatch.setattr(core, 'RELOAD_INTERVAL', 0)
+    schema_cached.write('project_root: <project.root>\nshot_root: $project_root/<shot.name>\n')
+
+    assert core.get_raw_path('shot_root', 'cached') == '<project.root>/<shot.name>'
+    assert core.get_template('shot_root', 'cached').raw_path == '<project.root>/<shot.name>'
+
+
+def test_get_template():
+    template = core.get_template('shot_pub', 'film')
+    assert template is core.get_template('SHOT_PUB', 'film')
+    assert template.fields == ['project', 'sequence', 'shot']
+    assert template.raw_path == core.get_raw_path('shot_pub', 'film')
+
+
+def test_template_resolve(shot):
+    template = core.PathTemplate('<project.root>/<sequence.basename>_<shot.basename>/<version>')
+    fields = core._expand_fields({'shot': shot, 'version': 'v001'})
+    assert template.resolve(fields) == '/tmp/unittest/101_001/v001'
+
+
+def test_template_resolve_missing_fields(shot):
+    try:
+        core.get_path('shot_root', {'sequence': shot.sequence}, 'film')
+    except core.SchemaMissingFields:
+        return
+    raise AssertionError('Expected SchemaMissingFields for a missing shot field')
+
+
+def test_template_resolve_attribute_error(shot):
+    try:
+        core.PathTemplate('<shot.no_attr>').resolve({'shot': shot})
+    except AttributeError:
+        return
+    raise AssertionError('Expected AttributeError for an unknown attribute')
+
+
+def test_match_path(shot):
+    path = core.get_path('shot_pub', {'shot': shot}, 'film')
+    values = {'project': {'root': shot.project.root},
+              'sequence': {'basename': shot.sequence.basename},
+              'shot': {'basename': shot.basename}}
+    assert core.match_path(path, 'film') == ('shot_pub', values)
+    assert core.match_path(path + '/cam/cam.abc', 'film') == ('shot_pub', values)
+    assert core.match_path(path + 'lish', 'film')[0] == 'shot_root'
+
+
+def test_parse_path_shot(shot):
+    path = core.get_path('shot_wip', {'shot': shot}, 'film') + '/anim_v001.ma'
+    fields = {'project': shot.project, 'sequence': shot.sequence, 'shot': shot}
+    assert core.parse_path(path, 'film') == ('shot_wip', fields)
+
+
+def test_parse_path_task_asset(task_asset, user):
+    path = core.get_path('asset_wip_stage_user', {'task': task_asset, 'user': user}, 'film')
+    (key, fields) = core.parse_path(path, 'film')
+    assert key == 'asset_wip_stage_user'
+    assert fields == {'project': task_asset.project, 'asset': task_asset.asset,
+                      'task': task_asset, 'user': user}
+
+
+def test_match_path_project(project):
+    values = {'project': {'root': project.root}}
+    assert core.match_path(project.root, 'film') == ('project_root', values)
+    path = project.root + '/editorial/cut.edl'
+    assert core.match_path(path, 'film') == ('project_root', values)
+
+    # Only given roots are matched
+    assert core.match_path(project.root, 'film', roots=[]) is None
+    assert core.match_path('/nowhere/anim_v001.ma', 'film', roots=['/nowhere']) == (
+        'project_root', {'project': {'root': '/nowhere'}})
+
+
+def test_parse_path_project(project):
+    path = project.root + '/editorial/cut.edl'
+    assert core.parse_path(path, 'film') == ('project_root', {'project': project})
+
+    # Only given roots are matched
+    assert core.parse_path(path, 'film', roots=[project.root]) == (
+        'project_root', {'project': project})
+    assert core.parse_path(path, 'film', roots=[]) is None
+
+
+def test_parse_path_unknown():
+    assert core.parse_path('/nowhere/anim_v001.ma', 'film') is None
+    assert core.parse_path('/tmp/foo.txt', 'film') is None
+
+
 # def test_get_path_keyerror(capsys):
 #     # TODO: expect it to fail on KeyError
 #     # with capsys.disabled():